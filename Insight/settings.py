@@ -1,4 +1,5 @@
 from pathlib import Path
+import sys
 
 import dj_database_url
 
@@ -19,6 +20,10 @@ SECRET_KEY = env('SECRET_KEY')
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
+# run by `python manage.py test`, the runner keeps the caches and stored models out of the repository
+TESTING     = len(sys.argv) > 1 and sys.argv[1] == "test"
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
 ALLOWED_HOSTS = ['127.0.0.1', '.vercel.app', '.onrender.com', 'localhost']
 
 
@@ -39,6 +44,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware', 
     'django.middleware.common.CommonMiddleware', 
     'django.middleware.security.SecurityMiddleware',
@@ -58,6 +64,13 @@ REST_FRAMEWORK = {
 
 ROOT_URLCONF = 'Insight.urls'
 
+# per worker latency histograms of requests and prediction stages served at /metrics
+METRICS = {
+    'ENABLED'   : env.bool('METRICS', default = False),
+    'MAX_SERIES': env.int('METRICS_MAX_SERIES', default = 1000),    # histograms kept, later label sets share an overflow one
+    'TOKEN'     : env.str('METRICS_TOKEN', default = ''),           # bearer token of the scraper, staff users can always read them
+}
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/4.1/howto/static-files/
 
@@ -147,6 +160,138 @@ FILE_BASED_CACHE = {
 
 CACHES = FILE_BASED_CACHE
 
+# lifetime of the cached model file records and listings, see core/listing_cache.py
+MODEL_FILES_CACHE_TIMEOUT = 60 * 60 * 2
+
+# cursor pagination of the model file listings
+MODEL_FILES_PAGE_SIZE       = 50
+MODEL_FILES_MAX_PAGE_SIZE   = 500
+
+# in-process LRU cache of loaded estimators, one per worker process
+MODEL_CACHE = {
+    'MAX_ENTRIES'   : env.int('MODEL_CACHE_MAX_ENTRIES', default = 32),
+    'MAX_BYTES'     : env.int('MODEL_CACHE_MAX_BYTES', default = 512 * 1024 * 1024),
+}
+
+# per worker cache of API key owners, unknown keys are cached for NEGATIVE_TTL seconds
+API_KEY_CACHE = {
+    'TTL'           : 60,
+    'NEGATIVE_TTL'  : 10,
+    'MAX_ENTRIES'   : 10000,
+}
+
+# preloading of pinned and the TOP_N most predicted models into the model cache,
+# started when the app is ready (ON_READY) or by the gunicorn post_fork hook in core.warmup
+MODEL_WARMUP = {
+    'ENABLED'   : env.bool('MODEL_WARMUP', default = False),
+    'ON_READY'  : env.bool('MODEL_WARMUP_ON_READY', default = False),
+    'TOP_N'     : env.int('MODEL_WARMUP_TOP_N', default = 10),
+    'PINNED'    : env.list('MODEL_WARMUP_PINNED', default = []),
+}
+
+# seconds between writes of the prediction counts used to pick the hot models, counted in memory meanwhile
+PREDICTION_COUNT_FLUSH_INTERVAL = env.int('PREDICTION_COUNT_FLUSH_INTERVAL', default = 30)
+
+# `python manage.py importtime` fails when Insight.wsgi takes longer to import,
+# or warns when one of the lazily imported modules is loaded at start up
+STARTUP_IMPORT_BUDGET_MS    = 1000
+STARTUP_LAZY_MODULES        = ["sklearn", "pandas", "numpy", "scipy", "matplotlib", "seaborn", "joblib"]
+
+# uncompressed copies of loaded models memory mapped by every worker process
+SHARED_MODEL_STORE = {
+    'ENABLED'   : env.bool('SHARED_MODEL_STORE', default = True),
+    'DIRECTORY' : BASE_DIR / 'caches' / 'models',
+}
+
+# coalesces concurrent small predictions on the same model into one predict call,
+# a batch runs on one of WORKERS threads after WINDOW seconds or once it holds MAX_ROWS rows
+PREDICTION_BATCHING = {
+    'ENABLED'   : env.bool('PREDICTION_BATCHING', default = False),
+    'WINDOW'    : 0.002,
+    'MAX_ROWS'  : 256,
+    'WORKERS'   : env.int('PREDICTION_BATCHING_WORKERS', default = 4),
+}
+
+# threads of an ASGI worker loading models and predicting for the async prediction endpoint,
+# connections waiting on them hold no thread
+ASYNC_PREDICTION_THREADS = env.int('ASYNC_PREDICTION_THREADS', default = 8)
+
+# model files are joblib dumps with a format header, see core/serialization.py
+# COMPRESS is one of zlib, gzip, bz2, lzma, lz4, zstd (needs zstandard) or empty for none,
+# compressed files are smaller but cannot be memory mapped by the shared model store
+MODEL_SERIALIZATION = {
+    'COMPRESS'          : env('MODEL_COMPRESS', default = ''),
+    'COMPRESS_LEVEL'    : env.int('MODEL_COMPRESS_LEVEL', default = 3),
+}
+
+# uploads over FILE_UPLOAD_MAX_MEMORY_SIZE are spooled to FILE_UPLOAD_TEMP_DIR,
+# training datasets are parsed from there into compact dtypes and the parsed
+# columns kept as .npy files keyed by the file content, see core/datasets.py
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2 * 1024 * 1024
+FILE_UPLOAD_TEMP_DIR        = env('FILE_UPLOAD_TEMP_DIR', default = None)
+
+# sklearn predicts through the estimators, compiled evaluates tree classifiers from flat numpy arrays,
+# it beats sklearn's per call overhead on small batches, larger ones still go to sklearn
+INFERENCE = {
+    'BACKEND'           : env.str('INFERENCE_BACKEND', default = 'sklearn'),
+    'COMPILED_MAX_ROWS' : env.int('INFERENCE_COMPILED_MAX_ROWS', default = 512),
+}
+
+# K-Nearest Neighbors models trained on at least MIN_ROWS rows get a neighbour index next to the model file,
+# ivf scans the N_PROBE nearest of N_LISTS k-means lists (0 = sqrt of the rows), hnsw needs hnswlib,
+# more probes or a larger HNSW_EF raise recall and latency, the recall of each index is reported by its training job
+KNN_ANN = {
+    'ENABLED'   : env.bool('KNN_ANN', default = False),
+    'BACKEND'   : env.str('KNN_ANN_BACKEND', default = 'ivf'),
+    'MIN_ROWS'  : env.int('KNN_ANN_MIN_ROWS', default = 100000),
+    'N_LISTS'   : env.int('KNN_ANN_N_LISTS', default = 0),
+    'N_PROBE'   : env.int('KNN_ANN_N_PROBE', default = 8),
+    'HNSW_M'    : env.int('KNN_ANN_HNSW_M', default = 16),
+    'HNSW_EF'   : env.int('KNN_ANN_HNSW_EF', default = 64),
+}
+
+# analysis reports are computed this many rows at a time and cached per model version and dataset
+EVALUATION = {
+    'CHUNK_SIZE'    : env.int('EVALUATION_CHUNK_SIZE', default = 50000),
+    'BINS'          : env.int('EVALUATION_BINS', default = 100),          # score thresholds of the ROC and PR curves
+    'CACHE_TIMEOUT' : env.int('EVALUATION_CACHE_TIMEOUT', default = 60 * 60 * 24),
+}
+
+# columnar copies of registered datasets, ENABLED also keeps the parsed training uploads up to MAX_BYTES
+DATASET_CACHE = {
+    'ENABLED'   : env.bool('DATASET_CACHE', default = False),
+    'DIRECTORY' : BASE_DIR / 'caches' / 'datasets',
+    'MAX_BYTES' : env.int('DATASET_CACHE_MAX_BYTES', default = 2 * 1024 * 1024 * 1024),
+}
+
+# rows parsed and predicted at once by the batch prediction endpoint
+BATCH_PREDICT_CHUNK_SIZE        = env.int('BATCH_PREDICT_CHUNK_SIZE', default = 10000)
+BATCH_PREDICT_MAX_CHUNK_SIZE    = 100000
+
+# training jobs are run by `python manage.py run_training_worker`
+TRAINING_WORKERS            = env.int('TRAINING_WORKERS', default = 2)
+TRAINING_POLL_INTERVAL      = 2             # seconds between polls of an empty queue
+TRAINING_HEARTBEAT_TIMEOUT  = env.int('TRAINING_HEARTBEAT_TIMEOUT', default = 120)   # seconds without heartbeat before a running job is reclaimed
+TRAINING_MAX_ATTEMPTS       = env.int('TRAINING_MAX_ATTEMPTS', default = 3)
+
+# candidates a hyperparameter search may evaluate, the size of its param_grid or its n_iter
+SEARCH_MAX_CANDIDATES       = env.int('SEARCH_MAX_CANDIDATES', default = 500)
+SEARCH_PROGRESS_INTERVAL    = env.float('SEARCH_PROGRESS_INTERVAL', default = 1.0)   # seconds between progress updates of a running search
+
+# cores given to n_jobs and the BLAS/OpenMP thread pools, a model's own n_jobs is capped by these
+CPU_BUDGET = {
+    'TRAINING'   : env.int('CPU_BUDGET_TRAINING', default = 0),     # per training job, 0 shares the machine among TRAINING_WORKERS
+    'PREDICTION' : env.int('CPU_BUDGET_PREDICTION', default = 1),   # per prediction in a web worker
+}
+
+# rows given to each partial_fit call of incremental training (mode = incremental)
+INCREMENTAL_TRAINING_CHUNK_SIZE = env.int('INCREMENTAL_TRAINING_CHUNK_SIZE', default = 10000)
+
+# stored versions of every model, older ones are deleted unless served
+MODEL_VERSIONS = {
+    'KEEP'  : env.int('MODEL_VERSIONS_KEEP', default = 5),
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -3,4 +3,8 @@ from django.contrib import admin
 from .models import *
 
 admin.site.register(ModelFile)
-admin.site.register(User)
\ No newline at end of file
+admin.site.register(User)
+admin.site.register(TrainingJob)
+admin.site.register(Dataset)
+admin.site.register(ModelArtifact)
+admin.site.register(ModelVersion)
\ No newline at end of file
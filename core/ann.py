@@ -0,0 +1,290 @@
+import math
+import time
+
+from django.conf    import settings
+
+from .helper        import lazy_import
+from .inference     import float_features
+from .shared_store  import SharedArrays
+
+np = lazy_import("numpy")
+
+
+backends = ("ivf", "hnsw")
+
+# layout of the IVF arrays, part of the version token of the index exported to the shared model store
+INDEX_FORMAT = 1
+
+
+def index_name(model_name):
+    """storage name of the neighbour index stored next to a model file"""
+    return f"{model_name}.ann"
+
+
+class IVFIndex(SharedArrays):
+    """Inverted file index of euclidean vectors
+
+        a k-means coarse quantizer splits the rows into lists, a query scans
+        only the rows of its n_probe nearest lists, more probes trade latency
+        for recall
+    """
+
+    ARRAYS = ("centroids", "vectors", "ids", "offsets")
+
+    def __init__(self, X, n_lists = None, sample_size = 256):
+        from sklearn.cluster import MiniBatchKMeans
+
+        X       = np.ascontiguousarray(X, dtype = np.float32)
+        n_lists = n_lists or max(int(math.sqrt(len(X))), 1)
+        n_lists = min(n_lists, len(X))
+
+        # the quantizer is fitted on a sample, sample_size rows per list are plenty
+        rng     = np.random.default_rng(0)
+        sample  = X[rng.choice(len(X), min(len(X), n_lists * sample_size), replace = False)]
+        kmeans  = MiniBatchKMeans(n_clusters = n_lists, random_state = 0, n_init = 3).fit(sample)
+
+        self.centroids = kmeans.cluster_centers_.astype(np.float32)
+        assignment     = self.nearest_lists(X, 1)[:, 0]
+        order          = np.argsort(assignment, kind = "stable")
+
+        # rows of list i are vectors[offsets[i]:offsets[i + 1]], ids map them back to the training rows
+        self.vectors   = X[order]
+        self.ids       = order.astype(np.int64)
+        self.offsets   = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength = n_lists))])
+
+    def nearest_lists(self, Q, n):
+        distances = squared_distances(Q, self.centroids)
+
+        if n >= len(self.centroids):
+            return np.argsort(distances, axis = 1)
+
+        nearest = np.argpartition(distances, n - 1, axis = 1)[:, :n]
+
+        return np.take_along_axis(nearest, np.argsort(np.take_along_axis(distances, nearest, axis = 1), axis = 1), axis = 1)
+
+    def query(self, Q, k, n_probe = None):
+        """k nearest training rows of every query row
+
+        Args:
+            Q (np.ndarray): float32 query rows
+            k (int): no of neighbours
+            n_probe (int, optional): no of lists scanned per query. Defaults to KNN_ANN['N_PROBE'].
+
+        Returns:
+            (np.ndarray, np.ndarray): (queries, k) euclidean distances and training row ids
+        """
+        n_probe   = min(n_probe or settings.KNN_ANN['N_PROBE'], len(self.centroids))
+        lists     = self.nearest_lists(Q, n_probe)
+        distances = np.full((len(Q), k), np.inf)
+        ids       = np.zeros((len(Q), k), dtype = np.int64)
+
+        for i, q in enumerate(Q):
+            rows = self.rows(lists[i], k)
+
+            if rows is None:
+                # too few rows in the probed lists, scan every list of this query
+                rows = self.rows(self.nearest_lists(q[None, :], len(self.centroids))[0], k)
+
+            candidate = np.square(self.vectors[rows] - q).sum(axis = 1)
+            n         = min(k, len(rows))
+            nearest   = np.argpartition(candidate, n - 1)[:n]
+            nearest   = nearest[np.argsort(candidate[nearest], kind = "stable")]
+
+            distances[i, :n] = np.sqrt(candidate[nearest])
+            ids[i, :n]       = self.ids[rows[nearest]]
+
+        return distances, ids
+
+    def rows(self, lists, k):
+        """positions of the rows of the lists, None when they hold fewer than k rows"""
+        ranges = [np.arange(self.offsets[l], self.offsets[l + 1]) for l in lists]
+        rows   = np.concatenate(ranges) if ranges else np.zeros(0, dtype = np.int64)
+
+        if len(rows) < k and len(rows) < len(self.vectors):
+            return None
+
+        return rows
+
+
+class HNSWIndex:
+    """Hierarchical navigable small world graph of hnswlib, ef trades latency for recall"""
+
+    def __init__(self, X, M = 16, ef_construction = 200):
+        import hnswlib
+
+        X = np.ascontiguousarray(X, dtype = np.float32)
+
+        self.index = hnswlib.Index(space = "l2", dim = X.shape[1])
+        self.index.init_index(max_elements = len(X), M = M, ef_construction = ef_construction, random_seed = 0)
+        self.index.add_items(X, np.arange(len(X)))
+
+    def query(self, Q, k, ef = None):
+        self.index.set_ef(max(ef or settings.KNN_ANN['HNSW_EF'], k))
+        ids, distances = self.index.knn_query(Q, k = k)
+
+        return np.sqrt(distances), ids.astype(np.int64)
+
+
+def build_index(model):
+    """neighbour index of a fitted K-Nearest Neighbors classifier
+
+    Args:
+        model (model object): fitted estimator
+
+    Returns:
+        IVFIndex | HNSWIndex: index or None when the model is not a large euclidean knn model
+    """
+    config = settings.KNN_ANN
+
+    if not config['ENABLED'] or type(model).__name__ != "KNeighborsClassifier":
+        return None
+
+    if getattr(model, "effective_metric_", None) != "euclidean" or len(model._fit_X) < config['MIN_ROWS']:
+        return None
+
+    if config['BACKEND'] not in backends:
+        raise ValueError(f"knn ann backend must be one of {', '.join(backends)}")
+
+    if config['BACKEND'] == "hnsw":
+        return HNSWIndex(model._fit_X, M = config['HNSW_M'])
+
+    return IVFIndex(model._fit_X, n_lists = config['N_LISTS'] or None)
+
+
+def shared_index(read, shared):
+    """neighbour index whose IVF lists are memory mapped from the shared model store like the compiled trees
+
+        the stored index is only read when its arrays are not exported yet, an
+        HNSW graph lives in hnswlib's own memory and is read as it is, its
+        empty export only records that it has no arrays to share
+
+    Args:
+        read (callable): reads the index stored next to the model file
+        shared (callable): given a function building the arrays, returns them from the shared model store
+
+    Returns:
+        IVFIndex | HNSWIndex: index
+    """
+    index = None
+
+    def build():
+        nonlocal index
+        index = read()
+
+        return index.arrays() if isinstance(index, IVFIndex) else {}
+
+    arrays = shared(build)
+
+    if arrays:
+        return IVFIndex.from_arrays(arrays)
+
+    return index if index is not None else read()
+
+
+class ANNClassifier:
+    """K-Nearest Neighbors classifier voting over the neighbours found by an index
+
+        every other attribute is read from the sklearn estimator, which also
+        predicts inputs the index can't take as they are
+    """
+
+    def __init__(self, estimator, index):
+        self.estimator = estimator
+        self.index     = index
+
+    def __getattr__(self, attr):
+        return getattr(self.estimator, attr)
+
+    def kneighbors(self, X, n_neighbors = None, return_distance = True):
+        features = float_features(self.estimator, X)
+
+        if features is None:
+            return self.estimator.kneighbors(X, n_neighbors, return_distance)
+
+        distances, ids = self.index.query(features, n_neighbors or self.estimator.n_neighbors)
+
+        return (distances, ids) if return_distance else ids
+
+    def predict_proba(self, X):
+        features = float_features(self.estimator, X)
+
+        if features is None:
+            return self.estimator.predict_proba(X)
+
+        distances, ids = self.index.query(features, self.estimator.n_neighbors)
+        labels         = self.estimator._y[ids]
+
+        if self.estimator.weights == "distance":
+            with np.errstate(divide = "ignore"):
+                weights = 1 / distances
+            # rows matching a training row exactly vote alone, like sklearn
+            exact   = np.isinf(weights).any(axis = 1)
+            weights[exact] = np.isinf(weights[exact])
+        else:
+            weights = np.ones_like(distances)
+
+        n_classes = len(self.estimator.classes_)
+        rows      = np.repeat(np.arange(len(labels)), labels.shape[1])
+        proba     = np.bincount(rows * n_classes + labels.ravel(), weights.ravel(), minlength = len(labels) * n_classes)
+        proba     = proba.reshape(len(labels), n_classes)
+
+        return proba / np.maximum(proba.sum(axis = 1, keepdims = True), np.finfo(float).tiny)
+
+    def predict(self, X):
+        if float_features(self.estimator, X) is None:
+            return self.estimator.predict(X)
+
+        return self.estimator.classes_.take(np.argmax(self.predict_proba(X), axis = 1), axis = 0)
+
+
+def recall_report(model, index, queries = 1000):
+    """recall of the index against the exact neighbours of the estimator on training rows
+
+    Args:
+        model (model object): fitted K-Nearest Neighbors classifier
+        index (IVFIndex | HNSWIndex): its neighbour index
+        queries (int, optional): no of training rows queried. Defaults to 1000.
+
+    Returns:
+        dict: recall at k, prediction agreement and single row latency of both searches
+    """
+    X       = model._fit_X
+    rng     = np.random.default_rng(0)
+    Q       = np.asarray(X[rng.choice(len(X), min(queries, len(X)), replace = False)], dtype = np.float32)
+    k       = model.n_neighbors
+
+    _, exact = model.kneighbors(Q, k)
+    _, found = index.query(Q, k)
+
+    hits    = [len(np.intersect1d(a, b)) for a, b in zip(exact, found)]
+    ann     = ANNClassifier(model, index)
+
+    # latency of single row queries, as sent to the prediction endpoint
+    single  = Q[:50]
+
+    start   = time.perf_counter()
+    for q in single:
+        model.kneighbors(q[None, :], k)
+    exact_s = time.perf_counter() - start
+
+    start   = time.perf_counter()
+    for q in single:
+        index.query(q[None, :], k)
+    ann_s   = time.perf_counter() - start
+
+    return {
+        "backend"             : type(index).__name__,
+        "queries"             : len(Q),
+        "k"                   : k,
+        "recall_at_k"         : float(np.sum(hits) / (len(Q) * k)),
+        "prediction_agreement": float(np.mean(ann.predict(Q) == model.predict(Q))),
+        "exact_ms_per_query"  : exact_s * 1000 / len(single),
+        "ann_ms_per_query"    : ann_s * 1000 / len(single),
+    }
+
+
+def squared_distances(A, B):
+    """(rows of A, rows of B) squared euclidean distances"""
+    distances = (A * A).sum(axis = 1)[:, None] - 2 * (A @ B.T) + (B * B).sum(axis = 1)[None, :]
+
+    return np.maximum(distances, 0)
@@ -5,4 +5,15 @@ class CoreConfig(AppConfig):
     name = 'core'
 
     def ready(self):
-        from . import signals
\ No newline at end of file
+        from . import signals
+
+        from django.conf import settings
+
+        from .cpu import limit_process_threads
+        limit_process_threads()
+
+        if settings.MODEL_WARMUP['ENABLED'] and settings.MODEL_WARMUP['ON_READY']:
+            # preload in the background so app loading is not delayed,
+            # with gunicorn --preload use the post_fork hook of core.warmup instead
+            from .warmup import start_warm_up
+            start_warm_up()
\ No newline at end of file
@@ -1,6 +1,160 @@
-from rest_framework.authentication import SessionAuthentication, BasicAuthentication 
+from rest_framework.authentication import SessionAuthentication, BasicAuthentication, BaseAuthentication
+from rest_framework.exceptions     import AuthenticationFailed
+
+from django.conf import settings
+
+from threading       import Lock
+from collections.abc import Mapping
+import hashlib
+import time
 
 class CsrfExemptSessionAuthentication(SessionAuthentication):
 
     def enforce_csrf(self, request):
-        return  
\ No newline at end of file
+        return  
+
+
+def hash_api_key(key):
+    """hash of the API key, the only form in which keys are stored"""
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class APIKeyCache:
+    """In-memory TTL cache of API key hash to user, unknown keys are cached too
+
+        Entries are per worker process, a regenerated key is dropped here at
+        once and from other workers when its entry expires.
+    """
+
+    def __init__(self, ttl = 60, negative_ttl = 10, max_entries = 10000):
+        self.ttl          = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries  = max_entries
+
+        self._entries     = {}          # key hash -> (user or None, expires at)
+        self._lock        = Lock()
+
+    def resolve(self, key):
+        """user owning the API key
+
+        Args:
+            key (str): API key sent by the client
+
+        Returns:
+            User: owner of the key or None if no active user has it
+        """
+        from .models import User
+
+        key_hash = hash_api_key(key)
+        entry    = self._lookup(key_hash)
+
+        if entry is not None:
+            return entry[0]
+
+        user = User.objects.filter(api_key_hash = key_hash, is_active = True).first()
+        self._store(key_hash, user)
+
+        return user
+
+    async def aresolve(self, key):
+        """user owning the API key, read with the async ORM on a cache miss"""
+        from .models import User
+
+        key_hash = hash_api_key(key)
+        entry    = self._lookup(key_hash)
+
+        if entry is not None:
+            return entry[0]
+
+        user = await User.objects.filter(api_key_hash = key_hash, is_active = True).afirst()
+        self._store(key_hash, user)
+
+        return user
+
+    def _lookup(self, key_hash):
+        """unexpired (user, expires at) entry of the key hash or None"""
+        with self._lock:
+            entry = self._entries.get(key_hash)
+
+        if entry is not None and entry[1] > time.monotonic():
+            return entry
+
+        return None
+
+    def _store(self, key_hash, user):
+        now = time.monotonic()
+
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries = {k: v for k, v in self._entries.items() if v[1] > now}
+
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+
+            self._entries[key_hash] = (user, now + (self.ttl if user else self.negative_ttl))
+
+    def invalidate(self, key_hash):
+        """drops the cached owner of a key hash"""
+        with self._lock:
+            self._entries.pop(key_hash, None)
+
+
+_config = getattr(settings, 'API_KEY_CACHE', {})
+
+api_key_cache = APIKeyCache(
+    ttl          = _config.get('TTL', 60),
+    negative_ttl = _config.get('NEGATIVE_TTL', 10),
+    max_entries  = _config.get('MAX_ENTRIES', 10000),
+)
+
+
+class APIKeyAuthentication(BaseAuthentication):
+    """Authenticates by API key
+
+        The key is read from the X-API-Key header, an "Authorization: Api-Key <key>"
+        header or, for older clients, the api_key field of the request data.
+    """
+    keyword = "Api-Key"
+
+    def authenticate(self, request):
+        key = self.get_key(request)
+
+        if not key:
+            return None
+
+        user = api_key_cache.resolve(key)
+
+        if user is None:
+            raise AuthenticationFailed("Invalid API key")
+
+        return (user, key)
+
+    def authenticate_header(self, request):
+        return self.keyword
+
+    def get_key(self, request):
+        return get_api_key(request.META, request.data)
+
+
+def get_api_key(meta, data):
+    """API key of the X-API-Key header, the "Authorization: Api-Key <key>" header or the api_key field
+
+    Args:
+        meta (dict): request headers as in request.META
+        data (dict): request data
+
+    Returns:
+        str: API key or None
+    """
+    key = meta.get("HTTP_X_API_KEY")
+
+    if key:
+        return key
+
+    auth = meta.get("HTTP_AUTHORIZATION", "").split()
+
+    if len(auth) == 2 and auth[0] == APIKeyAuthentication.keyword:
+        return auth[1]
+
+    # a malformed body is rejected by the view, not by the authentication
+    return data.get("api_key") if isinstance(data, Mapping) else None
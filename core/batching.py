@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import time
+
+from concurrent.futures     import Future, ThreadPoolExecutor
+
+from django.conf            import settings
+
+from .helper                import LazyThread, lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+
+class PredictionBatcher:
+    """Coalesces concurrent predictions on the same model into one predict call
+
+        The first request for a model opens a batch that stays open for window
+        seconds or until max_rows rows are queued. Requests that arrive meanwhile
+        just join it. One long-lived dispatcher thread closes the batches once
+        their window is over and runs them on a pool of worker threads, as a
+        single vectorized predict on the stacked rows whose results are fanned
+        back out.
+    """
+
+    def __init__(self, window = 0.002, max_rows = 256, workers = 4):
+        self.window      = window
+        self.max_rows    = max_rows
+
+        self._batches    = {}            # key -> open batch
+        self._lock       = threading.Lock()
+        self._opened     = threading.Condition(self._lock)
+        self._dispatcher = LazyThread(self._run, "prediction-batcher")
+        self._executor   = ThreadPoolExecutor(max_workers = workers, thread_name_prefix = "prediction-batch")
+
+    def predict(self, key, model, X):
+        """predicts X as part of the open batch of key, blocking until done
+
+        Args:
+            key (str): batch key, usually project name and model version
+            model (model object): estimator shared by the batch
+            X (pd.DataFrame): rows to be predicted
+
+        Returns:
+            np.ndarray: predictions of the rows of X
+        """
+        return self.submit(key, model, X).result()
+
+    async def apredict(self, key, model, X):
+        """awaitable version of predict for async views"""
+        return await asyncio.wrap_future(self.submit(key, model, X))
+
+    def submit(self, key, model, X):
+        """queues X into the open batch of key
+
+        Returns:
+            Future: resolves to the predictions of the rows of X
+        """
+        future = Future()
+
+        with self._lock:
+            self._dispatcher.start()
+
+            batch = self._batches.get(key)
+
+            if batch is None:
+                batch = self._batches[key] = _Batch(model, time.monotonic() + self.window)
+                self._opened.notify()
+
+            batch.add(X, future)
+
+            if batch.rows >= self.max_rows:
+                self._dispatch(key, batch)
+
+        return future
+
+    def _dispatch(self, key, batch):
+        """closes the batch and hands it to a worker, called with the lock held"""
+        del self._batches[key]
+
+        try:
+            self._executor.submit(batch.execute)
+        except RuntimeError as e:
+            # the executor is shut down when the interpreter exits
+            batch.fail(e)
+
+    def _run(self):
+        with self._lock:
+            while True:
+                if not self._batches:
+                    self._opened.wait()
+                    continue
+
+                now = time.monotonic()
+
+                for key, batch in list(self._batches.items()):
+                    if batch.deadline <= now:
+                        self._dispatch(key, batch)
+
+                if self._batches:
+                    self._opened.wait(min(batch.deadline for batch in self._batches.values()) - now)
+
+
+class _Batch:
+
+    def __init__(self, model, deadline):
+        self.model    = model
+        self.deadline = deadline
+        self.parts    = []
+        self.rows     = 0
+
+    def add(self, X, future):
+        self.parts.append((X, future))
+        self.rows += len(X)
+
+    def fail(self, error):
+        for _, future in self.parts:
+            future.set_exception(error)
+
+    def execute(self):
+        try:
+            if len(self.parts) == 1:
+                predictions = self.model.predict(self.parts[0][0])
+            else:
+                predictions = self.model.predict(pd.concat([X for X, _ in self.parts], ignore_index = True))
+        except Exception:
+            # a bad part must not fail the requests it was batched with
+            for X, future in self.parts:
+                try:
+                    future.set_result(self.model.predict(X))
+                except Exception as e:
+                    future.set_exception(e)
+            return
+
+        for part, offset in zip(self.parts, np.cumsum([0] + [len(X) for X, _ in self.parts])):
+            X, future = part
+            future.set_result(predictions[offset:offset + len(X)])
+
+
+_config = getattr(settings, 'PREDICTION_BATCHING', {})
+
+prediction_batcher = PredictionBatcher(
+    window   = _config.get('WINDOW', 0.002),
+    max_rows = _config.get('MAX_ROWS', 256),
+    workers  = _config.get('WORKERS', 4),
+)
+
+# blocking model loads and predictions of async views run here instead of on the event loop
+prediction_executor = ThreadPoolExecutor(
+    max_workers        = settings.ASYNC_PREDICTION_THREADS,
+    thread_name_prefix = "prediction",
+)
@@ -0,0 +1,142 @@
+import os
+import sys
+
+from contextlib     import contextmanager
+
+from django.conf    import settings
+
+
+# environment variables read by the BLAS and OpenMP thread pools when they load
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "BLIS_NUM_THREADS")
+
+
+def available_cpus():
+    """cores this process may run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def budget(kind):
+    """cores one training job or one prediction may use
+
+        a training budget of 0 shares the machine among the training worker
+        processes so concurrent jobs don't oversubscribe the cores
+
+    Args:
+        kind (str): training or prediction
+
+    Returns:
+        int: no of cores
+    """
+    if kind == "training":
+        cores = settings.CPU_BUDGET['TRAINING'] or available_cpus() // max(settings.TRAINING_WORKERS, 1)
+    else:
+        cores = settings.CPU_BUDGET['PREDICTION']
+
+    return max(cores, 1)
+
+
+def n_jobs_for(requested, kind):
+    """cores used for a model, its own n_jobs capped by the server budget
+
+    Args:
+        requested (int): n_jobs of the model, None or 0 to use the whole budget
+        kind (str): training or prediction
+
+    Returns:
+        int: no of cores
+    """
+    cores = budget(kind)
+
+    if requested:
+        cores = min(requested, cores)
+
+    return cores
+
+
+def configure(model, n_jobs):
+    """sets n_jobs of the estimator and of the estimators nested in it
+
+    Args:
+        model (model object): estimator
+        n_jobs (int): no of cores
+
+    Returns:
+        model object: the same estimator
+    """
+    get_params = getattr(model, "get_params", None)
+
+    if get_params is None:
+        return model
+
+    nested = get_params(deep = True)
+    params = {}
+
+    for name in nested:
+        prefix, _, param = name.rpartition("__")
+        owner            = nested[prefix] if prefix else model
+
+        if param == "n_jobs" and type(owner).__name__ in N_JOBS_ESTIMATORS:
+            params[name] = n_jobs
+
+    if params:
+        model.set_params(**params)
+
+    return model
+
+
+# estimators whose n_jobs parallelizes fitting or predicting, the n_jobs of any other
+# estimator is left as it is, LogisticRegression deprecated it in sklearn 1.8 for example
+N_JOBS_ESTIMATORS = frozenset((
+    "RandomForestClassifier",
+    "ExtraTreesClassifier",
+    "BaggingClassifier",
+    "KNeighborsClassifier",
+    "RadiusNeighborsClassifier",
+    "SGDClassifier",
+    "OneVsRestClassifier",
+    "OneVsOneClassifier",
+    "VotingClassifier",
+    "StackingClassifier",
+))
+
+
+@contextmanager
+def limit_threads(n_jobs, per_worker = None):
+    """limits the BLAS and OpenMP thread pools of the enclosed block
+
+        the limits are process wide, only used where one job runs per process,
+        per_worker limits the pools of the joblib worker processes started in
+        the block, like the ones fitting the folds of a search
+    """
+    from threadpoolctl import threadpool_limits
+
+    with threadpool_limits(limits = n_jobs):
+        if per_worker is None:
+            yield
+            return
+
+        from joblib import parallel_config
+
+        with parallel_config(backend = "loky", inner_max_num_threads = per_worker):
+            yield
+
+
+def limit_process_threads():
+    """limits the BLAS and OpenMP thread pools of a web worker to the prediction budget
+
+        set through the environment before numpy is imported, explicitly set
+        variables are kept
+    """
+    cores = str(budget("prediction"))
+
+    if "numpy" not in sys.modules:
+        for name in THREAD_ENV_VARS:
+            os.environ.setdefault(name, cores)
+        return
+
+    from threadpoolctl import threadpool_limits
+
+    threadpool_limits(limits = int(cores))
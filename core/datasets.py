@@ -0,0 +1,269 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+from contextlib     import contextmanager
+
+from django.conf    import settings
+
+from .helper        import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+
+SNIFF_ROWS = 1000          # rows read to infer the column dtypes
+
+
+@contextmanager
+def spooled(upload):
+    """path of the uploaded file on the local disk
+
+        large uploads are already spooled to a temporary file by django and
+        files of a local storage are used in place, anything else is copied
+        to a temporary file in chunks and removed afterwards
+
+    Args:
+        upload (file): uploaded file or stored FieldFile
+
+    Yields:
+        str: path of the file
+    """
+    if hasattr(upload, 'temporary_file_path'):
+        yield upload.temporary_file_path()
+        return
+
+    try:
+        path = upload.path
+    except (AttributeError, NotImplementedError, ValueError):
+        path = None
+
+    if path is not None:
+        yield path
+        return
+
+    fd, path = tempfile.mkstemp(suffix = ".csv", dir = settings.FILE_UPLOAD_TEMP_DIR)
+    try:
+        with os.fdopen(fd, 'wb') as spool:
+            if hasattr(upload, 'chunks'):
+                for chunk in upload.chunks():
+                    spool.write(chunk)
+            else:
+                upload.seek(0)
+                shutil.copyfileobj(upload, spool)
+
+        yield path
+    finally:
+        os.remove(path)
+
+
+def read_csv_compact(path):
+    """parses a csv file into compact dtypes
+
+        floats are read as float32, text columns as categoricals and integer
+        columns are downcast to the smallest integer type holding them
+
+    Args:
+        path (str): path of the csv file
+
+    Returns:
+        pd.DataFrame: parsed dataset
+    """
+    sample = pd.read_csv(path, delimiter = ",", nrows = SNIFF_ROWS)
+    dtypes = {}
+
+    for column, dtype in sample.dtypes.items():
+        if pd.api.types.is_float_dtype(dtype):
+            dtypes[column] = "float32"
+        elif pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+            dtypes[column] = "category"
+
+    try:
+        df = pd.read_csv(path, delimiter = ",", dtype = dtypes)
+    except (ValueError, TypeError):
+        # the sample did not represent the whole file, let pandas infer every column
+        df = pd.read_csv(path, delimiter = ",")
+
+    for column in df.columns:
+        if pd.api.types.is_integer_dtype(df[column].dtype):
+            df[column] = pd.to_numeric(df[column], downcast = "integer")
+        elif df[column].dtype == np.float64:
+            df[column] = df[column].astype("float32")
+
+    return df
+
+
+def file_digest(path):
+    """sha256 of the file content, read in blocks"""
+    digest = hashlib.sha256()
+
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(1 << 20), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def write_columnar(df, directory):
+    """stores every column as a .npy file next to a schema.json
+
+    Args:
+        df (pd.DataFrame): dataset
+        directory (str): directory of the columnar dataset, written atomically
+    """
+    parent  = os.path.dirname(directory)
+    os.makedirs(parent, exist_ok = True)
+    tmp_dir = tempfile.mkdtemp(dir = parent)
+    schema  = {"rows" : len(df), "columns" : []}
+
+    for i, column in enumerate(df.columns):
+        values = df[column]
+        entry  = {"name" : str(column), "file" : f"{i}.npy", "dtype" : str(values.dtype)}
+
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            entry["categories"] = [str(category) for category in values.cat.categories]
+            values = values.cat.codes
+
+        np.save(os.path.join(tmp_dir, entry["file"]), values.to_numpy())
+        schema["columns"].append(entry)
+
+    with open(os.path.join(tmp_dir, "schema.json"), "w") as schema_file:
+        json.dump(schema, schema_file)
+
+    try:
+        os.rename(tmp_dir, directory)
+    except OSError:
+        # written meanwhile by another worker
+        shutil.rmtree(tmp_dir, ignore_errors = True)
+
+
+def read_columnar(directory, mmap_mode = 'r'):
+    """loads a columnar dataset, columns are memory mapped
+
+    Args:
+        directory (str): directory of the columnar dataset
+        mmap_mode (str, optional): numpy memmap mode. Defaults to 'r'.
+
+    Returns:
+        pd.DataFrame: dataset
+    """
+    schema  = read_schema(directory)
+    columns = {}
+
+    for entry in schema["columns"]:
+        values = np.load(os.path.join(directory, entry["file"]), mmap_mode = mmap_mode)
+
+        if "categories" in entry:
+            values = pd.Categorical.from_codes(values, entry["categories"])
+
+        columns[entry["name"]] = values
+
+    return pd.DataFrame(columns, copy = False)
+
+
+def dataset_directory(digest):
+    """directory of the columnar dataset of a file digest"""
+    return os.path.join(str(settings.DATASET_CACHE['DIRECTORY']), digest)
+
+
+def upload_directory(digest):
+    """directory of the cached columnar copy of an unregistered upload"""
+    return os.path.join(str(settings.DATASET_CACHE['DIRECTORY']), "uploads", digest)
+
+
+def directory_size(directory):
+    return sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+
+
+def evict_uploads(keep = None):
+    """removes the least recently used cached uploads beyond DATASET_CACHE['MAX_BYTES']
+
+    Args:
+        keep (str, optional): directory never removed, the one just written. Defaults to None.
+    """
+    root    = os.path.dirname(upload_directory("digest"))
+    entries = []
+
+    for entry in os.scandir(root):
+        # skips the temporary directories of writes in progress
+        if entry.is_dir() and len(entry.name) == 64:
+            entries.append((entry.stat().st_mtime, directory_size(entry.path), entry.path))
+
+    total = sum(size for _, size, _ in entries)
+
+    for _, size, path in sorted(entries):
+        if total <= settings.DATASET_CACHE['MAX_BYTES']:
+            break
+
+        if path != keep:
+            # workers still reading its memory mapped columns keep their pages
+            shutil.rmtree(path, ignore_errors = True)
+            total -= size
+
+
+def ingest(upload):
+    """parses an uploaded csv dataset once into the columnar store
+
+    Args:
+        upload (file): uploaded csv file
+
+    Returns:
+        (str, dict): digest of the file and schema of the columnar dataset
+    """
+    with spooled(upload) as path:
+        digest    = file_digest(path)
+        directory = dataset_directory(digest)
+
+        if not os.path.isdir(directory):
+            write_columnar(read_csv_compact(path), directory)
+
+    return digest, read_schema(directory)
+
+
+def read_schema(directory):
+    with open(os.path.join(directory, "schema.json")) as schema_file:
+        return json.load(schema_file)
+
+
+def load_dataset(upload, cache = True, digest = None):
+    """parses an uploaded csv dataset without holding its raw bytes in memory
+
+        the columns of a registered dataset with the same content are reused,
+        with the dataset cache enabled the parsed columns of other uploads are
+        kept on disk keyed by the file content, the least recently used ones
+        are removed beyond DATASET_CACHE['MAX_BYTES']
+
+    Args:
+        upload (file): uploaded csv file or stored FieldFile
+        cache (bool, optional): use the columnar dataset cache. Defaults to True.
+        digest (str, optional): sha256 of the file when the caller hashed it already. Defaults to None.
+
+    Returns:
+        pd.DataFrame: parsed dataset
+    """
+    with spooled(upload) as path:
+        if not cache:
+            return read_csv_compact(path)
+
+        digest    = digest or file_digest(path)
+        directory = dataset_directory(digest)
+
+        if not os.path.isdir(directory):
+            if not settings.DATASET_CACHE['ENABLED']:
+                return read_csv_compact(path)
+
+            directory = upload_directory(digest)
+
+            if os.path.isdir(directory):
+                os.utime(directory)
+            else:
+                write_columnar(read_csv_compact(path), directory)
+                evict_uploads(keep = directory)
+
+        try:
+            return read_columnar(directory)
+        except FileNotFoundError:
+            # evicted meanwhile by another worker
+            return read_csv_compact(path)
@@ -0,0 +1,217 @@
+import io
+
+from django.conf    import settings
+
+from .helper        import lazy_import, to_json
+
+np = lazy_import("numpy")
+
+
+plots = ("confusion_matrix", "roc", "pr")
+
+
+def evaluate(model, X, y, chunk_size = None, bins = None):
+    """evaluation report of a classifier, computed chunk by chunk in vectorized passes
+
+        predictions of every chunk are kept as labels only, class scores are
+        reduced right away to per class histograms of score bins from which the
+        binned ROC and PR curves are built
+
+    Args:
+        model (model object): fitted classifier
+        X (pd.DataFrame): features
+        y (pd.Series): target
+        chunk_size (int, optional): no of rows predicted at once. Defaults to EVALUATION['CHUNK_SIZE'].
+        bins (int, optional): no of score thresholds of the curves. Defaults to EVALUATION['BINS'].
+
+    Returns:
+        dict: confusion matrix, per class and averaged metrics, ROC and PR curves
+    """
+    chunk_size = chunk_size or settings.EVALUATION['CHUNK_SIZE']
+    bins       = bins or settings.EVALUATION['BINS']
+    y          = np.asarray(y)
+    classes    = getattr(model, "classes_", None)
+    scored     = classes is not None and callable(getattr(model, "predict_proba", None))
+
+    predictions = []
+
+    if scored:
+        # (class, bin) -> no of rows, over all rows and over the rows of that class
+        totals    = np.zeros(len(classes) * bins, dtype = np.int64)
+        positives = np.zeros(len(classes) * bins, dtype = np.int64)
+        offsets   = np.arange(len(classes)) * bins
+
+    for start in range(0, len(y), chunk_size):
+        X_chunk, y_chunk = X.iloc[start:start + chunk_size], y[start:start + chunk_size]
+
+        predictions.append(np.asarray(model.predict(X_chunk)))
+
+        if scored:
+            scores  = model.predict_proba(X_chunk)
+            indices = np.minimum((scores * bins).astype(np.int64), bins - 1) + offsets
+            is_pos  = y_chunk[:, None] == classes[None, :]
+
+            totals    += np.bincount(indices.ravel(), minlength = totals.size)
+            positives += np.bincount(indices[is_pos], minlength = positives.size)
+
+    predictions = np.concatenate(predictions) if predictions else np.asarray([], dtype = y.dtype)
+    labels      = np.unique(np.concatenate([y, predictions]))
+    matrix      = confusion_matrix(labels, y, predictions)
+
+    report = {
+        "rows"              : len(y),
+        "labels"            : to_json(labels),
+        "confusion_matrix"  : matrix.tolist(),
+        **class_metrics(labels, matrix),
+    }
+
+    if scored:
+        report.update(curves(classes, positives.reshape(-1, bins), totals.reshape(-1, bins), bins))
+
+    return report
+
+
+def confusion_matrix(labels, y, predictions):
+    """confusion matrix of sorted labels, actual labels as rows, in one bincount"""
+    k = len(labels)
+    actual, predicted = np.searchsorted(labels, y), np.searchsorted(labels, predictions)
+
+    return np.bincount(actual * k + predicted, minlength = k * k).reshape(k, k)
+
+
+def class_metrics(labels, matrix):
+    """accuracy, per class and averaged precision, recall and f1 of a confusion matrix
+
+        the integer percentage keys of the earlier reports are kept, single label
+        micro precision and recall equal the accuracy
+    """
+    tp        = np.diag(matrix).astype(float)
+    support   = matrix.sum(axis = 1)
+    predicted = matrix.sum(axis = 0)
+    total     = max(matrix.sum(), 1)
+
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        precision = np.nan_to_num(tp / predicted)
+        recall    = np.nan_to_num(tp / support)
+        f1        = np.nan_to_num(2 * precision * recall / (precision + recall))
+
+    accuracy = tp.sum() / total
+    weights  = support / total
+
+    def average(weights):
+        return {
+            "precision" : float(precision @ weights),
+            "recall"    : float(recall @ weights),
+            "f1"        : float(f1 @ weights),
+        }
+
+    return {
+        "accuracy"          : f"{int(accuracy * 100)}",
+        "Precision Score"   : f"{int(accuracy * 100)}",
+        "Recall Score"      : f"{int(accuracy * 100)}",
+        "per_class"         : {
+            str(label): {
+                "precision" : float(precision[i]),
+                "recall"    : float(recall[i]),
+                "f1"        : float(f1[i]),
+                "support"   : int(support[i]),
+            }
+            for i, label in enumerate(to_json(labels))
+        },
+        "macro_avg"         : average(np.full(len(labels), 1 / max(len(labels), 1))),
+        "weighted_avg"      : average(weights),
+    }
+
+
+def curves(classes, positives, totals, bins):
+    """one vs rest ROC and PR curves of every class from its score histograms
+
+    Args:
+        classes (np.ndarray): classes of the model, columns of predict_proba
+        positives (np.ndarray): (class, bin) counts of the rows of the class
+        totals (np.ndarray): (class, bin) counts of all rows
+        bins (int): no of score bins
+
+    Returns:
+        dict: roc and pr curves with their auc and average precision per class
+    """
+    negatives  = totals - positives
+    # thresholds from the highest bin down, a row is predicted positive when its score reaches the threshold
+    tp         = np.cumsum(positives[:, ::-1], axis = 1)
+    fp         = np.cumsum(negatives[:, ::-1], axis = 1)
+    thresholds = (np.arange(bins)[::-1] / bins).tolist()
+
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        tpr       = np.nan_to_num(tp / tp[:, -1:])
+        fpr       = np.nan_to_num(fp / fp[:, -1:])
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 1.0)
+
+    zeros = np.zeros((len(classes), 1))
+    tpr0, fpr0 = np.hstack([zeros, tpr]), np.hstack([zeros, fpr])
+
+    auc = np.sum(np.diff(fpr0, axis = 1) * (tpr0[:, 1:] + tpr0[:, :-1]) / 2, axis = 1)
+    ap  = np.sum(np.diff(tpr0, axis = 1) * precision, axis = 1)
+
+    roc, pr = {}, {}
+
+    for i, label in enumerate(to_json(classes)):
+        roc[str(label)] = {"fpr" : fpr[i].tolist(), "tpr" : tpr[i].tolist(), "thresholds" : thresholds, "auc" : float(auc[i])}
+        pr[str(label)]  = {"precision" : precision[i].tolist(), "recall" : tpr[i].tolist(), "thresholds" : thresholds, "average_precision" : float(ap[i])}
+
+    return {"roc" : roc, "pr" : pr}
+
+
+def render_plot(report, kind):
+    """png of the confusion matrix, ROC or PR curves of a report, matplotlib is only imported here
+
+    Args:
+        report (dict): evaluation report
+        kind (str): confusion_matrix, roc or pr
+
+    Returns:
+        bytes: png image
+    """
+    if kind not in plots:
+        raise ValueError(f"plot must be one of {', '.join(plots)}")
+
+    if kind != "confusion_matrix" and kind not in report:
+        raise ValueError(f"the model has no class scores to plot a {kind} curve")
+
+    # a bare Figure renders with the Agg canvas, pyplot and its GUI backends are never loaded
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize = (6, 5))
+    axes   = figure.subplots()
+
+    if kind == "confusion_matrix":
+        matrix = np.asarray(report["confusion_matrix"])
+        labels = report["labels"]
+
+        image  = axes.imshow(matrix, cmap = "Blues")
+        figure.colorbar(image, ax = axes)
+        axes.set_xticks(range(len(labels)), [str(label) for label in labels])
+        axes.set_yticks(range(len(labels)), [str(label) for label in labels])
+        axes.set_xlabel("Predicted Labels")
+        axes.set_ylabel("Actual Labels")
+
+        if matrix.size <= 400:
+            for (i, j), count in np.ndenumerate(matrix):
+                axes.text(j, i, count, ha = "center", va = "center")
+    elif kind == "roc":
+        for label, curve in report["roc"].items():
+            axes.plot([0] + curve["fpr"], [0] + curve["tpr"], label = f"{label} (auc {curve['auc']:.2f})")
+        axes.plot([0, 1], [0, 1], linestyle = "--", color = "grey")
+        axes.set_xlabel("False Positive Rate")
+        axes.set_ylabel("True Positive Rate")
+        axes.legend()
+    else:
+        for label, curve in report["pr"].items():
+            axes.plot(curve["recall"], curve["precision"], label = f"{label} (ap {curve['average_precision']:.2f})")
+        axes.set_xlabel("Recall")
+        axes.set_ylabel("Precision")
+        axes.legend()
+
+    image = io.BytesIO()
+    figure.savefig(image, format = "png")
+
+    return image.getvalue()
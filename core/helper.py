@@ -1,10 +1,129 @@
-from sklearn.linear_model       import LogisticRegression           # logistic regression for classification
-from sklearn.naive_bayes        import GaussianNB                   # Gaussian Naive Bayes Classifier
-from sklearn.tree               import DecisionTreeClassifier       # Decision Tree Classifier
-from sklearn.neighbors          import KNeighborsClassifier         # K Nearest Neighbors Classifier
-from sklearn.svm                import SVC                          # Support Vector Machine Classifier
-from sklearn.ensemble           import AdaBoostClassifier           # Ensemble Technique i.e, Ada Boosting
-from sklearn.ensemble           import RandomForestClassifier       # Ensemble Technique i.e, Random Forest
+import importlib
+import math
+import os
+import threading
+
+from .serialization             import dumps
+
+
+# estimators are imported on first use, sklearn stays out of worker start up
+estimators = {
+    "Decision Tree Classifier"          : ("sklearn.tree"         , "DecisionTreeClassifier"),   # Decision Tree Classifier
+    "K-Nearest Neighbors Classifier"    : ("sklearn.neighbors"    , "KNeighborsClassifier"),     # K Nearest Neighbors Classifier
+    "Logistic Regression"               : ("sklearn.linear_model" , "LogisticRegression"),       # logistic regression for classification
+    "Gaussian Naive Bayes Classifier"   : ("sklearn.naive_bayes"  , "GaussianNB"),               # Gaussian Naive Bayes Classifier
+    "Random Forest Classifier"          : ("sklearn.ensemble"     , "RandomForestClassifier"),   # Ensemble Technique i.e, Random Forest
+    "Support Vector Machine"            : ("sklearn.svm"          , "SVC"),                      # Support Vector Machine Classifier
+    "SGD Classifier"                    : ("sklearn.linear_model" , "SGDClassifier"),            # linear model trained by stochastic gradient descent
+}
+
+
+class lazy_import:
+    """module proxy that imports the module on first attribute access
+
+        np = lazy_import("numpy") keeps numpy out of import time of the caller
+    """
+
+    def __init__(self, name):
+        self.__name = name
+
+    def __getattr__(self, attr):
+        return getattr(importlib.import_module(self.__name), attr)
+
+
+class LazyThread:
+    """daemon thread of a long-lived background worker, started on first use
+
+        started by the first start() of each process rather than at import, so
+        forked workers each run their own thread, a thread inherited from the
+        parent process does not run in the child and is started again
+    """
+
+    def __init__(self, target, name):
+        self.target = target
+        self.name   = name
+        self.thread = None
+        self._pid   = None
+
+    def start(self):
+        """starts the thread unless it already runs in this process, called with the lock of the owner held
+
+        Returns:
+            bool: True when a new thread was started
+        """
+        if self.thread is not None and self._pid == os.getpid():
+            return False
+
+        self.thread = threading.Thread(target = self.target, name = self.name, daemon = True)
+        self.thread.start()
+        self._pid   = os.getpid()
+
+        return True
+
+    def detach(self):
+        """forgets the thread so the next start() runs a new one
+
+        Returns:
+            threading.Thread: the running thread to be stopped and joined, None when not started
+        """
+        thread, self.thread = self.thread, None
+
+        return thread
+
+
+def to_json(value):
+    """numpy scalars, arrays and containers of them as plain python values"""
+    if getattr(value, "ndim", 0):
+        value = value.tolist()
+
+    if isinstance(value, dict):
+        return {str(k): to_json(v) for k, v in value.items()}
+
+    if isinstance(value, (list, tuple)):
+        return [to_json(v) for v in value]
+
+    if hasattr(value, "item"):
+        value = value.item()
+
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+
+    return str(value)
+
+
+def get_estimator_class(model_name):
+    """
+    get_estimator_class function
+
+    Args:
+        model_name (str): name of the model
+
+    Returns:
+        class: estimator class of the model
+    """
+    module, name = estimators[model_name]
+
+    return getattr(importlib.import_module(module), name)
+
+
+# default hyperparameter space of each estimator, searched by a search job
+search_spaces = {
+    "Decision Tree Classifier"          : {"max_depth" : [None, 5, 10, 20], "min_samples_leaf" : [1, 5, 20], "criterion" : ["gini", "entropy"]},
+    "K-Nearest Neighbors Classifier"    : {"n_neighbors" : [3, 5, 11, 21], "weights" : ["uniform", "distance"]},
+    "Logistic Regression"               : {"C" : [0.01, 0.1, 1, 10, 100]},
+    "Gaussian Naive Bayes Classifier"   : {"var_smoothing" : [1e-9, 1e-8, 1e-7, 1e-6, 1e-5]},
+    "Random Forest Classifier"          : {"n_estimators" : [25, 50, 100], "max_depth" : [None, 10, 20], "min_samples_leaf" : [1, 5]},
+    "Support Vector Machine"            : {"C" : [0.1, 1, 10], "kernel" : ["rbf", "linear"], "gamma" : ["scale", "auto"]},
+    "SGD Classifier"                    : {"alpha" : [1e-5, 1e-4, 1e-3], "penalty" : ["l2", "l1", "elasticnet"]},
+}
+
+
+def supports_incremental(model):
+    """models with partial_fit can be trained on chunks of new data, e.g. GaussianNB and SGDClassifier"""
+    return callable(getattr(model, "partial_fit", None))
 
 
 def get_model(model_name, neighbors = 0):
@@ -16,16 +135,17 @@ def get_model(model_name, neighbors = 0):
         neighbors (int, optional): no of neighbours. Defaults to 0.
 
     Returns:
-        model object: contains respective model object
+        bytes: serialized model object
     """
 
-    models = {
-        "Decision Tree Classifier"          : DecisionTreeClassifier(),
-        "K-Nearest Neighbors Classifier"    : KNeighborsClassifier(n_neighbors = int(neighbors)),
-        "Logistic Regression"               : LogisticRegression(random_state = 0),
-        "Gaussian Naive Bayes Classifier"   : GaussianNB(),
-        "Random Forest Classifier"          : RandomForestClassifier(n_estimators = 25),
-        "Support Vector Machine"            : SVC(),
+    params = {
+        "Decision Tree Classifier"          : {},
+        "K-Nearest Neighbors Classifier"    : {"n_neighbors" : int(neighbors)},
+        "Logistic Regression"               : {"random_state" : 0},
+        "Gaussian Naive Bayes Classifier"   : {},
+        "Random Forest Classifier"          : {"n_estimators" : 25},
+        "Support Vector Machine"            : {},
+        "SGD Classifier"                    : {"loss" : "log_loss", "random_state" : 0},
     }
     
-    return dumps(models[model_name])
+    return dumps(get_estimator_class(model_name)(**params[model_name]))
@@ -0,0 +1,209 @@
+from .helper        import lazy_import
+from .shared_store  import SharedArrays
+
+np = lazy_import("numpy")
+
+
+backends = ("sklearn", "compiled")
+
+# fitted classes compiled into flat arrays, every other model keeps predicting through sklearn
+COMPILED_ESTIMATORS = ("DecisionTreeClassifier", "ExtraTreeClassifier", "RandomForestClassifier", "ExtraTreesClassifier")
+
+# layout of the compiled arrays, part of the version token of the arrays exported to the shared model store
+COMPILED_FORMAT = 1
+
+
+def float_features(estimator, X):
+    """float32 feature matrix of X as fitted by the estimator, None when sklearn has to validate or convert X
+
+    Args:
+        estimator (model object): fitted estimator
+        X (array like): rows to be predicted
+
+    Returns:
+        np.ndarray: (rows, n_features_in_) float32 matrix or None
+    """
+    names = getattr(estimator, "feature_names_in_", None)
+
+    if hasattr(X, "columns") and names is not None and list(X.columns) != list(names):
+        return None
+
+    try:
+        X = np.asarray(X, dtype = np.float32)
+    except (TypeError, ValueError):
+        return None
+
+    if X.ndim != 2 or X.shape[1] != estimator.n_features_in_:
+        return None
+
+    return X
+
+
+class CompiledTrees(SharedArrays):
+    """Nodes of every tree of a fitted tree classifier flattened into shared arrays
+
+        every (row, tree) pair walks down one level per step with a few array
+        gathers, pairs that reached their leaf drop out of the next step
+    """
+
+    def __init__(self, trees):
+        features, thresholds, children, missing_left, leaves, values, roots = [], [], [], [], [], [], []
+        offset = 0
+
+        for tree in trees:
+            leaf = tree.children_left == -1
+
+            roots.append(offset)
+            leaves.append(leaf)
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            # left and right child of node i at 2 * i and 2 * i + 1
+            children.append(np.stack([tree.children_left, tree.children_right], axis = 1).ravel() + offset)
+            missing_left.append(getattr(tree, "missing_go_to_left", np.zeros(tree.node_count)).astype(bool))
+
+            # class fractions of each leaf, older sklearn stores the weighted counts
+            value = tree.value[:, 0, :]
+            values.append(value / np.maximum(value.sum(axis = 1, keepdims = True), np.finfo(float).tiny))
+
+            offset += tree.node_count
+
+        self.feature      = np.concatenate(features).astype(np.intp)
+        self.threshold    = np.concatenate(thresholds).astype(np.float64)
+        self.children     = np.concatenate(children).astype(np.intp)
+        self.missing_left = np.concatenate(missing_left)
+        self.is_leaf      = np.concatenate(leaves)
+        self.value        = np.concatenate(values)
+        self.roots        = np.asarray(roots, dtype = np.intp)
+
+    ARRAYS = ("feature", "threshold", "children", "missing_left", "is_leaf", "value", "roots")
+
+    def leaves(self, X):
+        """leaf node of every row in every tree
+
+        Args:
+            X (np.ndarray): float32 features, sklearn compares them with the float64 thresholds
+
+        Returns:
+            np.ndarray: (rows, trees) global node ids
+        """
+        X          = np.ascontiguousarray(X)
+        values     = X.ravel()
+        n_trees    = len(self.roots)
+        has_nan    = np.isnan(values).any()
+
+        nodes      = np.tile(self.roots, len(X))
+        row_starts = np.repeat(np.arange(len(X), dtype = np.intp) * X.shape[1], n_trees)
+        active     = np.flatnonzero(~self.is_leaf[nodes])
+
+        while active.size:
+            node  = nodes[active]
+            x     = values[row_starts[active] + self.feature[node]]
+            right = ~(x <= self.threshold[node])
+
+            if has_nan:
+                right = np.where(np.isnan(x), ~self.missing_left[node], right)
+
+            node          = self.children[2 * node + right]
+            nodes[active] = node
+            active        = active[~self.is_leaf[node]]
+
+        return nodes.reshape(len(X), n_trees)
+
+    def predict_proba(self, X):
+        """class fractions averaged over the trees, summed tree by tree like sklearn"""
+        nodes = self.leaves(X)
+        proba = np.zeros((len(X), self.value.shape[1]))
+
+        for tree in range(nodes.shape[1]):
+            proba += self.value[nodes[:, tree]]
+
+        return proba / nodes.shape[1]
+
+
+class CompiledModel:
+    """Fitted tree classifier predicting through CompiledTrees
+
+        every other attribute is read from the sklearn estimator, inputs the
+        compiled arrays can't take as they are go to the estimator as well,
+        and so do batches above max_rows where sklearn's compiled loops win
+    """
+
+    def __init__(self, estimator, max_rows = None, shared = None):
+        self.estimator = estimator
+        self.max_rows  = max_rows
+
+        build = lambda: CompiledTrees([tree.tree_ for tree in getattr(estimator, "estimators_", [estimator])])
+
+        if shared is None:
+            self.trees = build()
+        else:
+            self.trees = CompiledTrees.from_arrays(shared(lambda: build().arrays()))
+
+    def __getattr__(self, attr):
+        return getattr(self.estimator, attr)
+
+    def features(self, X):
+        """float32 feature matrix, None when sklearn has to validate, convert or predict X"""
+        if self.max_rows is not None and len(X) > self.max_rows:
+            return None
+
+        return float_features(self.estimator, X)
+
+    def predict_proba(self, X):
+        features = self.features(X)
+
+        if features is None:
+            return self.estimator.predict_proba(X)
+
+        return self.trees.predict_proba(features)
+
+    def predict(self, X):
+        features = self.features(X)
+
+        if features is None:
+            return self.estimator.predict(X)
+
+        return self.estimator.classes_.take(np.argmax(self.trees.predict_proba(features), axis = 1), axis = 0)
+
+
+def compile_model(model, max_rows = None, shared = None):
+    """model predicting through the compiled tree arrays when supported
+
+    Args:
+        model (model object): fitted estimator
+        max_rows (int, optional): larger batches are predicted by sklearn. Defaults to None.
+        shared (callable, optional): given a function building the arrays, returns them
+                                     from the shared model store. Defaults to None.
+
+    Returns:
+        model object: CompiledModel or the estimator itself when it can't be compiled
+    """
+    if type(model).__name__ not in COMPILED_ESTIMATORS or getattr(model, "n_outputs_", 1) != 1:
+        return model
+
+    if not hasattr(model, "classes_"):
+        # not fitted yet
+        return model
+
+    return CompiledModel(model, max_rows, shared)
+
+
+def apply_backend(model, backend, max_rows = None, shared = None):
+    """the model as served by the inference backend
+
+    Args:
+        model (model object): fitted estimator
+        backend (str): sklearn or compiled
+        max_rows (int, optional): largest batch predicted by the compiled arrays. Defaults to None.
+        shared (callable, optional): loads the compiled arrays from the shared model store. Defaults to None.
+
+    Returns:
+        model object: model used for predictions
+    """
+    if backend not in backends:
+        raise ValueError(f"inference backend must be one of {', '.join(backends)}")
+
+    if backend == "compiled":
+        return compile_model(model, max_rows, shared)
+
+    return model
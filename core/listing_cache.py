@@ -0,0 +1,170 @@
+import hashlib
+
+from urllib.parse               import parse_qs, urlsplit
+
+from django.conf                import settings
+from django.core.cache          import cache
+
+from rest_framework.utils.urls  import replace_query_param
+
+from .models                    import ModelFile
+from .serializers               import ModelFileSerializer
+from .pagination                import ModelFileCursorPagination
+
+
+# cache layout
+#   model_file:<project_name>           serialized record of one model file
+#   model_files:<scope>:version         current version of a listing
+#   model_files:<scope>:v<version>:<page>  serialized page of a listing, scope is public or user:<id>,
+#                                          page hashes the page size and the decoded cursor
+#
+# saves and deletes replace only the changed record entry, the listings it
+# belongs to move to a new version so their cached pages are dropped at once
+
+
+def record_key(project_name):
+    return f"model_file:{project_name}"
+
+
+def list_key(scope):
+    version = cache.get_or_set(f"model_files:{scope}:version", 1, None)
+
+    return f"model_files:{scope}:v{version}"
+
+
+def user_scope(user_id):
+    return f"user:{user_id}"
+
+
+def get_model_record(project_name):
+    """serialized model file of the project
+
+    Args:
+        project_name (str): name of the project
+
+    Returns:
+        dict: serialized record or None if the project does not exist
+    """
+    record = cache.get(record_key(project_name))
+
+    if record is None:
+        model = listing_queryset().filter(project_name = project_name).first()
+
+        if model is None:
+            return None
+
+        record = dict(ModelFileSerializer(model).data)
+        cache.set(record_key(project_name), record, settings.MODEL_FILES_CACHE_TIMEOUT)
+
+    return record
+
+
+def listing_queryset():
+    """model files with only the columns the serializer reads, owner joined in the same query"""
+    return ModelFile.objects.select_related('created_by').only(
+        'project_name',
+        'model_name',
+        'is_public',
+        'model_obj',
+        'created_on',
+        'last_trained_on',
+        'created_by__username',
+    )
+
+
+def get_public_models(request):
+    """serialized page of the public model files"""
+    return get_listing("public", listing_queryset().filter(is_public = True), request)
+
+
+def get_user_models(request):
+    """serialized page of the model files of the requesting user"""
+    return get_listing(user_scope(request.user.pk), listing_queryset().filter(created_by = request.user), request)
+
+
+def get_listing(scope, queryset, request):
+    """serialized cursor page of a listing, cached per listing version, page size and cursor
+
+        the cached page keeps the cursors of its neighbours, the links are built
+        from the requested url so the host and other query parameters are not
+        part of the cache key
+
+    Args:
+        scope (str): public or user:<id>
+        queryset (QuerySet): model files of the listing
+        request (client request): contains cursor and page_size
+
+    Returns:
+        dict: next and previous page links with the results
+    """
+    paginator = ModelFileCursorPagination()
+    cursor    = paginator.decode_cursor(request)
+    page      = hashlib.sha1(f"{paginator.get_page_size(request)}:{tuple(cursor) if cursor else ''}".encode()).hexdigest()
+    key       = f"{list_key(scope)}:{page}"
+    data      = cache.get(key)
+
+    if data is None:
+        records = paginator.paginate_queryset(queryset, request)
+        data    = {
+            'next'      : link_cursor(paginator.get_next_link(), paginator.cursor_query_param),
+            'previous'  : link_cursor(paginator.get_previous_link(), paginator.cursor_query_param),
+            'results'   : [dict(record) for record in ModelFileSerializer(records, many = True).data],
+        }
+
+        cache.set(key, data, settings.MODEL_FILES_CACHE_TIMEOUT)
+
+    url = request.build_absolute_uri()
+
+    return {
+        'next'      : data['next'] and replace_query_param(url, paginator.cursor_query_param, data['next']),
+        'previous'  : data['previous'] and replace_query_param(url, paginator.cursor_query_param, data['previous']),
+        'results'   : data['results'],
+    }
+
+
+def link_cursor(link, param):
+    """encoded cursor of a page link, None when there is no such page"""
+    if link is None:
+        return None
+
+    return parse_qs(urlsplit(link).query).get(param, [None])[0]
+
+
+def update_record(instance):
+    """replaces the cached record of the saved model file and drops the listings it belongs to
+
+    Args:
+        instance (ModelFile): saved model file
+    """
+    previous = cache.get(record_key(instance.project_name))
+    record   = dict(ModelFileSerializer(instance).data)
+
+    cache.set(record_key(instance.project_name), record, settings.MODEL_FILES_CACHE_TIMEOUT)
+
+    invalidate_listing(user_scope(instance.created_by_id))
+
+    if instance.is_public or previous is None or previous['is_public']:
+        invalidate_listing("public")
+
+
+def remove_record(instance):
+    """drops the cached record of the deleted model file and the listings it belonged to
+
+    Args:
+        instance (ModelFile): deleted model file
+    """
+    cache.delete(record_key(instance.project_name))
+
+    invalidate_listing(user_scope(instance.created_by_id))
+
+    if instance.is_public:
+        invalidate_listing("public")
+
+
+def invalidate_listing(scope):
+    """drops every cached page of a listing by moving it to a new version"""
+    try:
+        cache.incr(f"model_files:{scope}:version")
+    except ValueError:
+        # no version yet, nothing of this listing is cached
+        pass
@@ -0,0 +1,198 @@
+import json
+import platform
+import resource
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+from django.conf                    import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base    import BaseCommand
+from django.db                      import connection
+from django.test                    import Client, override_settings
+from django.test.client             import encode_multipart, BOUNDARY, MULTIPART_CONTENT
+from django.test.utils              import setup_test_environment, teardown_test_environment
+
+from core.helper                    import estimators, lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+
+class Command(BaseCommand):
+    help = "Benchmarks training, prediction and listing through the real views on a throwaway test database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type = int, default = 5000, help = "rows of the synthetic training set")
+        parser.add_argument("--features", type = int, default = 20)
+        parser.add_argument("--classes", type = int, default = 3)
+        parser.add_argument("--requests", type = int, default = 200, help = "requests per prediction scenario")
+        parser.add_argument("--batch-rows", type = int, default = 1000, help = "rows per batch prediction request")
+        parser.add_argument("--listing-models", type = int, default = 1000, help = "public models created for the listing scenario")
+        parser.add_argument("--models", nargs = "*", default = list(estimators), help = "estimators to benchmark")
+        parser.add_argument("--output", help = "json file the results are written to")
+        parser.add_argument("--compare", help = "json file of an earlier run to compare with")
+
+    def handle(self, *args, **options):
+        self.options = options
+        media_root   = tempfile.mkdtemp(prefix = "insight-benchmark-")
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity = 0, autoclobber = True)
+
+        try:
+            with override_settings(
+                MEDIA_ROOT          = media_root,
+                ALLOWED_HOSTS       = ["testserver"],
+                CACHES              = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+                SHARED_MODEL_STORE  = {**settings.SHARED_MODEL_STORE, 'DIRECTORY': f"{media_root}/shared"},
+                DATASET_CACHE       = {**settings.DATASET_CACHE, 'DIRECTORY': f"{media_root}/datasets"},
+            ):
+                results = self.run_benchmarks()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity = 0)
+            teardown_test_environment()
+
+        report = {
+            "commit"    : self.git_commit(),
+            "python"    : platform.python_version(),
+            "options"   : {k: v for k, v in options.items() if k in ("rows", "features", "classes", "requests", "batch_rows", "listing_models")},
+            "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "results"   : results,
+        }
+
+        self.print_results(results, self.load_results(options["compare"]))
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(report, output, indent = 2)
+
+    def run_benchmarks(self):
+        from sklearn.datasets import make_classification
+
+        from core.models import User, ModelFile, TrainingJob
+
+        options = self.options
+        user    = User.objects.create_user(username = "benchmark", password = "benchmark", mobile_number = "0000000000")
+        client  = Client()
+        client.force_login(user)
+
+        X, y = make_classification(
+                n_samples     = options["rows"],
+                n_features    = options["features"],
+                n_informative = min(options["features"], 10),
+                n_classes     = options["classes"],
+                random_state  = 0,
+            )
+        columns = [f"f{i}" for i in range(options["features"])]
+        dataset = pd.DataFrame(X, columns = columns).assign(target = y).to_csv(index = False).encode()
+        results = []
+
+        for model_name in options["models"]:
+            project_name = "benchmark_" + model_name.replace(" ", "_").replace("-", "_")
+
+            client.post("/api/models", {"project_name": project_name, "model_name": model_name, "knn_val": 5})
+
+            def train():
+                body = encode_multipart(BOUNDARY, {
+                    "dataset"  : SimpleUploadedFile("train.csv", dataset),
+                    "target"   : "target",
+                    "features" : "*",
+                })
+                response = client.put(f"/api/model/{project_name}", body, content_type = MULTIPART_CONTENT)
+                assert response.status_code in (200, 202), response.content
+
+                job = TrainingJob.claim_next()
+                assert job is not None, f"no training job queued for {project_name}"
+
+                job.run()
+                job.refresh_from_db()
+                assert job.status == TrainingJob.SUCCEEDED, job.error
+
+            results.append(self.measure("train", model_name, train, 1, rows = options["rows"]))
+
+            row   = {"data_type": "rows", "rows": X[:1].tolist(), "columns": columns}
+            batch = {"data_type": "rows", "rows": X[:options["batch_rows"]].tolist(), "columns": columns}
+
+            def predict(data):
+                response = client.post(f"/api/model/{project_name}", data, content_type = "application/json")
+                assert response.status_code == 200, response.content
+
+            results.append(self.measure("predict_row", model_name, lambda: predict(row), options["requests"], rows = 1))
+            results.append(self.measure(
+                "predict_batch", model_name, lambda: predict(batch), max(options["requests"] // 10, 1), rows = len(batch["rows"])
+            ))
+
+        ModelFile.objects.bulk_create([
+            ModelFile(project_name = f"listing_{i}", created_by = user, is_public = True, last_trained_on = user.date_joined)
+            for i in range(options["listing_models"])
+        ])
+
+        def listing(url):
+            response = client.get(url)
+            assert response.status_code == 200, response.content
+
+        results.append(self.measure("list_user_models", "-", lambda: listing("/api/models"), options["requests"]))
+        results.append(self.measure("list_public_models", "-", lambda: listing("/api/public-models"), options["requests"]))
+
+        return results
+
+    def measure(self, scenario, model_name, call, repeat, rows = None):
+        """latency percentiles of call and its peak traced memory
+
+        Returns:
+            dict: result of the scenario
+        """
+        latencies = []
+
+        for _ in range(repeat):
+            start = time.perf_counter()
+            call()
+            latencies.append(time.perf_counter() - start)
+
+        # traced separately, tracemalloc slows down the timed calls
+        tracemalloc.start()
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        latencies = np.array(latencies)
+
+        return {
+            "scenario"      : scenario,
+            "model"         : model_name,
+            "requests"      : repeat,
+            "rows"          : rows,
+            "throughput_rps": repeat / latencies.sum(),
+            "p50_ms"        : float(np.percentile(latencies, 50) * 1000),
+            "p99_ms"        : float(np.percentile(latencies, 99) * 1000),
+            "peak_mb"       : peak / 2 ** 20,
+        }
+
+    def print_results(self, results, baseline):
+        self.stdout.write(f"{'scenario':<20} {'model':<32} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'peak MB':>9}  change p50")
+
+        for result in results:
+            old    = baseline.get((result["scenario"], result["model"]))
+            change = f"{result['p50_ms'] / old['p50_ms']:.2f}x" if old else ""
+
+            self.stdout.write(
+                f"{result['scenario']:<20} {result['model']:<32} {result['throughput_rps']:>10.1f} "
+                f"{result['p50_ms']:>10.2f} {result['p99_ms']:>10.2f} {result['peak_mb']:>9.1f}  {change}"
+            )
+
+    def load_results(self, path):
+        if not path:
+            return {}
+
+        with open(path) as report:
+            return {(result["scenario"], result["model"]): result for result in json.load(report)["results"]}
+
+    def git_commit(self):
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "HEAD"], cwd = settings.BASE_DIR, capture_output = True, text = True
+            ).stdout.strip() or None
+        except OSError:
+            return None
@@ -0,0 +1,75 @@
+import time
+
+from django.conf                    import settings
+from django.core.management.base    import BaseCommand
+
+from core.helper                    import lazy_import
+from core.inference                 import compile_model
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+
+class Command(BaseCommand):
+    help = "Compares sklearn and compiled tree inference latency on single rows and large batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type = int, default = 20000, help = "rows of the synthetic training set")
+        parser.add_argument("--features", type = int, default = 20)
+        parser.add_argument("--classes", type = int, default = 3)
+        parser.add_argument("--batch-rows", type = int, default = 10000, help = "rows of the batch scenario")
+        parser.add_argument("--repeat", type = int, default = 200, help = "calls per single row scenario")
+
+    def handle(self, *args, **options):
+        from sklearn.datasets   import make_classification
+        from sklearn.ensemble   import RandomForestClassifier
+        from sklearn.tree       import DecisionTreeClassifier
+
+        X, y = make_classification(
+                n_samples     = options["rows"],
+                n_features    = options["features"],
+                n_informative = min(options["features"], 10),
+                n_classes     = options["classes"],
+                random_state  = 0,
+            )
+        X = pd.DataFrame(X, columns = [f"f{i}" for i in range(options["features"])])
+
+        models = {
+            "Decision Tree Classifier"  : DecisionTreeClassifier(random_state = 0),
+            "Random Forest Classifier"  : RandomForestClassifier(n_estimators = 25, random_state = 0),
+        }
+
+        batch     = X.iloc[:options["batch_rows"]]
+        scenarios = ((X.iloc[:1], options["repeat"]), (X.iloc[:100], options["repeat"] // 4), (batch, max(options["repeat"] // 20, 3)))
+
+        self.stdout.write(f"{'model':<28} {'rows':>6} {'sklearn ms':>12} {'compiled ms':>12} {'speedup':>8} {'served ms':>10}")
+
+        for name, model in models.items():
+            model.fit(X, y)
+            compiled = compile_model(model)
+            # as served, batches above COMPILED_MAX_ROWS go to sklearn
+            served   = compile_model(model, settings.INFERENCE['COMPILED_MAX_ROWS'])
+
+            assert (compiled.predict(batch) == model.predict(batch)).all(), f"{name} predictions differ"
+
+            for rows, repeat in scenarios:
+                sklearn_ms  = self.measure(model.predict, rows, repeat)
+                compiled_ms = self.measure(compiled.predict, rows, repeat)
+                served_ms   = self.measure(served.predict, rows, repeat)
+
+                self.stdout.write(
+                    f"{name:<28} {len(rows):>6} {sklearn_ms:>12.3f} {compiled_ms:>12.3f} "
+                    f"{sklearn_ms / compiled_ms:>7.1f}x {served_ms:>10.3f}"
+                )
+
+    def measure(self, predict, X, repeat):
+        """median latency of predict in milliseconds"""
+        predict(X)
+        latencies = []
+
+        for _ in range(repeat):
+            start = time.perf_counter()
+            predict(X)
+            latencies.append(time.perf_counter() - start)
+
+        return float(np.median(latencies) * 1000)
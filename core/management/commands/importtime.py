@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+
+from django.conf                    import settings
+from django.core.management.base   import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Reports the `python -X importtime` breakdown of loading the WSGI application"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--module", default = "Insight.wsgi", help = "module imported at worker start up")
+        parser.add_argument("--top", type = int, default = 15, help = "no of slowest imports reported")
+        parser.add_argument("--budget-ms", type = float, default = settings.STARTUP_IMPORT_BUDGET_MS,
+                            help = "fail when the module takes longer to import")
+
+    def handle(self, *args, module, top, budget_ms, **options):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "Insight.settings")}
+
+        result = subprocess.run(
+                    [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                    env = env,
+                    capture_output = True,
+                    text = True,
+                )
+
+        if result.returncode != 0:
+            raise CommandError(f"importing {module} failed\n{result.stderr}")
+
+        imports = self.parse(result.stderr)
+        total   = next((cumulative for name, _, cumulative in imports if name == module), 0) / 1000
+
+        self.stdout.write(f"{'cumulative ms':>14} {'self ms':>9}  module")
+        for name, own, cumulative in sorted(imports, key = lambda row: row[2], reverse = True)[:top]:
+            self.stdout.write(f"{cumulative / 1000:14.1f} {own / 1000:9.1f}  {name}")
+
+        heavy = sorted({name.split(".")[0] for name, _, _ in imports} & set(settings.STARTUP_LAZY_MODULES))
+        if heavy:
+            self.stdout.write(self.style.WARNING(f"loaded at start up: {', '.join(heavy)}"))
+
+        self.stdout.write(f"{module} imported in {total:.1f} ms (budget {budget_ms:.0f} ms)")
+
+        if total > budget_ms:
+            raise CommandError(f"{module} import time {total:.1f} ms is over budget of {budget_ms:.0f} ms")
+
+    def parse(self, stderr):
+        """(module, self us, cumulative us) of every `import time:` line"""
+        imports = []
+
+        for line in stderr.splitlines():
+            if not line.startswith("import time:") or "[us]" in line:
+                continue
+
+            own, cumulative, name = line[len("import time:"):].split("|")
+            imports.append((name.strip(), int(own), int(cumulative)))
+
+        return imports
@@ -0,0 +1,102 @@
+import multiprocessing
+import os
+import time
+
+from concurrent.futures         import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from django.conf                import settings
+from django.core.management.base import BaseCommand
+from django.db                  import connections
+from django.utils               import timezone
+
+
+def setup_worker(workers):
+    """initializes django inside a pool process
+
+    Args:
+        workers (int): no of pool processes, the training cpu budget is shared among them
+    """
+    os.environ["TRAINING_WORKERS"] = str(workers)
+
+    import django
+    django.setup()
+
+
+def run_job(job_id):
+    """runs a claimed training job inside a pool process
+
+    Args:
+        job_id (int): primary key of the claimed job
+    """
+    from core.models import TrainingJob
+
+    TrainingJob.objects.select_related('model_file__created_by').get(pk = job_id).run()
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Runs queued training jobs on a local pool of worker processes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type = int, default = settings.TRAINING_WORKERS)
+        parser.add_argument("--poll-interval", type = float, default = settings.TRAINING_POLL_INTERVAL)
+        parser.add_argument("--once", action = "store_true", help = "exit once the queue is empty")
+
+    def handle(self, *args, workers, poll_interval, once, **options):
+        from core.models import TrainingJob
+
+        # fits run in separate processes so they don't share the GIL with each other
+        pool    = ProcessPoolExecutor(
+                    max_workers = workers,
+                    mp_context  = multiprocessing.get_context("spawn"),
+                    initializer = setup_worker,
+                    initargs    = (workers, ),
+                )
+        running = {}
+
+        self.stdout.write(f"Training worker started with {workers} processes")
+
+        try:
+            while True:
+                # jobs left running by a worker that died are queued again
+                reclaimed = TrainingJob.reclaim_stale()
+
+                if reclaimed:
+                    self.stdout.write(f"Reclaimed {reclaimed} stale jobs")
+
+                while len(running) < workers:
+                    job = TrainingJob.claim_next()
+
+                    if job is None:
+                        break
+
+                    self.stdout.write(f"Running {job}")
+                    running[pool.submit(run_job, job.pk)] = job
+
+                if not running:
+                    if once:
+                        break
+
+                    time.sleep(poll_interval)
+                    continue
+
+                TrainingJob.heartbeat([job.pk for job in running.values()])
+
+                done, _ = wait(running, timeout = poll_interval, return_when = FIRST_COMPLETED)
+
+                for future in done:
+                    job = running.pop(future)
+
+                    if future.exception() is not None:
+                        # the pool process died before the job could record its result
+                        job.set_progress(
+                            job.progress,
+                            status      = TrainingJob.FAILED,
+                            error       = str(future.exception()),
+                            finished_on = timezone.now(),
+                        )
+
+                    job.refresh_from_db()
+                    self.stdout.write(f"Finished {job}")
+        finally:
+            pool.shutdown(wait = True)
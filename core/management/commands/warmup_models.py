@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from core.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = "Preloads pinned and most predicted models, exporting them to the shared model store"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type = int, default = None, help = "no of most predicted models")
+
+    def handle(self, *args, top, **options):
+        # the command's own cache dies with it, what stays is the shared store
+        # export that every worker then maps instead of deserializing the model
+        state = warm_up(top)
+
+        for project_name in state["loaded"]:
+            self.stdout.write(f"Loaded {project_name}")
+
+        for project_name in state["failed"]:
+            self.stdout.write(self.style.WARNING(f"Failed {project_name}"))
+
+        self.stdout.write(f"Warm-up done in {(state['finished_on'] - state['started_on']).total_seconds():.2f} s")
@@ -0,0 +1,128 @@
+import bisect
+import time
+
+from contextlib     import contextmanager
+from threading      import Lock
+
+from django.conf    import settings
+
+
+# latency buckets in seconds, upper bounds of prometheus histogram buckets
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# project label of observations made before the project was found
+UNKNOWN = "unknown"
+
+# labels of the observations of a metric once the registry holds max_series histograms
+OVERFLOW = (("series", "overflow"), )
+
+
+class Histogram:
+    """Latency histogram of one metric and label set"""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum    = 0.0
+        self.count  = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum   += value
+        self.count += 1
+
+
+class Registry:
+    """In-process latency histograms rendered in prometheus text format
+
+        The no of label sets is capped by max_series, observations of new
+        label sets beyond it go to one overflow histogram per metric.
+    """
+
+    def __init__(self, enabled = True, max_series = 1000):
+        self.enabled     = enabled
+        self.max_series  = max_series
+        self._histograms = {}         # (metric, labels) -> Histogram
+        self._lock       = Lock()
+
+    def observe(self, metric, seconds, **labels):
+        """records one observation
+
+        Args:
+            metric (str): metric name without the _seconds suffix
+            seconds (float): observed latency
+            labels (str): labels of the observation
+        """
+        key = (metric, tuple(sorted(labels.items())))
+
+        with self._lock:
+            histogram = self._histograms.get(key)
+
+            if histogram is None:
+                if len(self._histograms) >= self.max_series:
+                    key       = (metric, OVERFLOW)
+                    histogram = self._histograms.get(key)
+
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram()
+
+            histogram.observe(seconds)
+
+    @contextmanager
+    def span(self, metric, **labels):
+        """times the enclosed block, does nothing when metrics are disabled
+
+            yields the labels, the block may set the ones known only inside it
+        """
+        if not self.enabled:
+            yield labels
+            return
+
+        start = time.perf_counter()
+        try:
+            yield labels
+        finally:
+            self.observe(metric, time.perf_counter() - start, **labels)
+
+    def render(self):
+        """every histogram in prometheus text exposition format
+
+        Returns:
+            str: exposition text
+        """
+        with self._lock:
+            items = sorted((key, (list(h.counts), h.sum, h.count)) for key, h in self._histograms.items())
+
+        lines, described = [], set()
+
+        for (metric, labels), (counts, total, count) in items:
+            name = f"insight_{metric}_seconds"
+
+            if name not in described:
+                lines.append(f"# TYPE {name} histogram")
+                described.add(name)
+
+            cumulative = 0
+            for bound, bucket in zip(BUCKETS + ("+Inf", ), counts):
+                cumulative += bucket
+                lines.append(f"{name}_bucket{self._labels(labels, le = bound)} {cumulative}")
+
+            lines.append(f"{name}_sum{self._labels(labels)} {total}")
+            lines.append(f"{name}_count{self._labels(labels)} {count}")
+
+        return "\n".join(lines) + "\n"
+
+    def _labels(self, labels, **extra):
+        pairs = list(labels) + list(extra.items())
+
+        if not pairs:
+            return ""
+
+        return "{" + ",".join(f'{k}="{self._escape(v)}"' for k, v in pairs) + "}"
+
+    def _escape(self, value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics = Registry(enabled = settings.METRICS['ENABLED'], max_series = settings.METRICS['MAX_SERIES'])
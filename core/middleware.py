@@ -0,0 +1,54 @@
+import time
+
+from asgiref.sync           import iscoroutinefunction, markcoroutinefunction
+from django.core.exceptions import MiddlewareNotUsed
+
+from .metrics import metrics
+
+
+class MetricsMiddleware:
+    """Records latency of every request per endpoint, method and status
+
+        The middleware removes itself when metrics are disabled. It runs async
+        under ASGI so async views are not pushed onto a thread.
+    """
+    sync_capable  = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not metrics.enabled:
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        start    = time.perf_counter()
+        response = self.get_response(request)
+
+        self.observe(request, response, start)
+
+        return response
+
+    async def __acall__(self, request):
+        start    = time.perf_counter()
+        response = await self.get_response(request)
+
+        self.observe(request, response, start)
+
+        return response
+
+    def observe(self, request, response, start):
+        match = request.resolver_match
+        metrics.observe(
+            "http_request",
+            time.perf_counter() - start,
+            endpoint = match.route if match else "unmatched",
+            method   = request.method,
+            status   = response.status_code,
+        )
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_trainingjob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='modelfile',
+            index=models.Index(fields=['is_public', 'created_on'], name='modelfile_public_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='modelfile',
+            index=models.Index(fields=['created_by', 'created_on'], name='modelfile_owner_created_idx'),
+        ),
+    ]
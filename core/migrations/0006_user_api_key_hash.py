@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:40
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def hash_api_keys(apps, schema_editor):
+    User = apps.get_model('core', 'User')
+
+    for user in User.objects.exclude(api_key = None):
+        user.api_key_hash   = hashlib.sha256(user.api_key.encode()).hexdigest()
+        user.api_key_prefix = user.api_key[:6]
+        user.save(update_fields = ['api_key_hash', 'api_key_prefix'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_modelfile_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='api_key_hash',
+            field=models.CharField(max_length=64, null=True, unique=True, verbose_name='API key hash'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='api_key_prefix',
+            field=models.CharField(blank=True, default='', max_length=6, verbose_name='API key prefix'),
+        ),
+        migrations.RunPython(hash_api_keys, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='user',
+            name='api_key',
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_user_api_key_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='modelfile',
+            name='is_pinned',
+            field=models.BooleanField(default=False, verbose_name='Preload at worker start'),
+        ),
+        migrations.AddField(
+            model_name='modelfile',
+            name='prediction_count',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
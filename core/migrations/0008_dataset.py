@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:45
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_modelfile_warmup'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='trainingjob',
+            name='dataset',
+            field=models.FileField(blank=True, upload_to='training_datasets'),
+        ),
+        migrations.CreateModel(
+            name='Dataset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('digest', models.CharField(db_index=True, max_length=64)),
+                ('schema', models.JSONField(default=dict)),
+                ('row_count', models.PositiveBigIntegerField(default=0)),
+                ('created_on', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='datasets', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
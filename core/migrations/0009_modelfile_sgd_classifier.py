@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_dataset'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='modelfile',
+            name='model_name',
+            field=models.CharField(choices=[('Decision Tree Classifier', 'Decision Tree Classifier'), ('K-Nearest Neighbors Classifier', 'K-Nearest Neighbors Classifier'), ('Logistic Regression', 'Logistic Regression'), ('Gaussian Naive Bayes Classifier', 'Gaussian Naive Bayes Classifier'), ('Random Forest Classifier', 'Random Forest Classifier'), ('Support Vector Machine', 'Support Vector Machine'), ('SGD Classifier', 'SGD Classifier'), ('Custom Model', 'Upload Model')], default='K-Nearest Neighbors Classifier', max_length=50),
+        ),
+    ]
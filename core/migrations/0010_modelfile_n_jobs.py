@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_modelfile_sgd_classifier'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='modelfile',
+            name='n_jobs',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='CPU cores used, capped by the server budget'),
+        ),
+    ]
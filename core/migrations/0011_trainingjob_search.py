@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_modelfile_n_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trainingjob',
+            name='kind',
+            field=models.CharField(choices=[('train', 'Training'), ('search', 'Hyperparameter search')], default='train', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='trainingjob',
+            name='results',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
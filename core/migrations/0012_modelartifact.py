@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:02
+
+import hashlib
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def adopt_model_files(apps, schema_editor):
+    """existing model files become artifacts in place, identical ones are stored once"""
+    ModelFile     = apps.get_model('core', 'ModelFile')
+    ModelArtifact = apps.get_model('core', 'ModelArtifact')
+
+    for record in ModelFile.objects.exclude(model_obj = "").filter(artifact = None):
+        storage, name = record.model_obj.storage, record.model_obj.name
+
+        if not storage.exists(name):
+            continue
+
+        with storage.open(name, 'rb') as model_file:
+            digest = hashlib.sha256(model_file.read()).hexdigest()
+
+        artifact = ModelArtifact.objects.filter(digest = digest).first()
+
+        if artifact is None:
+            artifact = ModelArtifact.objects.create(digest = digest, file = name, size = storage.size(name))
+        else:
+            # duplicate of an adopted file, its neighbour index is kept when the artifact has none
+            index = f"{artifact.file.name}.ann"
+
+            if storage.exists(f"{name}.ann") and not storage.exists(index):
+                with storage.open(f"{name}.ann", 'rb') as index_file:
+                    storage.save(index, index_file)
+
+            for stale in (name, f"{name}.ann"):
+                if storage.exists(stale):
+                    storage.delete(stale)
+
+        ModelArtifact.objects.filter(pk = artifact.pk).update(ref_count = models.F('ref_count') + 1)
+
+        record.artifact  = artifact
+        record.model_obj = artifact.file.name
+        record.save(update_fields = ['artifact', 'model_obj'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_trainingjob_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelArtifact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('file', models.FileField(upload_to='artifacts')),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_on', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='modelfile',
+            name='artifact',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='model_files', to='core.modelartifact'),
+        ),
+        migrations.RunPython(adopt_model_files, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:06
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def create_first_versions(apps, schema_editor):
+    """the artifact of every model becomes its first version, which takes over its reference"""
+    ModelFile    = apps.get_model('core', 'ModelFile')
+    ModelVersion = apps.get_model('core', 'ModelVersion')
+
+    for record in ModelFile.objects.exclude(artifact = None):
+        record.version = ModelVersion.objects.create(
+                            model_file  = record,
+                            number      = 1,
+                            artifact_id = record.artifact_id,
+                            source      = 'created',
+                            created_on  = record.last_trained_on,
+                        )
+        record.save(update_fields = ['version'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_modelartifact'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+                ('source', models.CharField(choices=[('created', 'Created'), ('uploaded', 'Uploaded'), ('trained', 'Trained'), ('searched', 'Hyperparameter search')], default='trained', max_length=10)),
+                ('created_on', models.DateTimeField(default=django.utils.timezone.now)),
+                ('artifact', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='versions', to='core.modelartifact')),
+                ('model_file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='core.modelfile')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='modelfile',
+            name='version',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.modelversion'),
+        ),
+        migrations.AddConstraint(
+            model_name='modelversion',
+            constraint=models.UniqueConstraint(fields=('model_file', 'number'), name='modelversion_model_number_uniq'),
+        ),
+        migrations.RunPython(create_first_versions, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='modelfile',
+            name='artifact',
+        ),
+    ]
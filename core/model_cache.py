@@ -0,0 +1,108 @@
+from collections    import OrderedDict
+from threading      import Lock
+
+from django.conf    import settings
+
+
+class ModelCache:
+    """Per-process LRU cache of loaded estimators
+
+        Entries are keyed by artifact digest and carry a version token, a lookup
+        with a different token is treated as a miss and replaces the stale entry.
+        The cache is bounded both by number of entries and by total bytes.
+    """
+
+    def __init__(self, max_entries = 32, max_bytes = 512 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes   = max_bytes
+
+        self._entries    = OrderedDict()       # key -> (version, model, size)
+        self._lock       = Lock()
+        self._bytes      = 0
+
+        self.hits        = 0
+        self.misses      = 0
+        self.evictions   = 0
+
+    def get(self, key, version, loader):
+        """returns the cached model or loads it through loader
+
+        Args:
+            key (str): cache key, usually the artifact digest
+            version (str): version token of the stored model
+            loader (callable): returns (model, size in bytes) on a miss
+
+        Returns:
+            model object: loaded estimator
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            self.misses += 1
+
+        model, size = loader()
+
+        with self._lock:
+            self._discard(key)
+
+            if size <= self.max_bytes:
+                self._entries[key] = (version, model, size)
+                self._bytes += size
+                self._evict()
+
+        return model
+
+    def invalidate(self, key):
+        """drops the cached model of key if any"""
+        with self._lock:
+            self._discard(key)
+
+    def clear(self):
+        """drops every cached model"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """gives counters of the cache
+
+        Returns:
+            dict: hits, misses, evictions and current usage
+        """
+        with self._lock:
+            return {
+                "hits"          : self.hits,
+                "misses"        : self.misses,
+                "evictions"     : self.evictions,
+                "entries"       : len(self._entries),
+                "bytes"         : self._bytes,
+                "max_entries"   : self.max_entries,
+                "max_bytes"     : self.max_bytes,
+            }
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def _evict(self):
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            _, (_, _, size) = self._entries.popitem(last = False)
+            self._bytes -= size
+            self.evictions += 1
+
+
+_config = getattr(settings, 'MODEL_CACHE', {})
+
+model_cache = ModelCache(
+    max_entries = _config.get('MAX_ENTRIES', 32),
+    max_bytes   = _config.get('MAX_BYTES', 512 * 1024 * 1024),
+)
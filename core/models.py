@@ -1,28 +1,42 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 
 from django.contrib.auth.models import AbstractUser
 
 from django.utils import timezone
+from datetime import timedelta
 from django.utils.translation import gettext_lazy as _
 
-from sklearn.model_selection    import train_test_split
-from sklearn.metrics            import accuracy_score, confusion_matrix, precision_score, recall_score 
-from sklearn.datasets           import *
-
-from pickle                     import load, dumps
+from .serialization             import loads, dumps
+from .helper                    import get_model, lazy_import, supports_incremental, search_spaces
+from .                          import cpu
 
 from django.conf                import settings
+from django.core.cache          import cache
 
 from pathlib                    import Path
 from django.core.files.base     import File, ContentFile
 
-import numpy    as np 
-import pandas   as pd
-import matplotlib.pyplot as plt
-import io
-from seaborn                    import heatmap
+import json
+import base64
+import hashlib
+import secrets
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+from .model_cache               import model_cache
+from .shared_store              import shared_store
+from .usage                     import prediction_counter
+from .batching                  import prediction_batcher, prediction_executor
+from .metrics                   import metrics
+from .datasets                  import load_dataset, ingest, dataset_directory, read_columnar, spooled, file_digest
+from .evaluation                import evaluate, render_plot
+from .inference                 import apply_backend, COMPILED_FORMAT
+from .ann                       import ANNClassifier, INDEX_FORMAT, build_index, index_name, recall_report, shared_index
+from .authenicators             import api_key_cache, hash_api_key
 
+import asyncio
 
 
 models_list = [
@@ -32,9 +46,94 @@ models_list = [
     ("Gaussian Naive Bayes Classifier"  , "Gaussian Naive Bayes Classifier"),
     ("Random Forest Classifier"         , "Random Forest Classifier"),
     ("Support Vector Machine"           , "Support Vector Machine"),
+    ("SGD Classifier"                   , "SGD Classifier"),
     ("Custom Model"                     , "Upload Model")
 ]
 
+class PredictionInputError(ValueError):
+    """raised when the data sent for a prediction is malformed"""
+
+
+def get_batch_frame(data, data_type):
+    """builds a dataframe from a json row batch in a single numpy conversion
+
+    Args:
+        data (dict): request data, form fields may carry the batch as a json string
+        data_type (str): rows, columns or buffer
+
+    Raises:
+        PredictionInputError: the batch is malformed, ragged or not numeric
+
+    Returns:
+        pd.DataFrame: batch of rows
+    """
+    if data_type == "buffer":
+        try:
+            n_features = int(data.get("n_features"))
+        except (TypeError, ValueError):
+            raise PredictionInputError("n_features must be an integer")
+
+        if n_features < 1:
+            raise PredictionInputError("n_features must be positive")
+
+        try:
+            content = base64.b64decode(data.get("buffer") or "", validate = True)
+        except (TypeError, ValueError):
+            raise PredictionInputError("buffer must be base64 encoded")
+
+        if len(content) % (4 * n_features):
+            raise PredictionInputError(f"buffer of {len(content)} bytes does not hold float32 rows of {n_features} features")
+
+        return pd.DataFrame(np.frombuffer(content, dtype = "<f4").reshape(-1, n_features))
+
+    batch   = load_json_field(data, data_type)
+    columns = load_json_field(data, "columns") if data_type == "rows" else None
+
+    if data_type == "columns" and not isinstance(batch, dict):
+        raise PredictionInputError("columns must map names to lists of values")
+
+    if data_type == "rows" and (not isinstance(batch, list) or not batch):
+        raise PredictionInputError("rows must be a non empty list of rows")
+
+    try:
+        if data_type == "columns":
+            return pd.DataFrame({
+                column : np.asarray(values, dtype = np.float64) for column, values in batch.items()
+            })
+
+        values = np.asarray(batch, dtype = np.float64)
+    except (TypeError, ValueError):
+        raise PredictionInputError(f"{data_type} must hold numbers only, every row or column of the same length")
+
+    if values.ndim == 1:
+        values = values.reshape(len(batch), -1)
+
+    if values.ndim != 2:
+        raise PredictionInputError("rows must be a list of lists of numbers")
+
+    if columns is not None and len(columns) != values.shape[1]:
+        raise PredictionInputError(f"{len(columns)} column names given for rows of {values.shape[1]} values")
+
+    return pd.DataFrame(values, columns = columns)
+
+
+def load_json_field(data, name):
+    """field of the request data, decoded when sent as a json string in a form"""
+    value = data.get(name)
+
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            raise PredictionInputError(f"{name} is not valid json")
+
+    return value
+
+
+class ModelNotStoredError(ValueError):
+    """raised when a model file serves no stored version to load"""
+
+
 class User(AbstractUser):
     mobile_number   = models.CharField(
                         blank = False,
@@ -50,36 +149,130 @@ class User(AbstractUser):
                 )
     
     date_joined = models.DateTimeField(_("date joined"), default=timezone.now)
-    api_key     = models.CharField(_("API key"), unique = True, null = True, max_length = 24)
+    api_key_hash    = models.CharField(_("API key hash"), unique = True, null = True, max_length = 64)
+    api_key_prefix  = models.CharField(_("API key prefix"), blank = True, default = "", max_length = 6)
     
     def __str__(self):
         return f"{self.username} - {self.first_name} {self.last_name}"
 
     def generate_api_key(self):
-        timestamp = str(timezone.now())
-        key = ""
-        for c in timestamp:
-            if c.isalnum():
-                key += c
-            
-        key = key[:-4]
-        key += self.username[:6] if len(self.username) > 6 else self.username.rjust(6, 's')
-        
-        self.api_key = key
+        """creates a new API key, only its hash is stored
+
+        Returns:
+            str: new API key, shown to the user once
+        """
+        key = secrets.token_hex(12)
+
+        if self.api_key_hash:
+            api_key_cache.invalidate(self.api_key_hash)
+
+        self.api_key_hash   = hash_api_key(key)
+        self.api_key_prefix = key[:6]
         self.save()
+
+        return key
     
     # def save(self, *args, **kwargs):
     #     self.api_key = generate_api_key()
 
     #     super(User, self).save(*args, **kwargs)
 
+class ModelArtifact(models.Model):
+    """Model Artifact model Schema
+
+        content addressed model file shared by every model version with the
+        same content, deleted with its neighbour index once nothing refers to it
+
+        digest(str)         : sha256 of the model file, names the file
+        file(file)          : stored model file
+        size(int)           : size of the model file in bytes
+        ref_count(int)      : no of model versions pointing to the artifact
+        created_on(DateTime): time artifact stored
+    """
+    digest      = models.CharField(max_length = 64, unique = True)
+    file        = models.FileField(upload_to = 'artifacts')
+    size        = models.PositiveBigIntegerField(default = 0)
+    ref_count   = models.PositiveIntegerField(default = 0)
+    created_on  = models.DateTimeField(default = timezone.now)
+
+    def __str__(self):
+        return f"{self.digest[:12]} ({self.size} bytes, {self.ref_count} refs)"
+
+    @classmethod
+    def acquire(cls, content, index = None):
+        """stores the content once and takes a reference on its artifact
+
+        Args:
+            content (bytes): serialized model
+            index (IVFIndex | HNSWIndex, optional): neighbour index stored next to the model. Defaults to None.
+
+        Returns:
+            ModelArtifact: artifact of the content
+        """
+        digest  = hashlib.sha256(content).hexdigest()
+        written = []
+
+        try:
+            with transaction.atomic():
+                artifact, created = cls.objects.select_for_update().get_or_create(
+                                        digest = digest,
+                                        defaults = {"size" : len(content)},
+                                    )
+
+                if created:
+                    artifact.file.save(f"{digest}.model", ContentFile(content), save = False)
+                    written.append(artifact.file.name)
+
+                storage = artifact.file.storage
+
+                if index is not None and not storage.exists(index_name(artifact.file.name)):
+                    written.append(storage.save(index_name(artifact.file.name), ContentFile(dumps(index))))
+
+                artifact.ref_count = models.F('ref_count') + 1
+                artifact.save()
+                artifact.refresh_from_db()
+        except Exception:
+            cls.remove_files(cls.file.field.storage, written)
+            raise
+
+        # removed by the caller when its own transaction rolls back
+        artifact.written = written
+
+        return artifact
+
+    @staticmethod
+    def remove_files(storage, names):
+        """removes stored files, the neighbour index before the model file it is named after
+
+        Args:
+            storage (Storage): storage of the artifact files
+            names (list): model file then index names
+        """
+        for name in reversed(names):
+            if storage.exists(name):
+                storage.delete(name)
+
+    @classmethod
+    def release(cls, pk):
+        """drops a reference on the artifact, deletes it when it was the last one
+
+            the files are removed by the post_delete signal after the commit
+
+        Args:
+            pk (int): primary key of the artifact
+        """
+        with transaction.atomic():
+            cls.objects.filter(pk = pk).update(ref_count = models.F('ref_count') - 1)
+            cls.objects.filter(pk = pk, ref_count = 0).delete()
+
 class ModelFile(models.Model):
     """Model File model Schema
 
     
         project_name(str) : name of the project
         model_name(str)   : name of the classifier used
-        model_obj(file)   : file path of model
+        model_obj(file)   : file path of model, the file of the served version
+        version(ModelVersion) : served version of the model
         created_by(user)  : created by user
         created_on(DateTime) : time model created
         last_trained_on : time model last trained
@@ -98,9 +291,29 @@ class ModelFile(models.Model):
                 )
     is_public   = models.BooleanField(verbose_name = "Is public model", default = False)
     model_obj   = models.FileField(upload_to = 'saved_models', null= True)
+    version     = models.ForeignKey(
+                    'ModelVersion',
+                    on_delete = models.SET_NULL,
+                    null = True,
+                    blank = True,
+                    related_name = "+"
+                )
     created_by  = models.ForeignKey(User, on_delete = models.CASCADE, related_name = "models")
     created_on  = models.DateTimeField(default = timezone.now)
     last_trained_on = models.DateTimeField()
+    is_pinned   = models.BooleanField(verbose_name = "Preload at worker start", default = False)
+    prediction_count = models.PositiveBigIntegerField(default = 0)
+    n_jobs      = models.PositiveSmallIntegerField(
+                    verbose_name = "CPU cores used, capped by the server budget",
+                    null = True,
+                    blank = True
+                )
+
+    class Meta:
+        indexes = [
+            models.Index(fields = ['is_public', 'created_on'], name = 'modelfile_public_created_idx'),
+            models.Index(fields = ['created_by', 'created_on'], name = 'modelfile_owner_created_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         self.project_name = '_'.join([word.strip() for word in self.project_name.split()])
@@ -108,45 +321,145 @@ class ModelFile(models.Model):
 
         super(ModelFile, self).save(*args, **kwargs)    
 
-    def delete(self, *args, **kwargs):
-        if self.model_obj:
-            self.model_obj.delete()
-
-        super(ModelFile, self).delete(*args, **kwargs)
-    
     def __str__(self):
         return f"{self.project_name} - {self.model_name} by {self.created_by}"
 
-    def give_analysis_report(self, dataset):
+    def record_prediction(self):
+        """counts a prediction request in memory, used to pick the models preloaded at worker start"""
+        prediction_counter.add(self.pk)
+
+    @property
+    def model_version(self):
+        """version token of the stored model, the digest of the artifact of the served version"""
+        if self.version_id is None:
+            raise ModelNotStoredError(f"no model is stored for {self.project_name}")
+
+        return self.version.artifact.digest
+
+    def load_model(self):
+        """loads the model object, served from the in-process model cache when possible
+
+            with the shared model store enabled the estimator is memory mapped
+            from a file shared by every worker process, tree models are compiled
+            into flat arrays with the compiled inference backend, exported to the
+            store as well as the lists of an IVF neighbour index, models with the
+            same artifact share one cached estimator
+
+        Returns:
+            model object: deserialized estimator
+        """
+        def read_model():
+            with self.model_obj.open('rb') as model_file:
+                content = model_file.read()
+
+            return loads(content), len(content)
+
+        n_jobs = cpu.n_jobs_for(self.n_jobs, "prediction")
+
+        def loader():
+            shared = index_arrays = None
+
+            if settings.SHARED_MODEL_STORE['ENABLED']:
+                model, size  = shared_store.load(self.model_version, self.model_version, lambda: read_model()[0])
+                shared       = lambda build: shared_store.load_arrays(self.model_version, f"compiled-{COMPILED_FORMAT}", build, name = "compiled")
+                index_arrays = lambda build: shared_store.load_arrays(self.model_version, f"ivf-{INDEX_FORMAT}", build, name = "index")
+            else:
+                model, size = read_model()
+
+            model = cpu.configure(model, n_jobs)
+            model = self.attach_index(model, index_arrays)
+
+            return apply_backend(model, settings.INFERENCE['BACKEND'], settings.INFERENCE['COMPILED_MAX_ROWS'], shared), size
+
+        return model_cache.get(self.model_version, f"n_jobs={n_jobs}", loader)
+
+    def attach_index(self, model, shared = None):
+        """K-Nearest Neighbors model searching the neighbour index stored next to the model file
+
+        Args:
+            model (model object): deserialized estimator
+            shared (callable, optional): loads the index arrays from the shared model store. Defaults to None.
+
+        Returns:
+            model object: ANNClassifier or the estimator itself when it has no index
+        """
+        if type(model).__name__ != "KNeighborsClassifier":
+            return model
+
+        name = index_name(self.model_obj.name)
+
+        if not self.model_obj.storage.exists(name):
+            return model
+
+        def read_index():
+            with self.model_obj.storage.open(name, 'rb') as index_file:
+                return loads(index_file.read())
+
+        if shared is None:
+            return ANNClassifier(model, read_index())
+
+        return ANNClassifier(model, shared_index(read_index, shared))
+
+    def give_analysis_report(self, dataset, digest = None):
         """gives the report of model on analysis of dataset
 
+            the report is cached per model version, dataset content, target and
+            features so evaluating the same dataset again skips the predictions
+
         Args:
-            model_file_path (str): file path of the model
-            dataset (file): dataset file
+            dataset (dict): data with the dataset, target and features, see get_data
+            digest (str, optional): sha256 of the dataset when already computed. Defaults to None.
 
         Returns:
             dict: gives report of dictionary
         """
-        
-        X, y = get_dataset(dataset)
-        
-        model = load(self.model_obj.open('rb'))
-        
-        y_pred = model.predict(X)        # making prediction
-        
-        res = {
-            "accuracy"              : f"{int(accuracy_score(y, y_pred) * 100)}",
-            "Precision Score"       : f"{int(precision_score(y, y_pred, average = 'micro') * 100)}",
-            "Recall Score"          : f"{int(recall_score(y, y_pred, average = 'micro') * 100)}",
-        }
-        
-        # plt.title(f"Classfication using {model_name} on {dataset_name}")
-        # heatmap(pd.DataFrame(confusion_matrix(y_test, y_pred)), annot = True)
-        # plt.xlabel("Predicted Labels")
-        # plt.ylabel("Actual Labels")
-        # plt.savefig(f"Confusion Matrix of {model_name} on {dataset_name}.png")
-
-        return res
+        digest = digest or self.dataset_digest(dataset)
+        key    = self.report_key(dataset, digest)
+        report = cache.get(key)
+
+        if report is None:
+            X, y = self.get_data(dataset, digest = digest)
+
+            report = evaluate(self.load_model(), X, y)
+            cache.set(key, report, settings.EVALUATION['CACHE_TIMEOUT'])
+
+        return report
+
+    def give_analysis_plot(self, dataset, kind):
+        """png plot of the analysis report, rendered once per report
+
+        Args:
+            dataset (dict): data with the dataset, target and features, see get_data
+            kind (str): confusion_matrix, roc or pr
+
+        Returns:
+            bytes: png image
+        """
+        digest = self.dataset_digest(dataset)
+        key    = f"{self.report_key(dataset, digest)}:plot:{kind}"
+        plot   = cache.get(key)
+
+        if plot is None:
+            plot = render_plot(self.give_analysis_report(dataset, digest), kind)
+            cache.set(key, plot, settings.EVALUATION['CACHE_TIMEOUT'])
+
+        return plot
+
+    def dataset_digest(self, dataset):
+        """sha256 of the uploaded csv or of the registered dataset, hashed once per evaluation"""
+        source = dataset.get('dataset')
+
+        if isinstance(source, Dataset):
+            return source.digest
+
+        with spooled(source) as path:
+            return file_digest(path)
+
+    def report_key(self, dataset, digest):
+        """cache key of the analysis report of the model artifact on the dataset"""
+        options = f"{dataset.get('target', '').strip()}|{dataset.get('features', '*')}"
+
+        return "evaluation:" + hashlib.sha1(f"{self.model_version}|{digest}|{options}".encode()).hexdigest()
 
     def add_model_obj(self, data, user):
         """adds model object to the modelFileRecord
@@ -155,59 +468,237 @@ class ModelFile(models.Model):
             data (dict): data of the model
             user (User): user who created the model
         """
-        
-        # delete existing model object file if exists
-        if self.model_obj:
-            self.model_obj.delete()
-
-        file_name = f"{self.project_name} - {self.model_name} created by {user.username} .pkl"
+        if data.get('n_jobs'):
+            self.n_jobs = int(data.get('n_jobs'))
 
         if self.model_name == "Custom Model":
-            model_obj = data.get('model_obj')
-            self.model_obj.save(
-                file_name,
-                model_obj
-            )
+            content = data.get('model_obj').read()
+            source  = ModelVersion.UPLOADED
         else:
-            self.model_obj.save(
-                file_name,
-                ContentFile(
-                    get_model(
+            content = get_model(
                         self.model_name,
                         int(data.get('knn_val', '0')),
                     )
-                )
-            )
+            source  = ModelVersion.CREATED
 
         self.save()
+        self.replace_model_obj(content, source = source)
 
-    def train(self, train_set):
+    def train(self, train_set, incremental = False, progress = None):
         """trains the model
 
+            in incremental mode the stored model is updated with partial_fit on
+            chunks of the new data instead of being fitted from scratch, the fit
+            uses the cores of the model capped by the training budget
+
         Args:
             train_set (file): file of the dataset
+            incremental (bool, optional): update the model with partial_fit. Defaults to False.
+            progress (callable, optional): called with the fraction of chunks trained. Defaults to None.
+
+        Returns:
+            dict: recall report of the neighbour index built for large K-Nearest Neighbors models
         """
-        model = load(self.model_obj.open('rb'))
+        with self.model_obj.open('rb') as model_file:
+            model = loads(model_file.read())
+
         features, target = train_set
+        n_jobs = cpu.n_jobs_for(self.n_jobs, "training")
+
+        with cpu.limit_threads(n_jobs):
+            cpu.configure(model, n_jobs)
+
+            if incremental:
+                self.partial_train(model, features, target, progress)
+            else:
+                model.fit(features, target)           # model training 
 
-        model.fit(features, target)           # model training 
+            index = build_index(model)
 
-        trained_model = dumps(model)
+        self.replace_model_obj(dumps(model), index, ModelVersion.TRAINED)
 
-        self.model_obj.delete()          # delete existing model
-        self.model_obj.save(             # create new model
-                f"{self.project_name} - {self.model_name} created by {self.created_by.username}.pkl",
-                ContentFile( trained_model )
+        return {"ann" : recall_report(model, index)} if index is not None else {}
+
+    def search(self, train_set, options, progress = None):
+        """searches the hyperparameters of the model and keeps the best estimator
+
+        Args:
+            train_set (tuple): features and target of the dataset
+            options (dict): strategy, param_grid, n_iter, cv and scoring of the search
+            progress (callable, optional): called with the fraction of the search done. Defaults to None.
+
+        Returns:
+            dict: best params, best score and the results table of every candidate
+        """
+        from .search import run_search
+
+        param_grid = options.get("param_grid") or search_spaces.get(self.model_name)
+
+        if not param_grid:
+            raise ValueError(f"no parameter space to search for {self.model_name}, send a param_grid")
+
+        with self.model_obj.open('rb') as model_file:
+            model = loads(model_file.read())
+
+        features, target = train_set
+        n_jobs = cpu.n_jobs_for(self.n_jobs, "training")
+
+        # the folds run in parallel processes, each fit uses a single core
+        with cpu.limit_threads(n_jobs, per_worker = 1):
+            best_model, results = run_search(
+                cpu.configure(model, 1),
+                features,
+                target,
+                param_grid,
+                strategy = options.get("strategy", "halving"),
+                n_iter   = int(options.get("n_iter", 10)),
+                cv       = int(options.get("cv", 5)),
+                scoring  = options.get("scoring") or None,
+                n_jobs   = n_jobs,
+                progress = progress,
             )
-        self.save()
 
-    def get_data(self, data, is_predict = False):
+        index = build_index(best_model)
+        self.replace_model_obj(dumps(best_model), index, ModelVersion.SEARCHED)
+
+        if index is not None:
+            results["ann"] = recall_report(best_model, index)
+
+        return results
+
+    def partial_train(self, model, features, target, progress = None):
+        """updates the model with partial_fit, one chunk of rows at a time
+
+        Args:
+            model (model object): estimator supporting partial_fit
+            features (pd.DataFrame): features of the new data
+            target (pd.Series): target of the new data
+            progress (callable, optional): called with the fraction of chunks trained. Defaults to None.
+        """
+        if not supports_incremental(model):
+            raise ValueError(f"{self.model_name} does not support incremental training")
+
+        # classes must be known on the first partial_fit, later calls keep the fitted ones
+        classes    = getattr(model, "classes_", None)
+        if classes is None:
+            classes = np.unique(target)
+
+        chunk_size = settings.INCREMENTAL_TRAINING_CHUNK_SIZE
+        rows       = len(features)
+
+        with cpu.limit_threads(cpu.n_jobs_for(self.n_jobs, "training")):
+            for start in range(0, rows, chunk_size):
+                model.partial_fit(
+                    features.iloc[start:start + chunk_size],
+                    target.iloc[start:start + chunk_size],
+                    classes = classes,
+                )
+
+                if progress is not None:
+                    progress(min(start + chunk_size, rows) / rows)
+
+    def replace_model_obj(self, content, index = None, source = "trained"):
+        """stores the content as a new version of the model and serves it
+
+            identical content is stored once, the artifact file is written
+            before the version is promoted, versions beyond the newest
+            MODEL_VERSIONS['KEEP'] are deleted
+
+        Args:
+            content (bytes): serialized model
+            index (IVFIndex | HNSWIndex, optional): neighbour index stored next to the model. Defaults to None.
+            source (str, optional): created, uploaded, trained or searched. Defaults to trained.
+
+        Returns:
+            ModelVersion: new served version
+        """
+        artifact = None
+
+        try:
+            with transaction.atomic():
+                # version numbers of concurrent writers are taken one after the other
+                ModelFile.objects.select_for_update().only('pk').get(pk = self.pk)
+
+                number   = self.versions.aggregate(number = models.Max('number'))['number'] or 0
+                artifact = ModelArtifact.acquire(content, index)
+                version  = ModelVersion.objects.create(
+                            model_file  = self,
+                            number      = number + 1,
+                            artifact    = artifact,
+                            source      = source,
+                        )
+
+                self.promote(version)
+                self.prune_versions()
+        except Exception:
+            # the artifact row is rolled back, the files it wrote would stay without one
+            if artifact is not None:
+                ModelArtifact.remove_files(artifact.file.storage, artifact.written)
+            raise
+
+        return version
+
+    def promote(self, version):
+        """serves the version, a single update of the record switches every later prediction to it
+
+            requests that already read the previous version keep loading its
+            file, which stays stored with the previous version
+
+        Args:
+            version (ModelVersion): version of this model
+        """
+        self.version   = version
+        self.model_obj = version.artifact.file.name
+        self.save(update_fields = ['version', 'model_obj', 'last_trained_on'])
+
+    def rollback(self, number = None):
+        """serves a stored version again, the model is not reloaded if a worker still caches it
+
+        Args:
+            number (int, optional): version to be served. Defaults to the version before the served one.
+
+        Returns:
+            ModelVersion: served version
+        """
+        versions = self.versions.select_related('artifact')
+
+        if number is None:
+            if self.version_id is None:
+                raise ValueError("no version is served, send the version to roll back to")
+
+            version = versions.filter(number__lt = self.version.number).order_by('-number').first()
+        else:
+            version = versions.filter(number = int(number)).first()
+
+        if version is None:
+            raise ValueError("no such version to roll back to" if number is not None else "no previous version to roll back to")
+
+        self.promote(version)
+
+        return version
+
+    def prune_versions(self):
+        """deletes the versions older than the newest MODEL_VERSIONS['KEEP'], the served one is kept"""
+        keep = list(self.versions.order_by('-number').values_list('pk', flat = True)[:settings.MODEL_VERSIONS['KEEP']])
+
+        self.versions.exclude(pk__in = keep).exclude(pk = self.version_id).delete()
+
+    def get_data(self, data, is_predict = False, digest = None):
         """
         get_data function
 
+            data_type selects how the data is sent
+                plain_text : one row as numbered keys "0", "1", ...
+                csv        : uploaded csv 'dataset' file
+                rows       : 'rows' list of rows, optional 'columns' names
+                columns    : 'columns' dict of column name to values
+                buffer     : base64 little endian float32 'buffer' of 'n_features' wide rows
+                dataset    : registered Dataset object as 'dataset'
+
         Args:
             data (file): file object
             is_predict (bool, optional): is predict or not. Defaults to False.
+            digest (str, optional): sha256 of the csv dataset when already computed. Defaults to None.
 
         Returns:
             (pd.DataFrame, pd.DataFrame): tuple of features dataframe and target dataframe or series
@@ -219,33 +710,57 @@ class ModelFile(models.Model):
 
             while str(i) in data:
                 v = data.get(str(i))
-                # if v.isnumeric():
-                v = float(v)
-                
+
+                try:
+                    v = float(v)
+                except (TypeError, ValueError):
+                    raise PredictionInputError(f"value {i} is not a number")
+
                 df_dict[i] = [v]
                 i += 1
 
             df = pd.DataFrame(df_dict)
 
         elif data_type == "csv":
-            df = pd.read_csv(io.StringIO(data.get('dataset').read().decode('utf-8')), delimiter = ",")
+            df = load_dataset(data.get('dataset'), cache = not is_predict, digest = digest)
+
+        elif data_type == "dataset":
+            df = data.get('dataset').load()
+
+        elif data_type in ("rows", "columns", "buffer"):
+            df = get_batch_frame(data, data_type)
+
+        else:
+            raise PredictionInputError(f"unsupported data_type {data_type}")
 
         if is_predict:
             return df
 
         target  = data.get('target', '').strip()
-        features = [feature.strip() for feature in data.get('features').split(",")]
 
         y       = df[target]
-        X       = df.drop(
-                    target,
-                    axis = 1
-                )
-        
+        X       = self.get_features(df, target, data.get('features'))
+
+        return (X, y)
+
+    def get_features(self, df, target = '', features = '*'):
+        """feature columns of the dataframe, the target column dropped
+
+        Args:
+            df (pd.DataFrame): dataset
+            target (str, optional): target column. Defaults to '' for none.
+            features (str, optional): comma separated feature columns or * for every other column. Defaults to '*'.
+
+        Returns:
+            pd.DataFrame: features dataframe
+        """
+        features = [feature.strip() for feature in (features or '*').split(",")]
+        X        = df.drop(target, axis = 1) if target else df
+
         if features != ["*"]:
             X = X[features]
 
-        return (X, y)
+        return X
 
     def predict(self, data):
         """predicts the output of the data
@@ -256,10 +771,312 @@ class ModelFile(models.Model):
         Returns:
             str: predicted output
         """
-        dataset = self.get_data(data, is_predict = True)
+        with metrics.span("prediction_stage", stage = "get_data", project = self.project_name):
+            dataset = self.get_data(data, is_predict = True)
 
-        model = load(self.model_obj.open('rb'))
+        with metrics.span("prediction_stage", stage = "load_model", project = self.project_name):
+            model = self.load_model()
 
         X = dataset
 
-        return model.predict(X)
\ No newline at end of file
+        with metrics.span("prediction_stage", stage = "predict", project = self.project_name):
+            if self.is_batched(X):
+                return prediction_batcher.predict(self.batch_key(X), model, X)
+
+            return model.predict(X)
+
+    async def apredict(self, data):
+        """predicts the output of the data without blocking the event loop
+
+            parsing, loading and predicting run on the prediction executor,
+            small requests await their prediction batch when batching is enabled
+
+        Args:
+            data (dict): data to be predicted
+
+        Returns:
+            str: predicted output
+        """
+        loop = asyncio.get_running_loop()
+
+        with metrics.span("prediction_stage", stage = "get_data", project = self.project_name):
+            X = await loop.run_in_executor(prediction_executor, self.get_data, data, True)
+
+        with metrics.span("prediction_stage", stage = "load_model", project = self.project_name):
+            model = await loop.run_in_executor(prediction_executor, self.load_model)
+
+        with metrics.span("prediction_stage", stage = "predict", project = self.project_name):
+            if self.is_batched(X):
+                return await prediction_batcher.apredict(self.batch_key(X), model, X)
+
+            return await loop.run_in_executor(prediction_executor, model.predict, X)
+
+    def is_batched(self, X):
+        """small requests are coalesced with concurrent ones when batching is enabled"""
+        return settings.PREDICTION_BATCHING['ENABLED'] and len(X) < prediction_batcher.max_rows
+
+    def batch_key(self, X):
+        """requests are batched together only on the same model artifact and columns"""
+        return (self.model_version, tuple(X.columns))
+
+    def predict_batches(self, dataset, chunk_size, target = '', features = '*'):
+        """predicts the output of a csv dataset chunk by chunk
+
+        Args:
+            dataset (file | Dataset): csv file or registered dataset of the rows to be predicted
+            chunk_size (int): no of rows parsed and predicted at once
+            target (str, optional): target column dropped before predicting, as in training. Defaults to ''.
+            features (str, optional): comma separated feature columns or * for every other column. Defaults to '*'.
+
+        Yields:
+            np.ndarray: predicted output of each chunk
+        """
+        model  = self.load_model()
+        target = (target or '').strip()
+
+        if isinstance(dataset, Dataset):
+            df = dataset.load()
+            chunks = (df.iloc[start:start + chunk_size] for start in range(0, len(df), chunk_size))
+        else:
+            chunks = pd.read_csv(dataset, delimiter = ",", chunksize = chunk_size)
+
+        for chunk in chunks:
+            yield model.predict(self.get_features(chunk, target, features))
+
+
+class ModelVersion(models.Model):
+    """Model Version model Schema
+
+        model_file(ModelFile)   : model of the version
+        number(int)             : version number, increasing per model
+        artifact(ModelArtifact) : model file of the version
+        source(str)             : created, uploaded, trained or searched
+        created_on(DateTime)    : time version stored
+    """
+    CREATED, UPLOADED, TRAINED, SEARCHED = "created", "uploaded", "trained", "searched"
+
+    source_list = [
+        (CREATED    , "Created"),
+        (UPLOADED   , "Uploaded"),
+        (TRAINED    , "Trained"),
+        (SEARCHED   , "Hyperparameter search"),
+    ]
+
+    model_file  = models.ForeignKey(ModelFile, on_delete = models.CASCADE, related_name = "versions")
+    number      = models.PositiveIntegerField()
+    artifact    = models.ForeignKey(ModelArtifact, on_delete = models.PROTECT, related_name = "versions")
+    source      = models.CharField(choices = source_list, default = TRAINED, max_length = 10)
+    created_on  = models.DateTimeField(default = timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields = ['model_file', 'number'], name = 'modelversion_model_number_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.model_file.project_name} version {self.number} ({self.source})"
+
+
+class Dataset(models.Model):
+    """Dataset model Schema
+
+        name(str)           : name of the dataset
+        created_by(user)    : user who uploaded the dataset
+        digest(str)         : sha256 of the uploaded csv file, names its columnar files
+        schema(dict)        : columns and their dtypes
+        row_count(int)      : no of rows
+        created_on(DateTime): time dataset uploaded
+    """
+    name        = models.CharField(max_length = 100)
+    created_by  = models.ForeignKey(User, on_delete = models.CASCADE, related_name = "datasets")
+    digest      = models.CharField(max_length = 64, db_index = True)
+    schema      = models.JSONField(default = dict)
+    row_count   = models.PositiveBigIntegerField(default = 0)
+    created_on  = models.DateTimeField(default = timezone.now)
+
+    def __str__(self):
+        return f"{self.name} ({self.row_count} rows) by {self.created_by}"
+
+    @classmethod
+    def register(cls, upload, name, user):
+        """parses the uploaded csv once and registers it
+
+        Args:
+            upload (file): uploaded csv file
+            name (str): name of the dataset
+            user (User): user who uploaded the dataset
+
+        Returns:
+            Dataset: registered dataset
+        """
+        digest, schema = ingest(upload)
+
+        return cls.objects.create(
+            name        = name,
+            created_by  = user,
+            digest      = digest,
+            schema      = schema,
+            row_count   = schema["rows"],
+        )
+
+    def load(self):
+        """memory mapped columns of the dataset
+
+        Returns:
+            pd.DataFrame: dataset
+        """
+        return read_columnar(dataset_directory(self.digest))
+
+class TrainingJob(models.Model):
+    """Training Job model Schema
+
+        model_file(ModelFile) : model to be trained
+        submitted_by(user)    : user who submitted the job
+        dataset(file)         : uploaded training dataset, empty when options has a dataset_id
+        kind(str)             : train or hyperparameter search
+        options(dict)         : target, features, registered dataset_id and mode (full or incremental),
+                                strategy, param_grid, n_iter, cv and scoring of a search
+        status(str)           : queued, running, succeeded or failed
+        progress(float)       : fraction of the job done
+        heartbeat_on(DateTime): last time the worker running the job was seen alive
+        attempts(int)         : no of times the job was claimed by a worker
+        results(dict)         : best params, best score and results table of a search,
+                                recall report of a neighbour index built by the job,
+                                number of the model version the job stored
+    """
+    QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+    TRAIN, SEARCH = "train", "search"
+
+    kind_list = [
+        (TRAIN      , "Training"),
+        (SEARCH     , "Hyperparameter search"),
+    ]
+
+    status_list = [
+        (QUEUED     , "Queued"),
+        (RUNNING    , "Running"),
+        (SUCCEEDED  , "Succeeded"),
+        (FAILED     , "Failed"),
+    ]
+
+    model_file   = models.ForeignKey(ModelFile, on_delete = models.CASCADE, related_name = "training_jobs")
+    submitted_by = models.ForeignKey(User, on_delete = models.CASCADE, related_name = "training_jobs")
+    dataset      = models.FileField(upload_to = 'training_datasets', blank = True)
+    kind         = models.CharField(choices = kind_list, default = TRAIN, max_length = 10)
+    options      = models.JSONField(default = dict)
+    status       = models.CharField(choices = status_list, default = QUEUED, max_length = 10, db_index = True)
+    progress     = models.FloatField(default = 0)
+    results      = models.JSONField(default = dict, blank = True)
+    error        = models.TextField(blank = True, default = "")
+    created_on   = models.DateTimeField(default = timezone.now)
+    started_on   = models.DateTimeField(null = True, blank = True)
+    heartbeat_on = models.DateTimeField(null = True, blank = True)
+    attempts     = models.PositiveSmallIntegerField(default = 0)
+    finished_on  = models.DateTimeField(null = True, blank = True)
+
+    def __str__(self):
+        return f"{self.model_file.project_name} training job {self.pk} - {self.status}"
+
+    def set_progress(self, progress, **fields):
+        """stores progress of the job without touching the other columns
+
+        Args:
+            progress (float): fraction of the job done
+        """
+        self.progress = progress
+        for field, value in fields.items():
+            setattr(self, field, value)
+
+        TrainingJob.objects.filter(pk = self.pk).update(progress = progress, **fields)
+
+    def run(self):
+        """trains or searches the model of the job on its dataset, the job must already be claimed"""
+        try:
+            if self.options.get("dataset_id"):
+                train_set = self.model_file.get_data({
+                    **self.options,
+                    "data_type" : "dataset",
+                    "dataset"   : Dataset.objects.get(pk = self.options["dataset_id"]),
+                })
+            else:
+                with self.dataset.open('rb') as dataset:
+                    train_set = self.model_file.get_data({
+                        **self.options,
+                        "data_type" : "csv",
+                        "dataset"   : dataset,
+                    })
+            self.set_progress(0.25)
+
+            progress = lambda done: self.set_progress(0.25 + 0.7 * done)
+            results  = {}
+
+            if self.kind == TrainingJob.SEARCH:
+                results = self.model_file.search(train_set, self.options, progress)
+            else:
+                results = self.model_file.train(
+                    train_set,
+                    incremental = self.options.get("mode") == "incremental",
+                    progress    = progress,
+                )
+
+            results["version"] = self.model_file.version.number
+            self.set_progress(1, status = TrainingJob.SUCCEEDED, results = results, finished_on = timezone.now())
+        except Exception as e:
+            self.set_progress(self.progress, status = TrainingJob.FAILED, error = str(e), finished_on = timezone.now())
+        finally:
+            if self.dataset:
+                self.dataset.delete(save = False)
+                TrainingJob.objects.filter(pk = self.pk).update(dataset = "")
+
+    @classmethod
+    def claim_next(cls):
+        """marks the oldest queued job as running, safe against concurrent workers
+
+        Returns:
+            TrainingJob: claimed job or None if queue is empty
+        """
+        while True:
+            job = cls.objects.filter(status = cls.QUEUED).order_by('created_on').first()
+
+            if job is None:
+                return None
+
+            started_on = timezone.now()
+            claimed    = cls.objects.filter(pk = job.pk, status = cls.QUEUED).update(
+                            status = cls.RUNNING,
+                            started_on = started_on,
+                            heartbeat_on = started_on,
+                            attempts = models.F('attempts') + 1,
+                        )
+
+            if claimed:
+                job.refresh_from_db()
+                return job
+
+    @classmethod
+    def heartbeat(cls, job_ids):
+        """marks the running jobs of a worker as alive"""
+        cls.objects.filter(pk__in = job_ids, status = cls.RUNNING).update(heartbeat_on = timezone.now())
+
+    @classmethod
+    def reclaim_stale(cls):
+        """queues again the running jobs of workers that stopped sending heartbeats
+
+            a job whose worker died TRAINING_MAX_ATTEMPTS times is marked failed
+
+        Returns:
+            int: no of jobs queued again or failed
+        """
+        stale = cls.objects.filter(
+                    status = cls.RUNNING,
+                    heartbeat_on__lt = timezone.now() - timedelta(seconds = settings.TRAINING_HEARTBEAT_TIMEOUT),
+                )
+
+        failed  = stale.filter(attempts__gte = settings.TRAINING_MAX_ATTEMPTS).update(
+                    status = cls.FAILED,
+                    error = "the training worker stopped responding",
+                    finished_on = timezone.now(),
+                )
+        queued  = stale.update(status = cls.QUEUED, progress = 0, started_on = None, heartbeat_on = None)
+
+        return failed + queued
@@ -0,0 +1,13 @@
+from django.conf                    import settings
+
+from rest_framework.pagination      import CursorPagination
+
+
+class ModelFileCursorPagination(CursorPagination):
+    """
+        Cursor pages of model files, newest first, backed by the (is_public, created_on) index
+    """
+    ordering                = ('-created_on', '-id')
+    page_size               = settings.MODEL_FILES_PAGE_SIZE
+    page_size_query_param   = 'page_size'
+    max_page_size           = settings.MODEL_FILES_MAX_PAGE_SIZE
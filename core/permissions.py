@@ -1,4 +1,7 @@
 from rest_framework.permissions     import BasePermission
+from django.conf                    import settings
+
+import hmac
 
 class IsModelEdit(BasePermission):
     """Permssion to requested is user manager"""
@@ -6,4 +9,18 @@ class IsModelEdit(BasePermission):
     def has_permission(self, request, view):
         return bool(
             request.user and request.user.is_staff
-        )
\ No newline at end of file
+        )
+
+class IsMetricsScraper(BasePermission):
+    """Permission to scrape the metrics, staff users or the METRICS['TOKEN'] bearer token"""
+
+    def has_permission(self, request, view):
+        token = settings.METRICS['TOKEN']
+        auth  = request.META.get("HTTP_AUTHORIZATION", "").split()
+
+        if token and len(auth) == 2 and auth[0] == "Bearer" and hmac.compare_digest(auth[1].encode(), token.encode()):
+            return True
+
+        return bool(
+            request.user and request.user.is_staff
+        )
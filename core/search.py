@@ -0,0 +1,213 @@
+from django.conf    import settings
+from django.db      import connections
+
+import os
+import tempfile
+import threading
+
+from .helper        import to_json
+
+
+strategies = ("grid", "random", "halving")
+
+# columns of cv_results_ kept in the results table of a search job
+RESULT_COLUMNS = ("mean_test_score", "std_test_score", "rank_test_score", "mean_fit_time", "mean_score_time", "iter", "n_resources")
+
+
+def get_search_class(strategy):
+    """sklearn search class of the strategy, successive halving drops the weak candidates early on a fraction of the rows
+
+    Args:
+        strategy (str): grid, random or halving
+
+    Returns:
+        class: search class
+    """
+    from sklearn.model_selection import GridSearchCV, RandomizedSearchCV
+    from sklearn.experimental    import enable_halving_search_cv  # noqa: F401
+    from sklearn.model_selection import HalvingGridSearchCV
+
+    return {"grid" : GridSearchCV, "random" : RandomizedSearchCV, "halving" : HalvingGridSearchCV}[strategy]
+
+
+class FitCounter:
+    """scorer counting the fits it scores, in a file shared with the worker processes of the search
+
+        every scored fit appends one byte to the file, the searching process
+        reads the count back as the size of the file
+    """
+
+    def __init__(self, scorer, path):
+        self.scorer = scorer
+        self.path   = path
+
+    def __call__(self, estimator, X, y, **kwargs):
+        score = self.scorer(estimator, X, y, **kwargs)
+
+        with open(self.path, "ab") as counter:
+            counter.write(b".")
+
+        return score
+
+    def count(self):
+        return os.path.getsize(self.path)
+
+
+def fraction_done(search, fits, n_candidates = None):
+    """fraction of a running search done, from the fits counted and the public attributes of the search
+
+        grid and random search fit every candidate on every split, successive
+        halving is at the share of max_resources_ its iterations reached, each
+        iteration interpolated by the fits of its candidates
+
+    Args:
+        search (BaseSearchCV): search being fitted
+        fits (int): no of fits scored so far
+        n_candidates (int, optional): no of candidates of a grid or random search. Defaults to None for halving.
+
+    Returns:
+        float: fraction of the search done
+    """
+    n_splits = getattr(search, "n_splits_", None)
+
+    if not n_splits:
+        return 0.0
+
+    if n_candidates is not None:
+        return min(fits / (n_candidates * n_splits), 1.0)
+
+    done = 0.0
+
+    # iterations started so far, the lists grow as the search goes on
+    iterations = zip(list(getattr(search, "n_candidates_", [])), list(getattr(search, "n_resources_", [])))
+
+    for candidates, resources in iterations:
+        share = min(fits / (candidates * n_splits), 1.0)
+        done  = done + (resources / search.max_resources_ - done) * share
+        fits -= candidates * n_splits
+
+        if fits <= 0:
+            break
+
+    return min(done, 1.0)
+
+
+def report_progress(done, progress, stopped, interval):
+    """calls progress with done() every interval until stopped, only when the search moved on
+
+    Args:
+        done (callable): fraction of the search done
+        progress (callable): called with the fraction of the search done
+        stopped (threading.Event): set once the search is fitted
+        interval (float): seconds between two reports
+    """
+    reported = 0.0
+
+    try:
+        while not stopped.wait(interval):
+            fraction = done()
+
+            if fraction > reported:
+                progress(fraction)
+                reported = fraction
+    finally:
+        # progress may have stored the fraction through the ORM of this thread
+        connections.close_all()
+
+
+def run_search(model, X, y, param_grid, strategy = "halving", n_iter = 10, cv = 5, scoring = None, n_jobs = 1, progress = None):
+    """searches the hyperparameters of the model, folds of the candidates are fitted in parallel
+
+    Args:
+        model (model object): estimator to be tuned
+        X (pd.DataFrame): features
+        y (pd.Series): target
+        param_grid (dict): parameter name to list of values
+        strategy (str, optional): grid, random or halving. Defaults to "halving".
+        n_iter (int, optional): no of candidates sampled by random search. Defaults to 10.
+        cv (int, optional): no of cross validation folds. Defaults to 5.
+        scoring (str, optional): sklearn scorer name, the estimator score when None. Defaults to None.
+        n_jobs (int, optional): no of processes fitting the folds. Defaults to 1.
+        progress (callable, optional): called with the fraction of the search done. Defaults to None.
+
+    Returns:
+        (model object, dict): best estimator refitted on the whole dataset and the search results
+    """
+    if strategy not in strategies:
+        raise ValueError(f"strategy must be one of {', '.join(strategies)}")
+
+    from sklearn.metrics         import check_scoring
+    from sklearn.model_selection import ParameterGrid, ParameterSampler
+
+    search_class = get_search_class(strategy)
+    handle, path = tempfile.mkstemp(prefix = "search-fits-")
+    os.close(handle)
+
+    # fits are counted by the scorer as they run in the worker processes, train scores are not kept
+    counter      = FitCounter(check_scoring(model, scoring), path)
+    params       = {"cv" : cv, "scoring" : counter, "n_jobs" : n_jobs, "refit" : True, "return_train_score" : False}
+
+    if strategy == "random":
+        search       = search_class(model, param_grid, n_iter = n_iter, random_state = 0, **params)
+        n_candidates = len(ParameterSampler(param_grid, n_iter, random_state = 0))
+    elif strategy == "halving":
+        search       = search_class(model, param_grid, random_state = 0, **params)
+        n_candidates = None
+    else:
+        search       = search_class(model, param_grid, **params)
+        n_candidates = len(ParameterGrid(param_grid))
+
+    stopped  = threading.Event()
+    reporter = threading.Thread(
+                target  = report_progress,
+                args    = (lambda: fraction_done(search, counter.count(), n_candidates), progress, stopped, settings.SEARCH_PROGRESS_INTERVAL),
+                daemon  = True,
+            )
+
+    if progress is not None:
+        reporter.start()
+
+    try:
+        search.fit(X, y)
+    finally:
+        stopped.set()
+
+        if reporter.is_alive():
+            reporter.join()
+
+        os.remove(path)
+
+    if progress is not None:
+        progress(1.0)
+
+    results = {
+        "strategy"      : strategy,
+        "best_params"   : to_json(search.best_params_),
+        "best_score"    : float(search.best_score_),
+        "table"         : results_table(search.cv_results_),
+    }
+
+    return search.best_estimator_, results
+
+
+def results_table(cv_results):
+    """one row per evaluated candidate of cv_results_, ordered by rank
+
+    Args:
+        cv_results (dict): cv_results_ of a fitted search
+
+    Returns:
+        list: rows with the params and scores of each candidate
+    """
+    rows = []
+
+    for i, params in enumerate(cv_results["params"]):
+        row = {"params" : to_json(params)}
+
+        for column in RESULT_COLUMNS:
+            if column in cv_results:
+                row[column] = to_json(cv_results[column][i])
+
+        rows.append(row)
+
+    return sorted(rows, key = lambda row: (row.get("rank_test_score", 0), -row.get("iter", 0)))
@@ -0,0 +1,208 @@
+import hashlib
+import io
+import json
+import logging
+import pickle
+import struct
+
+from importlib.metadata import version
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Model file layout
+#
+#     payload | header json | header length (4 bytes, big endian) | MAGIC
+#
+# payload is a joblib dump of the estimator, so an uncompressed file can be
+# given to joblib.load(path, mmap_mode = 'r') as it is, the trailer is never
+# reached by the unpickler. Files without the trailer are legacy pickles.
+
+MAGIC           = b"INSIGHT\x01"
+FORMAT_VERSION  = 1
+TRAILER_SIZE    = len(MAGIC) + 4
+
+JOBLIB_COMPRESSORS = ("zlib", "gzip", "bz2", "lzma", "xz", "lz4")
+
+
+class ModelFormatError(ValueError):
+    """raised when a model file is corrupted or written by an unsupported format"""
+
+
+_warned_versions = set()
+
+
+def dumps(model, compress = None, level = None):
+    """serializes the model with its header
+
+    Args:
+        model (model object): estimator to be serialized
+        compress (str, optional): compression method. Defaults to MODEL_SERIALIZATION setting.
+        level (int, optional): compression level. Defaults to MODEL_SERIALIZATION setting.
+
+    Returns:
+        bytes: content of the model file
+    """
+    config   = getattr(settings, 'MODEL_SERIALIZATION', {})
+    compress = compress if compress is not None else config.get('COMPRESS')
+    level    = level if level is not None else config.get('COMPRESS_LEVEL', 3)
+
+    import joblib
+
+    buffer = io.BytesIO()
+
+    if compress in JOBLIB_COMPRESSORS:
+        joblib.dump(model, buffer, compress = (compress, level))
+    else:
+        joblib.dump(model, buffer)
+
+    payload = buffer.getvalue()
+
+    if compress == "zstd":
+        payload = _zstd().ZstdCompressor(level = level).compress(payload)
+
+    header = json.dumps({
+        "format"    : FORMAT_VERSION,
+        "sklearn"   : version("scikit-learn"),
+        "compress"  : compress or None,
+        "size"      : len(payload),
+        "sha256"    : hashlib.sha256(payload).hexdigest(),
+    }).encode()
+
+    return payload + header + struct.pack(">I", len(header)) + MAGIC
+
+
+def loads(content, verify = True):
+    """deserializes a model file, legacy pickle files are read as they are
+
+    Args:
+        content (bytes): content of the model file
+        verify (bool, optional): check the payload checksum. Defaults to True.
+
+    Returns:
+        model object: estimator
+    """
+    import joblib
+
+    header = read_header(content)
+
+    if header is None:
+        return pickle.loads(content)
+
+    payload = memoryview(content)[:header["size"]]
+
+    if verify and hashlib.sha256(payload).hexdigest() != header["sha256"]:
+        raise ModelFormatError("model file checksum mismatch")
+
+    if header["compress"] == "zstd":
+        payload = _zstd().ZstdDecompressor().decompress(payload)
+
+    check_sklearn_version(header)
+
+    return joblib.load(io.BytesIO(payload))
+
+
+def load_path(path, mmap_mode = None):
+    """deserializes a model file from the local file system
+
+        uncompressed model files are memory mapped when mmap_mode is given,
+        the numpy arrays of the estimator then stay in the page cache
+
+    Args:
+        path (str): path of the model file
+        mmap_mode (str, optional): numpy memmap mode like 'r'. Defaults to None.
+
+    Returns:
+        model object: estimator
+    """
+    import joblib
+
+    with open(path, 'rb') as model_file:
+        header = read_header(model_file)
+
+        if header is None or header["compress"] or mmap_mode is None:
+            model_file.seek(0)
+            return loads(model_file.read())
+
+    check_sklearn_version(header)
+
+    return joblib.load(path, mmap_mode = mmap_mode)
+
+
+def read_header(source):
+    """reads the header of a model file
+
+    Args:
+        source (bytes | file): content of the model file or seekable file object
+
+    Returns:
+        dict: header, None for legacy pickle files
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        trailer = bytes(source[-TRAILER_SIZE:])
+    else:
+        source.seek(0, io.SEEK_END)
+        end = source.tell()
+
+        if end < TRAILER_SIZE:
+            return None
+
+        source.seek(end - TRAILER_SIZE)
+        trailer = source.read(TRAILER_SIZE)
+
+    if len(trailer) < TRAILER_SIZE or trailer[4:] != MAGIC:
+        return None
+
+    header_size = struct.unpack(">I", trailer[:4])[0]
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        header = bytes(source[-TRAILER_SIZE - header_size:-TRAILER_SIZE])
+    else:
+        source.seek(end - TRAILER_SIZE - header_size)
+        header = source.read(header_size)
+
+    header = json.loads(header)
+
+    if header.get("format", 0) > FORMAT_VERSION:
+        raise ModelFormatError(f"model file format {header['format']} is not supported")
+
+    return header
+
+
+def check_sklearn_version(header):
+    """warns once per version when the model file was written by another scikit-learn
+
+        sklearn does not guarantee that estimators pickled by one version
+        predict the same, or load at all, with another one
+
+    Args:
+        header (dict): header of the model file
+
+    Returns:
+        bool: True when the versions match
+    """
+    stored    = header.get("sklearn")
+    installed = version("scikit-learn")
+
+    if stored is None or stored == installed:
+        return True
+
+    if stored not in _warned_versions:
+        _warned_versions.add(stored)
+        logger.warning(
+            "model file written by scikit-learn %s is loaded with scikit-learn %s, retrain the model if its predictions change",
+            stored, installed,
+        )
+
+    return False
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise ModelFormatError("zstd compressed models need the zstandard package")
+
+    return zstandard
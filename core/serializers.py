@@ -1,5 +1,5 @@
 from rest_framework     import serializers
-from .models            import ModelFile, User
+from .models            import ModelFile, ModelVersion, User, TrainingJob, Dataset
 
 
 class ModelFileSerializer(serializers.ModelSerializer):
@@ -23,11 +23,69 @@ class ModelFileSerializer(serializers.ModelSerializer):
     def get_created_by_user(self, obj):
         return obj.created_by.username
     
+class TrainingJobSerializer(serializers.ModelSerializer):
+    """TrainingJob Model Serializer"""
+    project_name = serializers.CharField(source = 'model_file.project_name', read_only = True)
+
+    class Meta:
+        model = TrainingJob
+        fields = [
+            'id',
+            'project_name',
+            'kind',
+            'status',
+            'progress',
+            'results',
+            'error',
+            'created_on',
+            'started_on',
+            'heartbeat_on',
+            'attempts',
+            'finished_on',
+        ]
+
+class ModelVersionSerializer(serializers.ModelSerializer):
+    """ModelVersion Model Serializer"""
+    digest      = serializers.CharField(source = 'artifact.digest', read_only = True)
+    size        = serializers.IntegerField(source = 'artifact.size', read_only = True)
+    is_served   = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ModelVersion
+        fields = [
+            'number',
+            'source',
+            'digest',
+            'size',
+            'created_on',
+            'is_served',
+        ]
+
+    def get_is_served(self, obj):
+        # the views pass the served version, so listing versions does not read the model file per row
+        if "served_version_id" in self.context:
+            return self.context["served_version_id"] == obj.pk
+
+        return obj.model_file.version_id == obj.pk
+
+class DatasetSerializer(serializers.ModelSerializer):
+    """Dataset Model Serializer"""
+    class Meta:
+        model = Dataset
+        fields = [
+            'id',
+            'name',
+            'schema',
+            'row_count',
+            'created_on',
+        ]
+
 class UserSerializer(serializers.ModelSerializer):
     """User Model Serilizer"""
     class Meta:
         model = User
-        fields = "__all__"
+        # the API key is only shown by api/user/api_key, as a prefix, and only changed by generating a new one
+        exclude = ['api_key_hash', 'api_key_prefix']
 
 
     def create_user(self, data):
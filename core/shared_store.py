@@ -0,0 +1,162 @@
+import glob
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.conf        import settings
+
+from .helper            import lazy_import
+from .serialization     import dumps, load_path
+
+np = lazy_import("numpy")
+
+
+class SharedArrays:
+    """numpy arrays of an object exported to the shared model store, see SharedModelStore.load_arrays
+
+        ARRAYS names the attributes holding the arrays, an object built from
+        memory mapped arrays uses them as they are
+    """
+
+    ARRAYS = ()
+
+    def arrays(self):
+        """the arrays by name, as exported to the shared model store"""
+        return {name: getattr(self, name) for name in self.ARRAYS}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """object over arrays exported earlier"""
+        instance = cls.__new__(cls)
+
+        for name in cls.ARRAYS:
+            setattr(instance, name, arrays[name])
+
+        return instance
+
+
+class SharedModelStore:
+    """Read-only store of uncompressed model files memory mapped by every worker
+
+        The first worker that loads a model version exports it into the store
+        directory, every worker then loads it with mmap_mode = 'r' so the numpy
+        arrays of the estimator (SVM support vectors, KNN training data, linear
+        coefficients...) are backed by the same page cache pages instead of one
+        private copy per process. sklearn copies tree nodes into its own buffers
+        on load, so tree models only share their remaining arrays, the flat node
+        arrays of the compiled inference backend and the lists of IVF neighbour
+        indexes are exported as .npy files next to the model and shared as
+        well, see load_arrays.
+    """
+
+    def __init__(self, directory = None):
+        self._directory = directory
+
+    @property
+    def directory(self):
+        """store directory, SHARED_MODEL_STORE['DIRECTORY'] is read on every call unless one was given"""
+        if self._directory is not None:
+            return str(self._directory)
+
+        return str(settings.SHARED_MODEL_STORE.get('DIRECTORY', settings.BASE_DIR / 'caches' / 'models'))
+
+    def load(self, key, version, loader):
+        """loads the memory mapped model, exporting it first when missing
+
+        Args:
+            key (str): store key, usually the artifact digest
+            version (str): version token of the stored model
+            loader (callable): returns the model object when not exported yet
+
+        Returns:
+            (model object, int): memory mapped estimator and its file size
+        """
+        path = self.path(key, version)
+
+        if not os.path.exists(path):
+            self.publish(key, path, loader())
+
+        return load_path(path, mmap_mode = 'r'), os.path.getsize(path)
+
+    def load_arrays(self, key, version, build, name = "arrays"):
+        """loads memory mapped numpy arrays of key, exporting them first when missing
+
+        Args:
+            key (str): store key, usually the artifact digest
+            version (str): version token of the arrays
+            build (callable): returns the dict of array name to array when not exported yet
+            name (str, optional): kind of arrays, older versions of the same kind are removed. Defaults to "arrays".
+
+        Returns:
+            dict: array name to read-only memory mapped array
+        """
+        path = self.path(key, version, suffix = f".{name}")
+
+        if not os.path.isdir(path):
+            self.publish_arrays(key, path, build(), name)
+
+        return {
+            name[:-len(".npy")]: np.load(os.path.join(path, name), mmap_mode = 'r')
+            for name in os.listdir(path) if name.endswith(".npy")
+        }
+
+    def publish_arrays(self, key, path, arrays, name = "arrays"):
+        """writes one .npy file per array into a directory renamed into place at once"""
+        os.makedirs(self.directory, exist_ok = True)
+
+        tmp_path = tempfile.mkdtemp(dir = self.directory, suffix = ".tmp")
+
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_path, f"{name}.npy"), np.ascontiguousarray(array))
+
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            # published by another worker meanwhile
+            shutil.rmtree(tmp_path, ignore_errors = True)
+
+        for stale in glob.glob(self._pattern(key, f".{name}")):
+            if stale != path:
+                self._remove(stale)
+
+    def publish(self, key, path, model):
+        """writes the model file atomically and removes older versions of key"""
+        os.makedirs(self.directory, exist_ok = True)
+
+        fd, tmp_path = tempfile.mkstemp(dir = self.directory, suffix = ".tmp")
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(dumps(model, compress = ""))
+
+        os.replace(tmp_path, path)
+
+        for stale in glob.glob(self._pattern(key, ".model")):
+            if stale != path:
+                self._remove(stale)
+
+    def discard(self, key):
+        """removes every exported version of key"""
+        for stale in glob.glob(self._pattern(key)):
+            self._remove(stale)
+
+    def path(self, key, version, suffix = ".model"):
+        return os.path.join(self.directory, f"{self._digest(key)}-{self._digest(version)}{suffix}")
+
+    def _pattern(self, key, suffix = ""):
+        return os.path.join(self.directory, f"{self._digest(key)}-*{suffix}")
+
+    def _digest(self, value):
+        return hashlib.sha1(value.encode()).hexdigest()[:20]
+
+    def _remove(self, path):
+        # workers that mapped the file keep their pages until they drop the model
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+shared_store = SharedModelStore()
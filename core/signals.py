@@ -1,9 +1,17 @@
+from django.db                  import transaction
 from django.db.models.signals   import post_save, post_delete
 from django.dispatch            import receiver
-from django.core.cache          import cache
 
-from .models import ModelFile
-from .serializers import ModelFileSerializer
+import shutil
+
+from functools import partial
+
+from .models import ModelFile, ModelArtifact, ModelVersion, Dataset
+from .ann import index_name
+from .datasets import dataset_directory
+from .model_cache import model_cache
+from .shared_store import shared_store
+from .listing_cache import update_record, remove_record
 
 @receiver(post_save, sender=ModelFile)
 def model_files_update(sender, instance, **kwargs):
@@ -14,8 +22,8 @@ def model_files_update(sender, instance, **kwargs):
         instance (Model obj): instance of the model that triggered the signal
     """
 
-    cache.delete('model_files')
-    cache.set('model_files', ModelFileSerializer(ModelFile.objects.all(), many = True).data , 60*60*2)
+    # after the commit, a listing read meanwhile would cache the old rows under the new version
+    transaction.on_commit(partial(update_record, instance))
 
 @receiver(post_delete, sender=ModelFile)
 def model_files_delete(sender, instance, **kwargs):
@@ -26,6 +34,50 @@ def model_files_delete(sender, instance, **kwargs):
         instance (Model obj): instance of the model that triggered the signal
     """
 
-    instance.model_obj.delete(save=False)
-    cache.delete('model_files')
-    cache.set('model_files', ModelFile.objects.all(), 60*60*2)
+    transaction.on_commit(partial(remove_record, instance))
+
+@receiver(post_delete, sender=ModelVersion)
+def model_version_delete(sender, instance, **kwargs):
+    """releases the artifact of a pruned or deleted model version
+
+    Args:
+        sender (Model): name of the model that triggered the signal
+        instance (Model obj): instance of the model that triggered the signal
+    """
+
+    ModelArtifact.release(instance.artifact_id)
+
+@receiver(post_delete, sender=ModelArtifact)
+def model_artifact_delete(sender, instance, **kwargs):
+    """removes the files of an artifact no model refers to anymore, once the deletion is committed
+
+    Args:
+        sender (Model): name of the model that triggered the signal
+        instance (Model obj): instance of the model that triggered the signal
+    """
+
+    def remove_files():
+        # the same content stored again meanwhile gets new file names while these exist,
+        # the files are kept if it already took these names, its digest keeps the cached model
+        current = ModelArtifact.objects.filter(digest = instance.digest).values_list('file', flat = True).first()
+
+        if current != instance.file.name:
+            ModelArtifact.remove_files(instance.file.storage, [instance.file.name, index_name(instance.file.name)])
+
+        if current is None:
+            model_cache.invalidate(instance.digest)
+            shared_store.discard(instance.digest)
+
+    transaction.on_commit(remove_files)
+
+@receiver(post_delete, sender=Dataset)
+def dataset_delete(sender, instance, **kwargs):
+    """removes the columnar files of the deleted dataset unless an identical upload still uses them
+
+    Args:
+        sender (Model): name of the model that triggered the signal
+        instance (Model obj): instance of the model that triggered the signal
+    """
+
+    if not Dataset.objects.filter(digest = instance.digest).exists():
+        shutil.rmtree(dataset_directory(instance.digest), ignore_errors = True)
@@ -0,0 +1,32 @@
+import shutil
+import tempfile
+
+from django.conf            import settings
+from django.test            import override_settings
+from django.test.runner     import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """Runs the tests with every file they write kept out of the repository
+
+        the file based cache, the shared model store, the dataset cache and
+        the media root point into a throwaway directory removed after the run
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+
+        self.directory = tempfile.mkdtemp(prefix = "insight-tests-")
+        self.settings  = override_settings(
+            CACHES              = {'default': {**settings.CACHES['default'], 'LOCATION': f"{self.directory}/cache"}},
+            SHARED_MODEL_STORE  = {**settings.SHARED_MODEL_STORE, 'DIRECTORY': f"{self.directory}/models"},
+            DATASET_CACHE       = {**settings.DATASET_CACHE, 'DIRECTORY': f"{self.directory}/datasets"},
+            MEDIA_ROOT          = f"{self.directory}/media",
+        )
+        self.settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.settings.disable()
+        shutil.rmtree(self.directory, ignore_errors = True)
+
+        super().teardown_test_environment(**kwargs)
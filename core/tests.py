@@ -1,3 +1,1535 @@
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.core.files.uploadedfile import SimpleUploadedFile
 
-# Create your tests here.
+import os
+import tempfile
+import threading
+
+from unittest               import mock, addModuleCleanup
+from datetime               import timedelta
+
+from django.conf            import settings
+from django.core.cache      import cache
+from django.utils           import timezone
+
+import numpy as np
+import pandas as pd
+
+from sklearn.datasets       import make_classification
+from sklearn.ensemble       import RandomForestClassifier, ExtraTreesClassifier
+from sklearn.linear_model   import LogisticRegression, SGDClassifier
+from sklearn.naive_bayes    import GaussianNB
+from sklearn.neighbors      import KNeighborsClassifier
+from sklearn.tree           import DecisionTreeClassifier
+
+from .inference             import CompiledModel, apply_backend, compile_model, float_features
+from .ann                   import ANNClassifier, IVFIndex, recall_report, shared_index
+from .models                import ModelArtifact, ModelFile, ModelNotStoredError, TrainingJob, User
+from .serialization         import dumps, loads, load_path, read_header
+from .datasets              import dataset_directory, ingest, load_dataset, upload_directory
+from .authenicators         import APIKeyCache, hash_api_key
+from .usage                 import PredictionCounter
+from .batching              import PredictionBatcher
+from .model_cache           import ModelCache
+from .metrics               import Registry, UNKNOWN
+from .evaluation            import class_metrics, confusion_matrix, evaluate, plots, render_plot
+from .helper                import LazyThread
+from .                      import cpu
+
+
+
+def setUpModule():
+    # predictions made by the view tests are not counted, a periodic flush would write them during any later test
+    from .usage import prediction_counter
+
+    patcher = mock.patch.object(prediction_counter, "add")
+    patcher.start()
+    addModuleCleanup(patcher.stop)
+
+def tearDownModule():
+    from .usage import prediction_counter
+
+    prediction_counter.stop(flush = False)
+
+class CompiledInferenceParityTest(SimpleTestCase):
+    """compiled tree models must predict exactly what sklearn predicts"""
+
+    def setUp(self):
+        X, y = make_classification(n_samples = 2000, n_features = 12, n_informative = 8, n_classes = 4, random_state = 0)
+
+        self.X = pd.DataFrame(X, columns = [f"f{i}" for i in range(X.shape[1])])
+        self.y = y
+
+    def assertParity(self, model, X):
+        compiled = compile_model(model)
+
+        self.assertIsInstance(compiled, CompiledModel)
+        np.testing.assert_array_equal(compiled.predict(X), model.predict(X))
+        np.testing.assert_allclose(compiled.predict_proba(X), model.predict_proba(X), rtol = 1e-12, atol = 1e-12)
+
+    def test_decision_tree(self):
+        model = DecisionTreeClassifier(random_state = 0).fit(self.X, self.y)
+
+        self.assertParity(model, self.X)
+
+    def test_random_forest(self):
+        model = RandomForestClassifier(n_estimators = 25, random_state = 0).fit(self.X, self.y)
+
+        self.assertParity(model, self.X)
+
+    def test_arrays_shared_through_the_store(self):
+        from .shared_store import SharedModelStore
+
+        model = RandomForestClassifier(n_estimators = 5, random_state = 0).fit(self.X, self.y)
+
+        with tempfile.TemporaryDirectory() as directory:
+            store  = SharedModelStore(directory)
+            builds = []
+
+            def shared(build):
+                return store.load_arrays("digest", "compiled-1", lambda: builds.append(1) or build())
+
+            compiled = compile_model(model, shared = shared)
+            again    = compile_model(model, shared = shared)
+
+            self.assertEqual(len(builds), 1)
+            self.assertIsInstance(again.trees.value, np.memmap)
+            np.testing.assert_allclose(again.predict_proba(self.X), model.predict_proba(self.X), rtol = 1e-12, atol = 1e-12)
+            np.testing.assert_array_equal(compiled.predict(self.X), model.predict(self.X))
+
+            store.discard("digest")
+            self.assertEqual(os.listdir(directory), [])
+
+    def test_extra_trees_shallow(self):
+        model = ExtraTreesClassifier(n_estimators = 10, max_depth = 3, random_state = 0).fit(self.X, self.y)
+
+        self.assertParity(model, self.X)
+
+    def test_single_row(self):
+        model = RandomForestClassifier(n_estimators = 10, random_state = 0).fit(self.X, self.y)
+
+        self.assertParity(model, self.X.iloc[:1])
+
+    def test_numpy_input_and_string_labels(self):
+        labels = np.array(["a", "b", "c", "d"])[self.y]
+        model  = RandomForestClassifier(n_estimators = 10, random_state = 0).fit(self.X.to_numpy(), labels)
+
+        self.assertParity(model, self.X.to_numpy())
+
+    def test_float32_thresholds(self):
+        # sklearn compares float32 features with float64 thresholds, values on the threshold must match
+        model = DecisionTreeClassifier(random_state = 0).fit(self.X, self.y)
+        X     = self.X.astype(np.float32)
+
+        X.iloc[:, model.tree_.feature[0]] = np.float32(model.tree_.threshold[0])
+        self.assertParity(model, X)
+
+    def test_missing_values(self):
+        X = self.X.copy()
+        X.iloc[::7, 0] = np.nan
+
+        model = DecisionTreeClassifier(random_state = 0).fit(X, self.y)
+
+        self.assertParity(model, X)
+
+    def test_large_batches_go_to_sklearn(self):
+        model    = DecisionTreeClassifier(random_state = 0).fit(self.X, self.y)
+        compiled = compile_model(model, max_rows = 10)
+
+        self.assertIsNotNone(compiled.features(self.X.iloc[:10]))
+        self.assertIsNone(compiled.features(self.X.iloc[:11]))
+        np.testing.assert_array_equal(compiled.predict(self.X), model.predict(self.X))
+
+    def test_mismatched_columns_fall_back_to_sklearn(self):
+        model    = DecisionTreeClassifier(random_state = 0).fit(self.X, self.y)
+        compiled = compile_model(model)
+
+        with self.assertRaises(ValueError):
+            compiled.predict(self.X.iloc[:, ::-1])
+
+    def test_unsupported_models_are_served_by_sklearn(self):
+        model = LogisticRegression().fit(self.X, self.y)
+
+        self.assertIs(apply_backend(model, "compiled"), model)
+        self.assertIs(apply_backend(model, "sklearn"), model)
+
+    def test_unfitted_models_are_not_compiled(self):
+        model = DecisionTreeClassifier()
+
+        self.assertIs(compile_model(model), model)
+
+
+class IVFIndexTest(SimpleTestCase):
+    """probing every list of the index must find the exact neighbours"""
+
+    def setUp(self):
+        X, y = make_classification(n_samples = 3000, n_features = 8, n_informative = 6, n_classes = 3, random_state = 0)
+
+        self.X = X
+        self.model = KNeighborsClassifier(n_neighbors = 7, weights = "distance").fit(X, y)
+        self.index = IVFIndex(self.model._fit_X, n_lists = 20)
+
+    def test_exhaustive_probe_matches_exact_search(self):
+        with override_settings(KNN_ANN = {'N_PROBE' : 20}):
+            ann = ANNClassifier(self.model, self.index)
+
+            np.testing.assert_array_equal(ann.kneighbors(self.X[:200])[1], self.model.kneighbors(self.X[:200])[1])
+            np.testing.assert_array_equal(ann.predict(self.X), self.model.predict(self.X))
+
+    def test_recall_report(self):
+        with override_settings(KNN_ANN = {'N_PROBE' : 4}):
+            report = recall_report(self.model, self.index, queries = 200)
+
+        self.assertGreater(report["recall_at_k"], 0.8)
+        self.assertEqual(report["queries"], 200)
+
+    def test_lists_shared_through_the_store(self):
+        from .shared_store import SharedModelStore
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(KNN_ANN = {'N_PROBE' : 4}):
+            store = SharedModelStore(directory)
+            reads = []
+
+            def shared(build):
+                return store.load_arrays("digest", "ivf-1", build, name = "index")
+
+            def read():
+                reads.append(1)
+                return loads(dumps(self.index))
+
+            # compiled arrays of the same key are kept next to the index
+            store.load_arrays("digest", "compiled-1", lambda: {"value": np.zeros(3)}, name = "compiled")
+
+            shared_index(read, shared)
+            index = shared_index(read, shared)
+
+            self.assertEqual(len(reads), 1)
+            self.assertIsInstance(index.vectors, np.memmap)
+            self.assertEqual(len(os.listdir(directory)), 2)
+
+            for expected, actual in zip(self.index.query(self.X[:50], 7), index.query(self.X[:50], 7)):
+                np.testing.assert_array_equal(expected, actual)
+
+    def test_index_without_arrays_is_read_every_time(self):
+        from .shared_store import SharedModelStore
+
+        graph = object()
+        reads = []
+
+        with tempfile.TemporaryDirectory() as directory:
+            store  = SharedModelStore(directory)
+            shared = lambda build: store.load_arrays("digest", "ivf-1", build, name = "index")
+
+            for _ in range(2):
+                self.assertIs(shared_index(lambda: reads.append(1) or graph, shared), graph)
+
+        self.assertEqual(len(reads), 2)
+
+    def test_features_shared_with_the_compiled_model(self):
+        self.assertEqual(float_features(self.model, self.X[:3]).dtype, np.float32)
+        self.assertIsNone(float_features(self.model, self.X[:3, :4]))
+        self.assertIsNone(float_features(self.model, [["a"] * 8]))
+
+
+class ModelArtifactTest(TestCase):
+    """identical models share one artifact, deleted with the last version using it"""
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT = media.name))
+
+        self.user = User.objects.create_user(username = "owner", password = "secret", mobile_number = "1")
+
+    def create(self, project_name):
+        record = ModelFile.objects.create(project_name = project_name, model_name = "Gaussian Naive Bayes Classifier", created_by = self.user)
+        record.add_model_obj({}, self.user)
+
+        return record
+
+    def test_identical_models_share_an_artifact(self):
+        first, second = self.create("first"), self.create("second")
+
+        self.assertEqual(first.version.artifact_id, second.version.artifact_id)
+        self.assertEqual(ModelArtifact.objects.get().ref_count, 2)
+        self.assertIs(first.load_model(), second.load_model())
+
+    def test_artifact_is_deleted_with_its_last_reference(self):
+        first, second = self.create("first"), self.create("second")
+        storage, name = first.model_obj.storage, first.model_obj.name
+
+        with self.captureOnCommitCallbacks(execute = True):
+            first.delete()
+
+        self.assertEqual(ModelArtifact.objects.get().ref_count, 1)
+        self.assertTrue(storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute = True):
+            second.delete()
+
+        self.assertFalse(ModelArtifact.objects.exists())
+        self.assertFalse(storage.exists(name))
+
+    def test_pruned_versions_release_their_artifacts(self):
+        record = self.create("first")
+        first  = record.version.artifact
+
+        with override_settings(MODEL_VERSIONS = {'KEEP' : 2}), self.captureOnCommitCallbacks(execute = True):
+            record.replace_model_obj(b"trained once")
+            self.assertTrue(ModelArtifact.objects.filter(pk = first.pk).exists())
+
+            record.replace_model_obj(b"trained twice")
+
+        self.assertEqual(list(record.versions.order_by('number').values_list('number', flat = True)), [2, 3])
+        self.assertFalse(ModelArtifact.objects.filter(pk = first.pk).exists())
+        self.assertFalse(first.file.storage.exists(first.file.name))
+
+    def test_deleted_artifact_stored_again_before_its_files_are_removed(self):
+        record = self.create("first")
+
+        for keep_name in (False, True):
+            with self.subTest(keep_name = keep_name):
+                content = f"trained model {keep_name}".encode()
+                old     = record.replace_model_obj(content).artifact
+                storage = old.file.storage
+
+                with self.captureOnCommitCallbacks() as callbacks:
+                    record.versions.filter(artifact = old).delete()
+
+                if keep_name:
+                    # removed already, the new artifact takes the same name
+                    storage.delete(old.file.name)
+
+                artifact = ModelArtifact.acquire(content)
+
+                for callback in callbacks:
+                    callback()
+
+                self.assertEqual(artifact.digest, old.digest)
+                self.assertEqual(artifact.file.name == old.file.name, keep_name)
+                self.assertTrue(storage.exists(artifact.file.name))
+                self.assertEqual(storage.exists(old.file.name), keep_name)
+
+    def test_files_of_a_rolled_back_version_are_removed(self):
+        import hashlib
+
+        record  = self.create("first")
+        storage = record.model_obj.storage
+        before  = set(storage.listdir("artifacts")[1])
+
+        with mock.patch.object(ModelFile, "promote", side_effect = RuntimeError("promote failed")):
+            with self.assertRaises(RuntimeError):
+                record.replace_model_obj(b"rolled back", index = IVFIndex(np.eye(4), n_lists = 1))
+
+        self.assertFalse(ModelArtifact.objects.filter(digest = hashlib.sha256(b"rolled back").hexdigest()).exists())
+        self.assertEqual(set(storage.listdir("artifacts")[1]), before)
+
+    def test_rollback_serves_a_stored_version(self):
+        record = self.create("first")
+        record.replace_model_obj(b"trained model")
+
+        self.assertEqual(record.rollback().number, 1)
+        self.assertEqual(ModelFile.objects.get(pk = record.pk).version.number, 1)
+        self.assertEqual(record.rollback(2).number, 2)
+        self.assertEqual(record.model_obj.name, record.version.artifact.file.name)
+
+        with self.assertRaises(ValueError):
+            record.rollback(7)
+
+
+class APIKeyCacheTest(TestCase):
+    """API keys are looked up by hash, unknown keys are cached shortly, revoked keys expire"""
+
+    def setUp(self):
+        self.user  = User.objects.create_user(username = "owner", password = "secret", mobile_number = "1")
+        self.key   = self.user.generate_api_key()
+        self.cache = APIKeyCache(ttl = 60, negative_ttl = 10)
+
+        clock = mock.patch("core.authenicators.time.monotonic", return_value = 1000.0)
+        self.clock = clock.start()
+        self.addCleanup(clock.stop)
+
+    def test_key_is_resolved_by_its_hash(self):
+        self.assertEqual(self.user.api_key_hash, hash_api_key(self.key))
+        self.assertNotIn(self.key, {self.user.api_key_hash, self.user.api_key_prefix})
+
+        self.assertEqual(self.cache.resolve(self.key), self.user)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.cache.resolve(self.key), self.user)
+
+    def test_unknown_key_is_cached_until_the_negative_ttl(self):
+        self.assertIsNone(self.cache.resolve("unknown"))
+
+        User.objects.filter(pk = self.user.pk).update(api_key_hash = hash_api_key("unknown"))
+
+        with self.assertNumQueries(0):
+            self.assertIsNone(self.cache.resolve("unknown"))
+
+        self.clock.return_value += 11
+        self.assertEqual(self.cache.resolve("unknown"), self.user)
+
+    def test_revoked_key_expires_after_the_ttl(self):
+        self.assertEqual(self.cache.resolve(self.key), self.user)
+
+        # regenerated by another worker, this cache is not invalidated
+        User.objects.filter(pk = self.user.pk).update(api_key_hash = hash_api_key("new key"))
+
+        self.clock.return_value += 59
+        self.assertEqual(self.cache.resolve(self.key), self.user)
+
+        self.clock.return_value += 2
+        self.assertIsNone(self.cache.resolve(self.key))
+
+    def test_api_key_is_not_serialized(self):
+        response = self.client.post("/api/login", {"username": "owner", "password": "secret"})
+
+        self.assertEqual(response.status_code, 200)
+
+        for data in (response.json(), self.client.get("/api/user").json()):
+            self.assertNotIn("api_key_hash", data)
+            self.assertNotIn("api_key_prefix", data)
+
+        response = self.client.put(
+            "/api/user",
+            {"username": "owner", "password": "secret", "mobile_number": "1", "api_key_hash": "forged", "api_key_prefix": "forged"},
+            content_type = "application/json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.api_key_hash, hash_api_key(self.key))
+        self.assertEqual(self.user.api_key_prefix, self.key[:6])
+
+    def test_api_key_only_authenticates_predictions(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+
+        with override_settings(MEDIA_ROOT = media.name):
+            record = ModelFile.objects.create(project_name = "owned", model_name = "Gaussian Naive Bayes Classifier", created_by = self.user)
+            record.add_model_obj({}, self.user)
+
+            for method in (self.client.delete, self.client.put, self.client.patch):
+                response = method("/api/model/owned", HTTP_X_API_KEY = self.key)
+
+                self.assertEqual(response.status_code, 401, method)
+
+        self.assertTrue(ModelFile.objects.filter(project_name = "owned").exists())
+
+
+class PredictionCounterTest(TestCase):
+    """predictions are counted in memory and written in one update per model"""
+
+    def test_counts_are_written_on_flush(self):
+        user    = User.objects.create_user(username = "owner", password = "secret", mobile_number = "1")
+        record  = ModelFile.objects.create(project_name = "counted", model_name = "Gaussian Naive Bayes Classifier", created_by = user)
+        counter = PredictionCounter(interval = 3600, flush_at_exit = False)
+        self.addCleanup(counter.stop, flush = False)
+
+        with self.assertNumQueries(0):
+            for _ in range(3):
+                counter.add(record.pk)
+
+        self.assertEqual(counter.pending(), {record.pk : 3})
+
+        with self.assertNumQueries(1):
+            counter.flush()
+
+        self.assertEqual(ModelFile.objects.get(pk = record.pk).prediction_count, 3)
+        self.assertEqual(counter.pending(), {})
+
+    def test_stop_ends_the_thread(self):
+        counter = PredictionCounter(interval = 3600, flush_at_exit = False)
+        counter.add(1)
+        thread  = counter._thread.thread
+
+        counter.stop(flush = False)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(counter.pending(), {})
+
+        counter.add(1)
+        self.assertTrue(counter._thread.thread.is_alive())
+        counter.stop(flush = False)
+
+    def test_global_counter_does_not_flush_at_exit_under_tests(self):
+        from .usage import prediction_counter
+
+        self.assertFalse(prediction_counter.flush_at_exit)
+
+
+class LazyThreadTest(SimpleTestCase):
+    """background workers start one thread per process, on first use"""
+
+    def test_started_once_per_process(self):
+        stopped = threading.Event()
+        self.addCleanup(stopped.set)
+
+        worker = LazyThread(stopped.wait, "worker")
+
+        self.assertIsNone(worker.thread)
+        self.assertTrue(worker.start())
+        self.assertFalse(worker.start())
+
+        # a forked child inherits the attribute but not the running thread
+        inherited = worker.thread
+
+        with mock.patch("core.helper.os.getpid", return_value = os.getpid() + 1):
+            self.assertTrue(worker.start())
+
+        self.assertIsNot(worker.thread, inherited)
+        self.assertEqual(worker.thread.name, "worker")
+
+    def test_detached_thread_is_started_again(self):
+        stopped = threading.Event()
+        self.addCleanup(stopped.set)
+
+        worker = LazyThread(stopped.wait, "worker")
+        worker.start()
+        thread = worker.detach()
+
+        self.assertIsNone(worker.thread)
+        self.assertTrue(worker.start())
+        self.assertIsNot(worker.thread, thread)
+
+class WarmUpTest(TestCase):
+    """pinned and most predicted models with a stored version are preloaded"""
+
+    def setUp(self):
+        from .model_cache import model_cache
+
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT = media.name))
+        self.addCleanup(model_cache.clear)
+
+        user = User.objects.create_user(username = "owner", password = "secret", mobile_number = "1")
+
+        def create(name, stored = True, **fields):
+            record = ModelFile.objects.create(project_name = name, model_name = "Gaussian Naive Bayes Classifier", created_by = user, **fields)
+
+            if stored:
+                record.replace_model_obj(dumps(GaussianNB().fit([[0.0], [1.0]], [0, 1])))
+
+            return record
+
+        create("pinned", is_pinned = True)
+        create("hot", prediction_count = 10)
+        create("cold", prediction_count = 1)
+        create("unstored", stored = False, is_pinned = True, prediction_count = 100)
+
+    def test_hot_models(self):
+        from .warmup import hot_models
+
+        with self.assertNumQueries(2):
+            records = hot_models(top_n = 1)
+
+            self.assertEqual([record.project_name for record in records], ["pinned", "hot"])
+            self.assertTrue(all(record.version.artifact.digest for record in records))
+
+    def test_warm_up_and_readiness(self):
+        from .warmup import state, warm_up
+
+        self.addCleanup(state.update, {**state})
+        state.update(ready = False)
+
+        self.assertEqual(self.client.get("/api/ready").status_code, 503)
+
+        result = warm_up(top_n = 5)
+
+        self.assertEqual(sorted(result["loaded"]), ["cold", "hot", "pinned"])
+        self.assertEqual(result["failed"], [])
+
+        response = self.client.get("/api/ready")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["loaded"], 3)
+
+    def test_failed_loads_are_reported(self):
+        from .warmup import warm_up
+
+        with mock.patch.object(ModelFile, "load_model", side_effect = OSError("missing file")):
+            with self.assertLogs("core.warmup", level = "WARNING"):
+                result = warm_up(top_n = 0)
+
+        self.assertEqual(result["failed"], ["pinned"])
+        self.assertTrue(result["ready"])
+
+
+class MetricsRegistryTest(SimpleTestCase):
+    """label sets of the histograms are bounded"""
+
+    def test_labels_set_inside_the_span(self):
+        registry = Registry()
+
+        with registry.span("prediction_stage", stage = "lookup", project = UNKNOWN) as labels:
+            labels["project"] = "found"
+
+        self.assertIn('project="found"', registry.render())
+        self.assertNotIn(UNKNOWN, registry.render())
+
+    def test_series_beyond_the_cap_share_an_overflow_histogram(self):
+        registry = Registry(max_series = 3)
+
+        for i in range(10):
+            registry.observe("prediction_stage", 0.01, project = f"p{i}")
+
+        text = registry.render()
+
+        self.assertEqual(text.count("_count{"), 4)
+        self.assertIn('insight_prediction_stage_seconds_count{series="overflow"} 7', text)
+
+
+class MetricsViewTest(TestCase):
+    """metrics carry project names, only staff users and the scraper token read them"""
+
+    def setUp(self):
+        from .metrics import metrics
+
+        self.enterContext(mock.patch.object(metrics, "enabled", True))
+        self.enterContext(override_settings(METRICS = {**settings.METRICS, "TOKEN": "scrape"}))
+
+    def test_anonymous_and_users_are_refused(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION = "Bearer wrong").status_code, 403)
+
+        self.client.force_login(User.objects.create_user(username = "user", password = "secret", mobile_number = "1"))
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+
+    def test_staff_and_scraper(self):
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION = "Bearer scrape")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+
+        self.client.force_login(User.objects.create_user(username = "staff", password = "secret", mobile_number = "1", is_staff = True))
+        self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+    def test_no_token_configured(self):
+        with override_settings(METRICS = {**settings.METRICS, "TOKEN": ""}):
+            self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION = "Bearer ").status_code, 403)
+
+class BatchPredictViewTest(TestCase):
+    """invalid batch prediction requests fail before the response is streamed"""
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT = media.name))
+
+        user   = User.objects.create_user(username = "owner", password = "secret", mobile_number = "1")
+        record = ModelFile.objects.create(project_name = "nb", model_name = "Gaussian Naive Bayes Classifier", created_by = user)
+        record.replace_model_obj(dumps(GaussianNB().fit(pd.DataFrame({"a" : [0.0, 1.0], "b" : [0.0, 1.0]}), [0, 1])))
+
+        self.client.force_login(user)
+
+    def post(self, content, **data):
+        return self.client.post("/api/model/nb/batch-predict", {"dataset" : SimpleUploadedFile("d.csv", content), **data})
+
+    def test_invalid_chunk_size(self):
+        for chunk_size in ("abc", "0", "-1"):
+            response = self.post(b"a,b\n0,0\n", chunk_size = chunk_size)
+
+            self.assertEqual(response.status_code, 400, chunk_size)
+            self.assertFalse(response.streaming)
+
+    def test_schema_mismatch_of_the_first_chunk(self):
+        response = self.post(b"a,c,d\n0,0,0\n")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.streaming)
+
+    def test_predictions_are_streamed(self):
+        response = self.post(b"a,b\n0,0\n1,1\n1,1\n", chunk_size = "2")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b'{"prediction":0}\n{"prediction":1}\n{"prediction":1}\n')
+
+    def test_target_of_a_registered_dataset_is_dropped(self):
+        from .models import Dataset
+
+        with override_settings(DATASET_CACHE = {'ENABLED' : False, 'DIRECTORY' : settings.MEDIA_ROOT, 'MAX_BYTES' : 10 ** 9}):
+            dataset  = Dataset.register(SimpleUploadedFile("d.csv", b"a,label,b\n0,0,0\n1,1,1\n"), "labelled", User.objects.get())
+            response = self.client.post("/api/model/nb/batch-predict", {"dataset_id" : dataset.pk, "target" : "label"})
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(b"".join(response.streaming_content), b'{"prediction":0}\n{"prediction":1}\n')
+
+    def test_features_are_selected(self):
+        response = self.post(b"b,extra,a\n0,5,0\n1,5,1\n", features = "a, b")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b'{"prediction":0}\n{"prediction":1}\n')
+
+
+class DatasetCacheTest(SimpleTestCase):
+    """parsed uploads are cached up to a size limit, registered datasets are never evicted"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        self.config = {'ENABLED' : True, 'DIRECTORY' : directory.name, 'MAX_BYTES' : 10 ** 9}
+
+    def upload(self, seed):
+        return SimpleUploadedFile("d.csv", pd.DataFrame({"a" : np.arange(1000) + seed, "y" : seed}).to_csv(index = False).encode())
+
+    def test_uploads_are_not_kept_when_disabled(self):
+        with override_settings(DATASET_CACHE = {**self.config, 'ENABLED' : False}):
+            self.assertEqual(len(load_dataset(self.upload(0))), 1000)
+
+        self.assertEqual(os.listdir(self.config['DIRECTORY']), [])
+
+    def test_least_recently_used_uploads_are_evicted(self):
+        with override_settings(DATASET_CACHE = self.config):
+            registered, _ = ingest(self.upload(0))
+            load_dataset(self.upload(0))
+            load_dataset(self.upload(1))
+
+            cached = os.listdir(os.path.dirname(upload_directory("digest")))
+            size   = sum(os.path.getsize(os.path.join(upload_directory(cached[0]), name)) for name in os.listdir(upload_directory(cached[0])))
+
+        # registered content is read from the dataset, not copied
+        self.assertEqual(len(cached), 1)
+
+        with override_settings(DATASET_CACHE = {**self.config, 'MAX_BYTES' : size * 2}):
+            for seed in range(2, 6):
+                load_dataset(self.upload(seed))
+
+            uploads = os.listdir(os.path.dirname(upload_directory("digest")))
+
+            self.assertTrue(os.path.isdir(dataset_directory(registered)))
+
+        self.assertEqual(len(uploads), 2)
+
+
+@override_settings(TRAINING_HEARTBEAT_TIMEOUT = 60, TRAINING_MAX_ATTEMPTS = 2)
+class StaleTrainingJobTest(TestCase):
+    """running jobs of dead workers are queued again, or failed after the last attempt"""
+
+    def setUp(self):
+        user   = User.objects.create_user(username = "owner", password = "secret", mobile_number = "1")
+        record = ModelFile.objects.create(project_name = "jobs", model_name = "Gaussian Naive Bayes Classifier", created_by = user)
+
+        self.job = TrainingJob.objects.create(model_file = record, submitted_by = user)
+
+    def claim(self, seconds_ago):
+        job = TrainingJob.claim_next()
+        TrainingJob.objects.filter(pk = job.pk).update(heartbeat_on = timezone.now() - timedelta(seconds = seconds_ago))
+
+        return job
+
+    def test_alive_job_is_kept(self):
+        self.claim(seconds_ago = 30)
+
+        self.assertEqual(TrainingJob.reclaim_stale(), 0)
+        self.assertEqual(TrainingJob.objects.get(pk = self.job.pk).status, TrainingJob.RUNNING)
+
+    def test_stale_job_is_queued_again_then_failed(self):
+        self.claim(seconds_ago = 120)
+
+        self.assertEqual(TrainingJob.reclaim_stale(), 1)
+        self.assertEqual(TrainingJob.objects.get(pk = self.job.pk).status, TrainingJob.QUEUED)
+
+        self.assertEqual(self.claim(seconds_ago = 120).attempts, 2)
+        self.assertEqual(TrainingJob.reclaim_stale(), 1)
+        self.assertEqual(TrainingJob.objects.get(pk = self.job.pk).status, TrainingJob.FAILED)
+
+    def test_heartbeat_keeps_a_long_job_alive(self):
+        job = self.claim(seconds_ago = 120)
+        TrainingJob.heartbeat([job.pk])
+
+        self.assertEqual(TrainingJob.reclaim_stale(), 0)
+
+
+class SharedModelStoreTest(TestCase):
+    """the store directory follows SHARED_MODEL_STORE when the settings are overridden"""
+
+    def test_directory_is_read_from_the_settings(self):
+        from .shared_store import shared_store
+
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(SHARED_MODEL_STORE = {'ENABLED': True, 'DIRECTORY': directory}):
+                shared_store.load("digest", "n_jobs=1", lambda: GaussianNB())
+
+                self.assertEqual(shared_store.directory, directory)
+                self.assertEqual(len(os.listdir(directory)), 1)
+
+
+class SerializationVersionTest(SimpleTestCase):
+    """models written by another scikit-learn load with a warning"""
+
+    def dumps_with_version(self, sklearn_version):
+        import json, struct
+        from .serialization import MAGIC
+
+        content = dumps(GaussianNB().fit([[0], [1]], [0, 1]))
+        header  = read_header(content)
+        payload = content[:header["size"]]
+        header  = json.dumps({**header, "sklearn": sklearn_version}).encode()
+
+        return payload + header + struct.pack(">I", len(header)) + MAGIC
+
+    def test_default_is_uncompressed(self):
+        self.assertIsNone(read_header(dumps(GaussianNB()))["compress"])
+
+    def test_other_version_warns(self):
+        content = self.dumps_with_version("0.0.1")
+
+        with self.assertLogs("core.serialization", level = "WARNING") as logs:
+            loads(content)
+
+        self.assertIn("0.0.1", logs.output[0])
+
+        with tempfile.NamedTemporaryFile(suffix = ".model") as model_file:
+            model_file.write(self.dumps_with_version("0.0.2"))
+            model_file.flush()
+
+            with self.assertLogs("core.serialization", level = "WARNING"):
+                load_path(model_file.name, mmap_mode = 'r')
+
+    def test_same_version_is_silent(self):
+        with self.assertNoLogs("core.serialization", level = "WARNING"):
+            loads(dumps(GaussianNB()))
+
+
+class ConfigureNJobsTest(SimpleTestCase):
+    """n_jobs is only set where the estimator still uses it"""
+
+    def test_parallel_estimator_is_configured(self):
+        self.assertEqual(cpu.configure(RandomForestClassifier(), 3).n_jobs, 3)
+
+    def test_deprecated_n_jobs_is_left_alone(self):
+        import warnings
+        from sklearn.multiclass import OneVsRestClassifier
+
+        model = cpu.configure(OneVsRestClassifier(LogisticRegression()), 3)
+
+        self.assertEqual(model.n_jobs, 3)
+        self.assertIsNone(model.estimator.n_jobs)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", FutureWarning)
+            cpu.configure(LogisticRegression(), 3).fit([[0], [1]], [0, 1])
+
+    def test_allow_list_names_estimators_with_n_jobs(self):
+        from sklearn.utils import all_estimators
+
+        classes = {name: cls for name, cls in all_estimators()}
+
+        for name in cpu.N_JOBS_ESTIMATORS:
+            with self.subTest(name = name):
+                self.assertIn("n_jobs", classes[name]._get_param_names())
+
+    def test_thread_pools_are_limited_in_every_training_path(self):
+        from sklearn.linear_model import SGDClassifier
+
+        record = ModelFile(project_name = "sgd", model_name = "SGD Classifier", n_jobs = 1)
+        X, y   = pd.DataFrame({"a": [0.0, 1.0, 0.0, 1.0]}), pd.Series([0, 1, 0, 1])
+
+        with mock.patch.object(cpu, "limit_threads", wraps = cpu.limit_threads) as limit_threads:
+            record.partial_train(SGDClassifier(), X, y)
+
+        limit_threads.assert_called_once_with(1)
+
+        from django.core.files.base import ContentFile
+
+        record.model_obj = ContentFile(dumps(GaussianNB()), name = "nb.model")
+
+        with mock.patch.object(cpu, "limit_threads", wraps = cpu.limit_threads) as limit_threads, \
+             mock.patch("core.search.run_search", return_value = (GaussianNB(), {})), \
+             mock.patch.object(ModelFile, "replace_model_obj"):
+            record.search((X, y), {"param_grid": {"var_smoothing": [1e-9]}})
+
+        limit_threads.assert_called_once_with(1, per_worker = 1)
+
+
+class SearchOptionsTest(SimpleTestCase):
+    """param_grid of a search request is checked against the estimator before the job is queued"""
+
+    def options(self, **data):
+        from .views import get_search_options
+
+        return get_search_options(data, "Decision Tree Classifier")
+
+    def test_valid_grid(self):
+        self.assertEqual(self.options(param_grid = '{"max_depth": [2, 4]}')["param_grid"], {"max_depth": [2, 4]})
+
+    def test_invalid_grids_are_rejected(self):
+        for param_grid in ({"depth": [2]}, {"n_jobs": [1, 2]}, {"max_depth": []}, {"max_depth": 2}):
+            with self.subTest(param_grid = param_grid), self.assertRaises(ValueError):
+                self.options(param_grid = param_grid)
+
+    @override_settings(SEARCH_MAX_CANDIDATES = 10)
+    def test_grid_size_is_bounded(self):
+        with self.assertRaises(ValueError):
+            self.options(param_grid = {"max_depth": list(range(1, 5)), "min_samples_leaf": [1, 2, 3]})
+
+        with self.assertRaises(ValueError):
+            self.options(strategy = "random", n_iter = 11)
+
+    def test_unsupported_model_is_rejected(self):
+        from .views import get_search_options
+
+        with self.assertRaisesMessage(ValueError, "does not support hyperparameter search"):
+            get_search_options({"param_grid": {"max_depth": [2]}}, "Custom Model")
+
+    @override_settings(SEARCH_PROGRESS_INTERVAL = 0.01)
+    def test_progress_reaches_the_end(self):
+        from sklearn.datasets import load_iris
+        from .search import run_search
+
+        X, y = load_iris(return_X_y = True)
+
+        for strategy in ("grid", "halving"):
+            progress = []
+
+            run_search(DecisionTreeClassifier(), X, y, {"max_depth": [None, 5, 10, 20], "min_samples_leaf": [1, 5, 20], "criterion": ["gini", "entropy"]}, strategy = strategy, progress = progress.append)
+
+            with self.subTest(strategy = strategy):
+                self.assertEqual(progress, sorted(progress))
+                self.assertEqual(progress[-1], 1.0)
+
+    def test_fits_are_counted(self):
+        from sklearn.datasets       import load_iris
+        from sklearn.metrics        import check_scoring
+        from .search                import FitCounter, fraction_done, get_search_class
+
+        X, y       = load_iris(return_X_y = True)
+        param_grid = {"max_depth": [None, 5, 10, 20], "min_samples_leaf": [1, 5, 20], "criterion": ["gini", "entropy"]}
+        path       = os.path.join(self.enterContext(tempfile.TemporaryDirectory()), "fits")
+        open(path, "wb").close()
+
+        counter = FitCounter(check_scoring(DecisionTreeClassifier(), None), path)
+        search  = get_search_class("halving")(DecisionTreeClassifier(), param_grid, scoring = counter, random_state = 0, cv = 3, return_train_score = False).fit(X, y)
+        fits    = counter.count()
+
+        self.assertEqual(fits, sum(search.n_candidates_) * search.n_splits_)
+        self.assertEqual(fraction_done(search, 0), 0.0)
+        self.assertAlmostEqual(fraction_done(search, fits), search.n_resources_[-1] / search.max_resources_)
+
+        fractions = [fraction_done(search, done) for done in range(fits + 1)]
+        self.assertEqual(fractions, sorted(fractions))
+
+        open(path, "wb").close()
+        search = get_search_class("grid")(DecisionTreeClassifier(), param_grid, scoring = counter, cv = 3).fit(X, y)
+
+        self.assertEqual(counter.count(), 24 * 3)
+        self.assertEqual(fraction_done(search, 36, n_candidates = 24), 0.5)
+
+class RecordingModel:
+    """predicts the first column, records the size of every predict call"""
+
+    def __init__(self, fail_on = None):
+        self.calls   = []
+        self.fail_on = fail_on
+
+    def predict(self, X):
+        self.calls.append(len(X))
+
+        if self.fail_on is not None and (X["a"] == self.fail_on).any():
+            raise ValueError("bad row")
+
+        return X["a"].to_numpy()
+
+
+class PredictionBatcherTest(SimpleTestCase):
+    """concurrent predictions are coalesced by one dispatcher thread"""
+
+    def frame(self, *values):
+        return pd.DataFrame({"a" : list(values)})
+
+    def test_requests_in_the_window_are_coalesced(self):
+        batcher = PredictionBatcher(window = 0.2, max_rows = 100)
+        model   = RecordingModel()
+        futures = [batcher.submit("m", model, self.frame(i, i)) for i in range(3)]
+
+        for i, future in enumerate(futures):
+            self.assertEqual(future.result(timeout = 5).tolist(), [i, i])
+
+        self.assertEqual(model.calls, [6])
+
+    def test_batch_is_flushed_after_the_window(self):
+        batcher = PredictionBatcher(window = 0.05, max_rows = 100)
+        model   = RecordingModel()
+
+        self.assertEqual(batcher.predict("m", model, self.frame(1)).tolist(), [1])
+        self.assertEqual(batcher.predict("m", model, self.frame(2)).tolist(), [2])
+        self.assertEqual(model.calls, [1, 1])
+        self.assertEqual(batcher._dispatcher.thread.name, "prediction-batcher")
+
+    def test_full_batch_runs_before_the_window(self):
+        batcher = PredictionBatcher(window = 60, max_rows = 2)
+        model   = RecordingModel()
+        future  = batcher.submit("m", model, self.frame(1))
+
+        self.assertEqual(batcher.predict("m", model, self.frame(2)).tolist(), [2])
+        self.assertEqual(future.result(timeout = 5).tolist(), [1])
+
+    def test_errors_reach_every_waiting_future(self):
+        batcher = PredictionBatcher(window = 0.2, max_rows = 100)
+        model   = RecordingModel(fail_on = 1)
+        good    = batcher.submit("m", model, self.frame(0))
+        bad     = [batcher.submit("m", model, self.frame(1)) for _ in range(2)]
+
+        self.assertEqual(good.result(timeout = 5).tolist(), [0])
+
+        for future in bad:
+            with self.assertRaises(ValueError):
+                future.result(timeout = 5)
+
+        batcher._executor.shutdown()
+        failed = batcher.submit("m", model, self.frame(0))
+
+        with self.assertRaises(RuntimeError):
+            failed.result(timeout = 5)
+
+
+@override_settings(CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'listing-tests'}})
+class ListingCacheTest(TestCase):
+    """cursor pages of the public listing are cached per page and dropped when a model changes"""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+
+        self.user = User.objects.create_user(username = "owner", password = "secret", mobile_number = "1")
+
+        for i in range(5):
+            ModelFile.objects.create(project_name = f"public_{i}", created_by = self.user, is_public = True)
+
+    def names(self, data):
+        return [record["project_name"] for record in data["results"]]
+
+    def test_cursor_pages_cover_the_listing(self):
+        data, names = self.client.get("/api/public-models", {"page_size": 2}).json(), []
+
+        while True:
+            names += self.names(data)
+
+            if not data["next"]:
+                break
+
+            self.assertIn("page_size=2", data["next"])
+            data = self.client.get(data["next"]).json()
+
+        self.assertEqual(names, [f"public_{i}" for i in reversed(range(5))])
+
+        previous = self.client.get(data["previous"]).json()
+        self.assertEqual(self.names(previous), ["public_2", "public_1"])
+
+    def test_key_ignores_the_host_and_other_parameters(self):
+        first = self.client.get("/api/public-models", {"page_size": 2}).json()
+
+        with self.assertNumQueries(0):
+            other = self.client.get("/api/public-models", {"page_size": 2, "unused": 1}, HTTP_HOST = "localhost").json()
+
+        self.assertEqual(self.names(first), self.names(other))
+        self.assertTrue(other["next"].startswith("http://localhost/"))
+        self.assertIn("unused=1", other["next"])
+
+    def test_save_and_delete_invalidate_the_pages(self):
+        self.assertEqual(self.names(self.client.get("/api/public-models", {"page_size": 2}).json()), ["public_4", "public_3"])
+
+        with self.captureOnCommitCallbacks(execute = True):
+            ModelFile.objects.create(project_name = "public_5", created_by = self.user, is_public = True)
+
+        self.assertEqual(self.names(self.client.get("/api/public-models", {"page_size": 2}).json()), ["public_5", "public_4"])
+
+        with self.captureOnCommitCallbacks(execute = True):
+            ModelFile.objects.get(project_name = "public_5").delete()
+
+        self.assertEqual(self.names(self.client.get("/api/public-models", {"page_size": 2}).json()), ["public_4", "public_3"])
+
+    def test_invalidation_waits_for_the_commit(self):
+        from django.db import transaction
+
+        self.client.get("/api/public-models", {"page_size": 2})
+
+        with self.captureOnCommitCallbacks(execute = True):
+            ModelFile.objects.create(project_name = "public_5", created_by = self.user, is_public = True)
+
+            # nothing is invalidated before the commit, so no page of uncommitted rows gets cached
+            self.assertEqual(self.names(self.client.get("/api/public-models", {"page_size": 2}).json()), ["public_4", "public_3"])
+
+        self.assertEqual(self.names(self.client.get("/api/public-models", {"page_size": 2}).json()), ["public_5", "public_4"])
+
+        try:
+            with transaction.atomic():
+                ModelFile.objects.create(project_name = "rolled_back", created_by = self.user, is_public = True)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+
+        from django.core.cache import cache
+        from .listing_cache import record_key
+
+        self.assertIsNone(cache.get(record_key("rolled_back")))
+
+
+class ModelVersionViewTest(TestCase):
+    """models without a served version answer 400 or 404, versions are listed without a query per row"""
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT = media.name))
+
+        user        = User.objects.create_user(username = "owner", password = "secret", mobile_number = "1")
+        self.record = ModelFile.objects.create(project_name = "nb", model_name = "Gaussian Naive Bayes Classifier", created_by = user)
+
+        self.client.force_login(user)
+
+    def store(self, count):
+        for i in range(count):
+            self.record.replace_model_obj(dumps(GaussianNB().fit([[0.0], [float(i + 1)]], [0, 1])))
+
+    def test_model_without_version(self):
+        with self.assertRaises(ModelNotStoredError):
+            self.record.load_model()
+
+        self.assertEqual(self.client.post("/api/model/nb", {"data_type" : "plain_text", "0" : "1"}).status_code, 404)
+        self.assertEqual(self.client.post("/api/model/nb/batch-predict", {"dataset" : SimpleUploadedFile("d.csv", b"a\n1\n")}).status_code, 404)
+        self.assertEqual(self.client.post("/api/model/nb/rollback").status_code, 400)
+
+    def test_rollback_serves_the_previous_version(self):
+        self.store(2)
+
+        response = self.client.post("/api/model/nb/rollback")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["number"], 1)
+        self.assertTrue(response.json()["is_served"])
+
+    def test_versions_are_listed_in_constant_queries(self):
+        self.store(2)
+
+        with self.assertNumQueries(4):
+            self.assertEqual(len(self.client.get("/api/model/nb/versions").json()), 2)
+
+        self.store(2)
+
+        with self.assertNumQueries(4):
+            versions = self.client.get("/api/model/nb/versions").json()
+
+        self.assertEqual([version["is_served"] for version in versions], [True, False, False, False])
+
+
+class ModelCacheTest(SimpleTestCase):
+    """LRU cache of loaded models bounded by entries and bytes"""
+
+    def loader(self, name, size = 10):
+        def load():
+            self.loads.append(name)
+            return object(), size
+
+        return load
+
+    def setUp(self):
+        self.loads = []
+
+    def test_hits_and_misses(self):
+        cache = ModelCache(max_entries = 4, max_bytes = 100)
+        model = cache.get("a", "v1", self.loader("a"))
+
+        self.assertIs(cache.get("a", "v1", self.loader("a")), model)
+        self.assertIsNot(cache.get("a", "v2", self.loader("a")), model)
+        self.assertEqual(self.loads, ["a", "a"])
+
+        stats = cache.stats()
+
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (1, 2, 0))
+        self.assertEqual((stats["entries"], stats["bytes"]), (1, 10))
+
+    def test_least_recently_used_is_evicted(self):
+        cache = ModelCache(max_entries = 2, max_bytes = 100)
+
+        cache.get("a", "v", self.loader("a"))
+        cache.get("b", "v", self.loader("b"))
+        cache.get("a", "v", self.loader("a"))
+        cache.get("c", "v", self.loader("c"))
+
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+        cache.get("a", "v", self.loader("a"))
+        cache.get("b", "v", self.loader("b"))
+
+        self.assertEqual(self.loads, ["a", "b", "c", "b"])
+
+    def test_byte_limit(self):
+        cache = ModelCache(max_entries = 10, max_bytes = 100)
+
+        cache.get("a", "v", self.loader("a", 60))
+        cache.get("b", "v", self.loader("b", 30))
+        cache.get("c", "v", self.loader("c", 30))
+
+        self.assertEqual(cache.stats()["bytes"], 60)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+        # larger than the whole cache, served without being kept
+        cache.get("d", "v", self.loader("d", 101))
+        cache.get("d", "v", self.loader("d", 101))
+
+        self.assertEqual(self.loads.count("d"), 2)
+        self.assertEqual(cache.stats()["entries"], 2)
+
+    def test_invalidate_and_clear(self):
+        cache = ModelCache(max_entries = 10, max_bytes = 100)
+
+        cache.get("a", "v", self.loader("a"))
+        cache.get("b", "v", self.loader("b"))
+        cache.invalidate("a")
+
+        self.assertEqual(cache.stats()["bytes"], 10)
+
+        cache.clear()
+
+        self.assertEqual((cache.stats()["entries"], cache.stats()["bytes"]), (0, 0))
+
+
+class BatchPayloadTest(SimpleTestCase):
+    """rows, columns and buffer payloads are parsed into one frame or rejected with PredictionInputError"""
+
+    def frame(self, data_type, **data):
+        from .models import get_batch_frame
+
+        return get_batch_frame(data, data_type)
+
+    def test_rows(self):
+        df = self.frame("rows", rows = "[[1, 2], [3, 4]]", columns = '["a", "b"]')
+
+        self.assertEqual(list(df.columns), ["a", "b"])
+        self.assertEqual(df.to_numpy().tolist(), [[1, 2], [3, 4]])
+        self.assertEqual(self.frame("rows", rows = [1, 2]).shape, (2, 1))
+
+    def test_columns(self):
+        df = self.frame("columns", columns = {"a": [1, 2], "b": [3, 4]})
+
+        self.assertEqual(df.to_numpy().tolist(), [[1, 3], [2, 4]])
+
+    def test_buffer(self):
+        import base64
+
+        buffer = base64.b64encode(np.arange(6, dtype = "<f4").tobytes()).decode()
+
+        self.assertEqual(self.frame("buffer", buffer = buffer, n_features = "3").to_numpy().tolist(), [[0, 1, 2], [3, 4, 5]])
+
+    def test_malformed_payloads(self):
+        import base64
+        from .models import PredictionInputError
+
+        buffer = base64.b64encode(np.arange(5, dtype = "<f4").tobytes()).decode()
+        cases  = [
+            ("rows", {"rows": [[1, 2], [3]]}),
+            ("rows", {"rows": "[[1, 2"}),
+            ("rows", {"rows": [["a", "b"]]}),
+            ("rows", {"rows": []}),
+            ("rows", {"rows": [[1, 2]], "columns": ["a"]}),
+            ("rows", {"rows": [[[1]]]}),
+            ("columns", {"columns": {"a": [1, 2], "b": [3]}}),
+            ("columns", {"columns": [1, 2]}),
+            ("buffer", {"buffer": buffer}),
+            ("buffer", {"buffer": buffer, "n_features": "x"}),
+            ("buffer", {"buffer": buffer, "n_features": "0"}),
+            ("buffer", {"buffer": buffer, "n_features": "3"}),
+            ("buffer", {"buffer": "not base64!", "n_features": "1"}),
+        ]
+
+        for data_type, data in cases:
+            with self.subTest(data_type = data_type, data = data), self.assertRaises(PredictionInputError):
+                self.frame(data_type, **data)
+
+
+class PredictViewInputTest(TestCase):
+    """malformed prediction input is a 400, not a server error"""
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT = media.name))
+
+        user   = User.objects.create_user(username = "owner", password = "secret", mobile_number = "1")
+        record = ModelFile.objects.create(project_name = "nb", model_name = "Gaussian Naive Bayes Classifier", created_by = user)
+        record.replace_model_obj(dumps(GaussianNB().fit(np.array([[0.0, 0.0], [1.0, 1.0]]), [0, 1])))
+
+        self.client.force_login(user)
+
+    def post(self, data):
+        return self.client.post("/api/model/nb", data, content_type = "application/json")
+
+    def test_valid_rows(self):
+        response = self.post({"data_type": "rows", "rows": [[0, 0], [1, 1]]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["prediction"], [0, 1])
+
+    def test_malformed_input(self):
+        for data in (
+            {"data_type": "rows", "rows": [[1, 2], [3]]},
+            {"data_type": "buffer", "buffer": "AAAA"},
+            {"data_type": "columns", "columns": "{"},
+            {"data_type": "unknown"},
+            {"data_type": "plain_text", "0": "x"},
+            {"data_type": "rows", "rows": [[1, 2, 3]]},
+            [1, 2],
+        ):
+            with self.subTest(data = data):
+                self.assertEqual(self.post(data).status_code, 400)
+
+class EvaluationTest(SimpleTestCase):
+    """vectorized evaluation report against the sklearn metrics"""
+
+    def setUp(self):
+        X, y = make_classification(n_samples = 600, n_features = 6, n_informative = 4, n_classes = 3, random_state = 0)
+
+        self.X     = pd.DataFrame(X)
+        self.y     = pd.Series(y)
+        self.model = LogisticRegression(max_iter = 500).fit(X[:400], y[:400])
+
+    def test_confusion_matrix_and_metrics(self):
+        from sklearn import metrics as sk
+
+        report      = evaluate(self.model, self.X, self.y, chunk_size = 64)
+        predictions = self.model.predict(self.X)
+
+        self.assertEqual(report["rows"], 600)
+        self.assertEqual(report["confusion_matrix"], sk.confusion_matrix(self.y, predictions).tolist())
+
+        for average in ("macro", "weighted"):
+            with self.subTest(average = average):
+                scores = report[f"{average}_avg"]
+
+                self.assertAlmostEqual(scores["precision"], sk.precision_score(self.y, predictions, average = average))
+                self.assertAlmostEqual(scores["recall"], sk.recall_score(self.y, predictions, average = average))
+                self.assertAlmostEqual(scores["f1"], sk.f1_score(self.y, predictions, average = average))
+
+        f1 = sk.f1_score(self.y, predictions, average = None)
+
+        for label in range(3):
+            self.assertAlmostEqual(report["per_class"][str(label)]["f1"], f1[label])
+            self.assertEqual(report["per_class"][str(label)]["support"], int((self.y == label).sum()))
+
+    def test_missing_predicted_class(self):
+        matrix  = confusion_matrix(np.array([0, 1, 2]), np.array([0, 1, 2]), np.array([0, 0, 0]))
+        metrics = class_metrics(np.array([0, 1, 2]), matrix)
+
+        self.assertEqual(matrix.tolist(), [[1, 0, 0], [1, 0, 0], [1, 0, 0]])
+        self.assertEqual(metrics["per_class"]["1"]["precision"], 0.0)
+
+    def test_curves(self):
+        from sklearn.metrics import roc_auc_score
+
+        report = evaluate(self.model, self.X, self.y, bins = 1000)
+        scores = self.model.predict_proba(self.X)
+
+        self.assertEqual(set(report["roc"]), {"0", "1", "2"})
+        self.assertEqual(set(report["pr"]), {"0", "1", "2"})
+
+        for label in range(3):
+            roc = report["roc"][str(label)]
+
+            self.assertAlmostEqual(roc["auc"], roc_auc_score(self.y == label, scores[:, label]), delta = 0.01)
+            self.assertTrue(np.all(np.diff(roc["fpr"]) >= 0))
+            self.assertTrue(0 <= report["pr"][str(label)]["average_precision"] <= 1)
+
+    def test_unscored_model_has_no_curves(self):
+        model  = KNeighborsClassifier().fit(self.X, self.y)
+        model.predict_proba = None
+        report = evaluate(model, self.X, self.y)
+
+        self.assertNotIn("roc", report)
+
+        with self.assertRaises(ValueError):
+            render_plot(report, "roc")
+
+    def test_render_plot(self):
+        report = evaluate(self.model, self.X, self.y)
+
+        for kind in plots:
+            with self.subTest(kind = kind):
+                self.assertTrue(render_plot(report, kind).startswith(b"\x89PNG"))
+
+        with self.assertRaises(ValueError):
+            render_plot(report, "histogram")
+
+class ModelEvaluateViewTest(TestCase):
+    """analysis report endpoint, reports are cached and the dataset is hashed once"""
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT = media.name))
+        cache.clear()
+
+        X, y = make_classification(n_samples = 200, n_features = 3, n_informative = 2, n_redundant = 0, random_state = 0)
+
+        self.frame = pd.DataFrame(X, columns = ["a", "b", "c"]).assign(label = y)
+        self.model = LogisticRegression().fit(X, y)
+
+        user   = User.objects.create_user(username = "owner", password = "secret", mobile_number = "1")
+        record = ModelFile.objects.create(project_name = "lr", model_name = "Logistic Regression", created_by = user)
+        record.replace_model_obj(dumps(self.model))
+
+        self.client.force_login(user)
+
+    def post(self, query = ""):
+        upload = SimpleUploadedFile("data.csv", self.frame.to_csv(index = False).encode())
+
+        return self.client.post(f"/api/model/lr/evaluate{query}", {"dataset": upload, "target": "label"})
+
+    def test_report(self):
+        response = self.post()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["rows"], 200)
+        self.assertEqual(sum(map(sum, response.json()["confusion_matrix"])), 200)
+        self.assertIn("roc", response.json())
+
+    def test_plot(self):
+        response = self.post("?plot=confusion_matrix")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertTrue(response.content.startswith(b"\x89PNG"))
+
+        self.assertEqual(self.post("?plot=histogram").status_code, 400)
+
+    def test_cached_report(self):
+        with mock.patch("core.models.evaluate", wraps = evaluate) as evaluated:
+            first  = self.post().json()
+            second = self.post().json()
+
+        self.assertEqual(evaluated.call_count, 1)
+        self.assertEqual(first, second)
+
+    def test_dataset_hashed_once(self):
+        from . import datasets
+
+        with mock.patch("core.models.file_digest", wraps = datasets.file_digest) as hashed, \
+             mock.patch("core.datasets.file_digest", wraps = datasets.file_digest) as rehashed:
+            self.assertEqual(self.post("?plot=roc").status_code, 200)
+
+        self.assertEqual(hashed.call_count + rehashed.call_count, 1)
+
+    def test_missing_dataset(self):
+        response = self.client.post("/api/model/lr/evaluate", {"target": "label"})
+
+        self.assertEqual(response.status_code, 400)
+
+class PredictAsyncViewTest(TransactionTestCase):
+    """async prediction view, a TransactionTestCase as the async ORM queries run on another thread"""
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT = media.name))
+
+        self.user = User.objects.create_user(username = "owner", password = "secret", mobile_number = "1")
+        record    = ModelFile.objects.create(project_name = "nb", model_name = "Gaussian Naive Bayes Classifier", created_by = self.user)
+        record.replace_model_obj(dumps(GaussianNB().fit(np.array([[0.0, 0.0], [1.0, 1.0]]), [0, 1])))
+
+        self.key = self.user.generate_api_key()
+
+    def post(self, body, project_name = "nb", **headers):
+        return self.async_client.post(f"/api/model/{project_name}/predict-async", body, content_type = "application/json", headers = headers)
+
+    async def test_prediction_with_api_key(self):
+        response = await self.post({"data_type": "rows", "rows": [[0, 0], [1, 1]]}, x_api_key = self.key)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["prediction"], [0, 1])
+        self.assertEqual(response.json()["user"], "owner")
+
+    async def test_prediction_with_session(self):
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.post({"data_type": "buffer", "n_features": 2, "buffer": "AAAAAAAAAAAAAIA/AACAPw=="})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["prediction"], [0, 1])
+
+    async def test_malformed_input(self):
+        for body in (
+            {"data_type": "buffer", "buffer": "AAAAAAAAAAA="},
+            {"data_type": "rows", "rows": [[1, 2], [3]]},
+            {"data_type": "rows", "rows": [[1, 2, 3]]},
+            {"data_type": "unknown"},
+            [1, 2],
+            "{",
+        ):
+            with self.subTest(body = body):
+                response = await self.post(body, x_api_key = self.key)
+
+                self.assertEqual(response.status_code, 400)
+                self.assertTrue(response.json().startswith("Unable to predict"))
+
+    async def test_unauthenticated(self):
+        response = await self.post({"data_type": "rows", "rows": [[0, 0]]}, x_api_key = "unknown")
+
+        self.assertEqual(response.status_code, 401)
+
+    async def test_unknown_model(self):
+        response = await self.post({"data_type": "rows", "rows": [[0, 0]]}, project_name = "missing", x_api_key = self.key)
+
+        self.assertEqual(response.status_code, 404)
+
+@override_settings(INCREMENTAL_TRAINING_CHUNK_SIZE = 50)
+class IncrementalTrainingTest(TestCase):
+    """partial_fit updates of the stored model, one chunk at a time"""
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT = media.name))
+
+        X, y = make_classification(n_samples = 400, n_features = 4, random_state = 0)
+
+        self.X, self.y = pd.DataFrame(X), pd.Series(y)
+        self.user      = User.objects.create_user(username = "owner", password = "secret", mobile_number = "1")
+
+    def record(self, model, model_name = "SGD Classifier"):
+        record = ModelFile.objects.create(project_name = "incremental", model_name = model_name, created_by = self.user)
+        record.replace_model_obj(dumps(model))
+
+        return record
+
+    def test_update_over_several_batches(self):
+        record   = self.record(SGDClassifier(loss = "log_loss", random_state = 0))
+        progress = []
+
+        with mock.patch.object(SGDClassifier, "partial_fit", autospec = True, side_effect = SGDClassifier.partial_fit) as partial_fit:
+            record.train((self.X[:200], self.y[:200]), incremental = True, progress = progress.append)
+
+        self.assertEqual(partial_fit.call_count, 4)
+        self.assertEqual(progress, [0.25, 0.5, 0.75, 1.0])
+        self.assertEqual([len(call.args[1]) for call in partial_fit.call_args_list], [50] * 4)
+
+        first = loads(record.model_obj.read())
+        record.train((self.X[200:], self.y[200:]), incremental = True)
+        second = loads(ModelFile.objects.get(pk = record.pk).model_obj.read())
+
+        # the second update continues from the stored model instead of refitting it
+        self.assertEqual(second.t_, first.t_ + 200)
+        self.assertGreater((second.predict(self.X) == self.y).mean(), 0.8)
+
+    def test_version_bumped_after_each_update(self):
+        record = self.record(SGDClassifier(loss = "log_loss", random_state = 0))
+
+        for number in (2, 3, 4):
+            record.train((self.X[:100], self.y[:100]), incremental = True)
+
+            self.assertEqual(ModelFile.objects.get(pk = record.pk).version.number, number)
+
+        self.assertEqual(
+            list(record.versions.values_list("source", flat = True).order_by("number"))[1:],
+            ["trained"] * 3,
+        )
+
+    def test_estimator_without_partial_fit_is_rejected(self):
+        record = self.record(DecisionTreeClassifier(), model_name = "Decision Tree Classifier")
+
+        with self.assertRaisesMessage(ValueError, "does not support incremental training"):
+            record.train((self.X, self.y), incremental = True)
+
+        self.assertEqual(ModelFile.objects.get(pk = record.pk).version.number, 1)
@@ -22,8 +22,22 @@ urlpatterns += [
 
     path('api/models', ModelFileView.as_view(), name = "models"),
     path('api/model/<str:project_name>', ModelFileDetailView.as_view(), name = "model detail"),
+    path('api/model/<str:project_name>/predict-async', ModelPredictAsyncView.as_view(), name = "model predict async"),
+    path('api/model/<str:project_name>/batch-predict', ModelBatchPredictView.as_view(), name = "model batch predict"),
+    path('api/model/<str:project_name>/jobs', TrainingJobListView.as_view(), name = "model training jobs"),
+    path('api/model/<str:project_name>/search', ModelSearchView.as_view(), name = "model search"),
+    path('api/model/<str:project_name>/versions', ModelVersionListView.as_view(), name = "model versions"),
+    path('api/model/<str:project_name>/rollback', ModelRollbackView.as_view(), name = "model rollback"),
+    path('api/jobs/<int:job_id>', TrainingJobDetailView.as_view(), name = "training job"),
+    path('api/model/<str:project_name>/evaluate', ModelEvaluateView.as_view(), name = "model evaluate"),
+
+    path('api/datasets', DatasetListView.as_view(), name = "datasets"),
+    path('api/dataset/<int:dataset_id>', DatasetDetailView.as_view(), name = "dataset"),
 
     path('api/public-models', publicModels, name = "public models"),
+    path('api/model-cache', ModelCacheStatsView.as_view(), name = "model cache"),
+    path('api/ready', readiness, name = "ready"),
+    path('metrics', metricsView, name = "metrics"),
     path('<str:project_name>', ProjectView.as_view(), name = "project"),
 
 ]
@@ -0,0 +1,91 @@
+import atexit
+import logging
+import threading
+
+from collections    import Counter
+
+from django.conf    import settings
+from django.db      import close_old_connections, models
+
+from .helper        import LazyThread
+
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionCounter:
+    """Per-process counts of prediction requests
+
+        Predictions only bump an in-memory counter, a background thread adds
+        the counts to ModelFile.prediction_count with one update per model
+        every interval seconds and once more when the process exits.
+    """
+
+    def __init__(self, interval = 30, flush_at_exit = True):
+        self.interval      = interval
+        self.flush_at_exit = flush_at_exit
+
+        self._counts       = Counter()       # model file pk -> predictions not yet written
+        self._lock         = threading.Lock()
+        self._thread       = LazyThread(self._run, "prediction-counter")
+        self._stopped      = threading.Event()
+
+    def add(self, pk):
+        """counts a prediction of the model file"""
+        with self._lock:
+            self._counts[pk] += 1
+
+            if self._thread.start() and self.flush_at_exit:
+                atexit.register(self.flush)
+
+    def flush(self):
+        """writes the pending counts, counts of a failed write are kept for the next flush"""
+        from .models import ModelFile
+
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+
+        for pk, count in counts.items():
+            try:
+                ModelFile.objects.filter(pk = pk).update(prediction_count = models.F('prediction_count') + count)
+            except Exception as e:
+                logger.warning("unable to store prediction count of model %s: %s", pk, e)
+
+                with self._lock:
+                    self._counts[pk] += count
+
+    def pending(self):
+        """counts not written yet"""
+        with self._lock:
+            return dict(self._counts)
+
+    def stop(self, flush = True):
+        """stops the background thread, the pending counts are written first or dropped
+
+            the next prediction starts a new thread
+        """
+        with self._lock:
+            thread = self._thread.detach()
+
+        if thread is not None:
+            self._stopped.set()
+            thread.join()
+            self._stopped.clear()
+
+            if self.flush_at_exit:
+                atexit.unregister(self.flush)
+
+        if flush:
+            self.flush()
+        else:
+            with self._lock:
+                self._counts.clear()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.flush()
+            close_old_connections()
+
+
+# under the test runner the test database is gone by the time atexit hooks run
+prediction_counter = PredictionCounter(settings.PREDICTION_COUNT_FLUSH_INTERVAL, flush_at_exit = not settings.TESTING)
@@ -1,20 +1,29 @@
 from django.shortcuts   import render, get_object_or_404
-from django.http        import JsonResponse
+from django.http        import JsonResponse, StreamingHttpResponse, HttpResponse, Http404
+from django.conf        import settings
 from json               import loads
+from itertools          import chain
+from collections.abc    import Mapping
 
-from rest_framework.decorators      import api_view
+from rest_framework.decorators      import api_view, authentication_classes, permission_classes
 from rest_framework.response        import Response
 from rest_framework                 import status, permissions
 from rest_framework.views           import APIView
 from rest_framework                 import viewsets
 from rest_framework.authentication  import SessionAuthentication, BasicAuthentication
 
-from .authenicators import CsrfExemptSessionAuthentication
-from .serializers   import ModelFileSerializer, UserSerializer
-from .models        import ModelFile, User
+from .authenicators import CsrfExemptSessionAuthentication, APIKeyAuthentication, api_key_cache, get_api_key
+from .permissions   import IsModelEdit, IsMetricsScraper
+from .model_cache   import model_cache
+from .warmup        import state as warmup_state
+from .metrics       import metrics, UNKNOWN
+from .listing_cache import get_model_record, get_public_models, get_user_models
+from .serializers   import ModelFileSerializer, ModelVersionSerializer, UserSerializer, TrainingJobSerializer, DatasetSerializer
+from .models        import ModelFile, User, TrainingJob, Dataset, PredictionInputError
 from .helper        import *
 
 from django.utils.decorators        import method_decorator
+from django.views                   import View
 from django.views.decorators.cache  import cache_page
 from django.views.decorators.csrf   import csrf_exempt
 from django.core.cache              import cache
@@ -23,6 +32,8 @@ from django.core.files.storage      import FileSystemStorage
 from django.contrib.auth            import authenticate, login, logout
 from django.contrib.auth.models     import AnonymousUser
 
+pd = lazy_import("pandas")
+
 @cache_page(60 * 60 * 30)
 @api_view(['GET'])
 def apiOverview(request):
@@ -33,8 +44,21 @@ def apiOverview(request):
     return Response({
         'models'            : f"http://{host}/api/models",
         'model detail'      : f"http://{host}/api/model/<str:project_name>",
+        'model batch predict' : f"http://{host}/api/model/<str:project_name>/batch-predict",
+        'model training jobs' : f"http://{host}/api/model/<str:project_name>/jobs",
+        'training job'      : f"http://{host}/api/jobs/<int:job_id>",
+        'model search'      : f"http://{host}/api/model/<str:project_name>/search",
+        'model versions'    : f"http://{host}/api/model/<str:project_name>/versions",
+        'model rollback'    : f"http://{host}/api/model/<str:project_name>/rollback",
+        'model predict async' : f"http://{host}/api/model/<str:project_name>/predict-async",
+        'model evaluate'    : f"http://{host}/api/model/<str:project_name>/evaluate",
+        'datasets'          : f"http://{host}/api/datasets",
+        'dataset'           : f"http://{host}/api/dataset/<int:dataset_id>",
         'supported models'  : f"http://{host}/api/supported-models",
         'public models'  : f"http://{host}/api/public-models",
+        'model cache'       : f"http://{host}/api/model-cache",
+        'ready'             : f"http://{host}/api/ready",
+        'metrics'           : f"http://{host}/metrics",
         
         'project'           : f"http://{host}/api/project/<str:project_name>",
         
@@ -60,17 +84,59 @@ class SupportedModelsView(APIView):
 
 @api_view(["GET", "POST"])
 def publicModels(request):
-    """List of public models
+    """List of public models, paginated with a cursor
 
     Returns:
-        JSON : public models list
+        JSON : page of public models list
     """
-    public_models = ModelFile.objects.filter(is_public = True)
-    res = ModelFileSerializer(public_models, many = True).data
+    res = get_public_models(request)
 
     return Response(res, status.HTTP_200_OK)
 
 
+class ModelCacheStatsView(APIView):
+    """
+        Counters of the in-process model cache of the serving worker
+    """
+    permission_classes      = (IsModelEdit, )
+    authentication_classes  = (CsrfExemptSessionAuthentication, )
+
+    def get(self, request):
+        """invokes when get request
+
+        Returns:
+            Response: hits, misses, evictions and usage of the model cache
+        """
+        return Response(model_cache.stats(), status.HTTP_200_OK)
+
+@api_view(["GET"])
+def readiness(request):
+    """Readiness of the worker, ready once preloading of hot models is done
+
+    Returns:
+        JSON : warm-up state, 503 while warming up
+    """
+    res = {
+        **warmup_state,
+        "loaded" : len(warmup_state["loaded"]),
+        "failed" : warmup_state["failed"],
+    }
+
+    return Response(res, status.HTTP_200_OK if warmup_state["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE)
+
+@api_view(["GET"])
+@authentication_classes((CsrfExemptSessionAuthentication, ))
+@permission_classes((IsMetricsScraper, ))
+def metricsView(request):
+    """Latency histograms of this worker in prometheus text format, labelled with the project names
+
+        only staff users or the scraper sending the METRICS['TOKEN'] bearer token can read them
+    """
+    if not metrics.enabled:
+        raise Http404("metrics are disabled")
+
+    return HttpResponse(metrics.render(), content_type = "text/plain; version=0.0.4")
+
 # user auth views
 class UserRegister(APIView):
     permission_classes = (permissions.AllowAny, )
@@ -145,11 +211,13 @@ class UserAPIKeyGenerate(APIView):
     authentication_classes = (CsrfExemptSessionAuthentication, )
 
     def get(self, request):
-        return Response({"API Key" : request.user.api_key}, status.HTTP_200_OK)
+        """only the prefix of the key is known after it is generated"""
+        prefix = request.user.api_key_prefix
+        return Response({"API Key" : f"{prefix}..." if prefix else None}, status.HTTP_200_OK)
     
     def post(self, request):
-        request.user.generate_api_key()
-        return Response({"API Key" : request.user.api_key}, status.HTTP_200_OK)
+        api_key = request.user.generate_api_key()
+        return Response({"API Key" : api_key}, status.HTTP_200_OK)
 
 class ModelFileView(APIView):
     """
@@ -168,7 +236,7 @@ class ModelFileView(APIView):
             Response: list of all models
         """
         try:
-            res = ModelFileSerializer(request.user.models.all(), many = True).data
+            res = get_user_models(request)
             
             return Response(res, status.HTTP_200_OK)
         except Exception as e:
@@ -207,14 +275,169 @@ class ModelFileView(APIView):
         
         return Response(response, status.HTTP_503_SERVICE_UNAVAILABLE)       
 
+# a prediction failing with these was sent malformed data, PredictionInputError from
+# parsing it, ValueError or KeyError from the model on rows of the wrong width or columns
+PREDICTION_INPUT_ERRORS = (PredictionInputError, ValueError, KeyError)
+
+def prediction_input(data):
+    """validates the request data of a prediction, shared by the sync and async prediction views
+
+    Args:
+        data (dict): parsed json body or form fields
+
+    Raises:
+        PredictionInputError: the data is not a json object or form
+
+    Returns:
+        dict: request data
+    """
+    if not isinstance(data, Mapping):
+        raise PredictionInputError("expected a json object or form fields")
+
+    return data
+
+def prediction_error(e):
+    """400 response message of a prediction that failed on its input"""
+    return f"Unable to predict, because {e}"
+
+def get_dataset_data(request):
+    """request data with its dataset_id resolved to a registered dataset of the user
+
+    Args:
+        request (client request): contains dataset_id, target and features
+
+    Returns:
+        dict: data for ModelFile.get_data, the request data itself when no dataset_id is given
+    """
+    dataset_id = request.data.get('dataset_id')
+
+    if not dataset_id:
+        return request.data
+
+    return {
+        "target"    : request.data.get('target', ''),
+        "features"  : request.data.get('features', '*'),
+        "data_type" : "dataset",
+        "dataset"   : get_object_or_404(Dataset, pk = dataset_id, created_by = request.user),
+    }
+
+def submit_training_job(modelFileRecord, request, kind = TrainingJob.TRAIN):
+    """queues a training or hyperparameter search job of the model on the uploaded or registered dataset
+
+    Args:
+        modelFileRecord (ModelFile): model to be trained
+        request (client request): contains csv dataset or dataset_id, target, features and mode,
+                                  strategy, param_grid, n_iter, cv and scoring of a search
+        kind (str, optional): train or search. Defaults to TrainingJob.TRAIN.
+
+    Returns:
+        TrainingJob: queued job
+    """
+    data    = get_dataset_data(request)
+    dataset = data.get('dataset')
+
+    if dataset is None:
+        raise ValueError("no csv dataset uploaded")
+
+    options = {
+        "target"   : data.get('target', ''),
+        "features" : data.get('features', '*'),
+    }
+
+    if kind == TrainingJob.SEARCH:
+        options.update(get_search_options(request.data, modelFileRecord.model_name))
+    else:
+        options["mode"] = request.data.get('mode', 'full')
+
+        if options["mode"] not in ("full", "incremental"):
+            raise ValueError("mode must be full or incremental")
+
+    if isinstance(dataset, Dataset):
+        options["dataset_id"], dataset = dataset.pk, None
+
+    return TrainingJob.objects.create(
+        model_file   = modelFileRecord,
+        submitted_by = request.user,
+        kind         = kind,
+        dataset      = dataset,
+        options      = options,
+    )
+
+def get_search_options(data, model_name):
+    """validated hyperparameter search options of the request
+
+    Args:
+        data (dict): contains strategy, param_grid as json, n_iter, cv and scoring
+        model_name (str): name of the model searched, param_grid keys must be its parameters
+
+    Returns:
+        dict: search options of the job
+    """
+    from sklearn.model_selection import ParameterGrid
+
+    from .search import strategies
+
+    if model_name not in estimators:
+        # uploaded custom models have no known estimator to check the grid against
+        raise ValueError(f"{model_name} does not support hyperparameter search")
+
+    param_grid = data.get('param_grid') or {}
+
+    if isinstance(param_grid, str):
+        param_grid = loads(param_grid)
+
+    if not isinstance(param_grid, dict) or not all(isinstance(values, list) and values for values in param_grid.values()):
+        raise ValueError("param_grid must map parameter names to non empty lists of values")
+
+    options = {
+        "strategy"   : data.get('strategy', 'halving'),
+        "param_grid" : param_grid,
+        "n_iter"     : int(data.get('n_iter', 10)),
+        "cv"         : int(data.get('cv', 5)),
+        "scoring"    : data.get('scoring', ''),
+    }
+
+    if options["strategy"] not in strategies:
+        raise ValueError(f"strategy must be one of {', '.join(strategies)}")
+
+    if options["cv"] < 2 or options["n_iter"] < 1:
+        raise ValueError("cv must be at least 2 and n_iter at least 1")
+
+    # the cores of a search are set by the server, see cpu.n_jobs_for
+    if any(name.split("__")[-1] == "n_jobs" for name in param_grid):
+        raise ValueError("n_jobs cannot be searched")
+
+    unknown = set(param_grid) - set(get_estimator_class(model_name)().get_params())
+
+    if unknown:
+        raise ValueError(f"{', '.join(sorted(unknown))} not parameters of {model_name}")
+
+    candidates = options["n_iter"] if options["strategy"] == "random" else len(ParameterGrid(param_grid))
+
+    if candidates > settings.SEARCH_MAX_CANDIDATES:
+        raise ValueError(f"the search has {candidates} candidates, at most {settings.SEARCH_MAX_CANDIDATES} are allowed")
+
+    return options
+
 class ModelFileDetailView(APIView):
     # how to get model details for non logged in user and edit access to only owner
     permission_classes      = (permissions.AllowAny, )
-    authentication_classes  = (CsrfExemptSessionAuthentication, )
+    authentication_classes  = (APIKeyAuthentication, CsrfExemptSessionAuthentication)
 
     """
         Get details of particular model
     """
+    def get_authenticators(self):
+        """API keys are accepted for predictions only, the other methods need the session of the owner"""
+        if self.request.method != "POST":
+            return [CsrfExemptSessionAuthentication()]
+
+        return super().get_authenticators()
+
+    def perform_authentication(self, request):
+        with metrics.span("prediction_stage", stage = "auth", project = UNKNOWN):
+            super().perform_authentication(request)
+
     def get(self, request, project_name):
         """invokes for particular model
 
@@ -226,14 +449,15 @@ class ModelFileDetailView(APIView):
             JSON: model info
         """
         try:
-            model = ModelFile.objects.get(project_name = project_name)
-            
-            if model.created_by != request.user and model.is_public == False:
+            res = get_model_record(project_name)
+
+            if res is None:
+                raise ModelFile.DoesNotExist("ModelFile matching query does not exist.")
+
+            if res['created_by_user'] != request.user.username and res['is_public'] == False:
                 # no permission to view
                 return Response("You don't have permission to view this model", status.HTTP_401_UNAUTHORIZED)
 
-            res = ModelFileSerializer(model).data
-
             return Response(res, status.HTTP_200_OK)
         except Exception as e:
             res = f"Unable to find model, because {e}"
@@ -268,28 +492,24 @@ class ModelFileDetailView(APIView):
         return Response(res, status.HTTP_404_NOT_FOUND)
 
     def put(self, request, project_name):
-        """used to train the model
+        """used to train the model, training is queued as a job
 
         Args:
             project_name (str): name of the project
 
         Returns:
-            response: message about training of model
+            response: queued training job
         """
         try:
             modelFileRecord   = ModelFile.objects.get(project_name = project_name)
-            modelFileRecord.train(
-                train_set = get_dataset(request.data)
-            )
 
             if modelFileRecord.created_by != request.user:
                 # no permission to train
                 return Response("You don't have permission to train this model", status.HTTP_401_UNAUTHORIZED)
 
-            # implement result generation of train data for user satifiscation
-            # ....
-            
-            return Response("Model trained successfully", status.HTTP_202_ACCEPTED)
+            job = submit_training_job(modelFileRecord, request)
+
+            return Response(TrainingJobSerializer(job).data, status.HTTP_202_ACCEPTED)
         except Exception as e:
             res = f"Unable to update model, because {e}"
     
@@ -335,31 +555,34 @@ class ModelFileDetailView(APIView):
             JSON: prediction result
         """
         # try:
-        if request.user != AnonymousUser():
-            user = request.user
-        else:
-            if request.data.get("api_key") is None:
-                # no permission to update
-                return Response("You don't have permission to prediction from this model", status.HTTP_401_UNAUTHORIZED)
-            
-            api_key_user = User.objects.get(api_key = request.data.get("api_key"))
+        if not request.user.is_authenticated:
+            # no session and no API key
+            return Response("You don't have permission to prediction from this model", status.HTTP_401_UNAUTHORIZED)
 
-            if api_key_user is None:
-                # no permission to update
-                return Response("You don't have permission to prediction from this model", status.HTTP_401_UNAUTHORIZED)
-            
-            user = api_key_user
+        user = request.user
 
-        modelFileRecord = get_object_or_404(ModelFile.objects.filter(project_name = project_name))
+        with metrics.span("prediction_stage", stage = "lookup", project = UNKNOWN) as labels:
+            modelFileRecord = get_object_or_404(ModelFile.objects.select_related('version__artifact').filter(project_name = project_name))
+            labels["project"] = modelFileRecord.project_name
 
-        prediction = modelFileRecord.predict(
-            data = request.data
-        )
-        res = {
-            **ModelFileSerializer(modelFileRecord).data,
-            "prediction" : prediction,
-            "user" : user.username
-        }
+        if modelFileRecord.version_id is None:
+            return Response(f"No model is stored for {project_name}", status.HTTP_404_NOT_FOUND)
+
+        modelFileRecord.record_prediction()
+
+        try:
+            prediction = modelFileRecord.predict(
+                data = prediction_input(request.data)
+            )
+        except PREDICTION_INPUT_ERRORS as e:
+            return Response(prediction_error(e), status.HTTP_400_BAD_REQUEST)
+
+        with metrics.span("prediction_stage", stage = "serialize", project = modelFileRecord.project_name):
+            res = {
+                **ModelFileSerializer(modelFileRecord).data,
+                "prediction" : prediction,
+                "user" : user.username
+            }
 
         return Response(res, status.HTTP_200_OK)
         # except Exception as e:
@@ -367,7 +590,404 @@ class ModelFileDetailView(APIView):
 
         return Response(res, status.HTTP_503_SERVICE_UNAVAILABLE)
 
-class ProjectView(APIView):
-    pass
+@method_decorator(csrf_exempt, name = "dispatch")
+class ModelPredictAsyncView(View):
+    """
+        Prediction from a model as a native async view, for ASGI workers (uvicorn)
+
+        the user and model file are read with the async ORM, model loading and
+        predict run on the prediction executor, a waiting request holds no thread
+    """
+
+    async def post(self, request, project_name):
+        """prediction of target for requested data if model exist
+
+        Args:
+            request (client request): json or form data as sent to api/model/<str:project_name>
+            project_name (str): name of the project
+
+        Returns:
+            JsonResponse: model record with the prediction
+        """
+        try:
+            data = prediction_input(loads(request.body) if request.content_type == "application/json" else {**request.POST.dict(), **request.FILES.dict()})
+        except ValueError as e:
+            return JsonResponse(prediction_error(e), status = status.HTTP_400_BAD_REQUEST, safe = False)
+
+        with metrics.span("prediction_stage", stage = "auth", project = UNKNOWN):
+            key  = get_api_key(request.META, data)
+            user = await api_key_cache.aresolve(key) if key else await request.auser()
+
+        if user is None or not user.is_authenticated:
+            # no session and no valid API key
+            return JsonResponse("You don't have permission to prediction from this model", status = status.HTTP_401_UNAUTHORIZED, safe = False)
+
+        with metrics.span("prediction_stage", stage = "lookup", project = UNKNOWN) as labels:
+            modelFileRecord = await ModelFile.objects.select_related('created_by', 'version__artifact').filter(project_name = project_name).afirst()
+
+            if modelFileRecord is None:
+                return JsonResponse("ModelFile matching query does not exist.", status = status.HTTP_404_NOT_FOUND, safe = False)
+
+            labels["project"] = modelFileRecord.project_name
+
+        if modelFileRecord.version_id is None:
+            return JsonResponse(f"No model is stored for {project_name}", status = status.HTTP_404_NOT_FOUND, safe = False)
+
+        modelFileRecord.record_prediction()
+
+        try:
+            prediction = await modelFileRecord.apredict(data)
+        except PREDICTION_INPUT_ERRORS as e:
+            return JsonResponse(prediction_error(e), status = status.HTTP_400_BAD_REQUEST, safe = False)
+
+        with metrics.span("prediction_stage", stage = "serialize", project = modelFileRecord.project_name):
+            res = {
+                **ModelFileSerializer(modelFileRecord).data,
+                "prediction" : to_json(prediction),
+                "user" : user.username
+            }
+
+        return JsonResponse(res, status = status.HTTP_200_OK)
+
+class ModelBatchPredictView(APIView):
+    """
+        Prediction of a whole csv dataset, streamed back chunk by chunk
+    """
+    permission_classes      = (permissions.AllowAny, )
+    authentication_classes  = (APIKeyAuthentication, CsrfExemptSessionAuthentication)
+
+    content_types = {
+        "ndjson"    : "application/x-ndjson",
+        "csv"       : "text/csv",
+    }
+
+    def post(self, request, project_name):
+        """batch prediction of target for the uploaded dataset
+
+        Args:
+            project_name (str): name of the project
+
+        Returns:
+            StreamingHttpResponse: predictions as ndjson or csv rows
+        """
+        if not request.user.is_authenticated:
+            # no session and no API key
+            return Response("You don't have permission to prediction from this model", status.HTTP_401_UNAUTHORIZED)
+
+        output_format = request.data.get("format", "ndjson")
+        dataset       = get_dataset_data(request).get("dataset")
+
+        if output_format not in self.content_types or dataset is None:
+            return Response("Expected a csv 'dataset' file or a 'dataset_id' and format ndjson or csv", status.HTTP_400_BAD_REQUEST)
+
+        try:
+            chunk_size = int(request.data.get("chunk_size", settings.BATCH_PREDICT_CHUNK_SIZE))
+        except (TypeError, ValueError):
+            chunk_size = 0
+
+        if chunk_size < 1:
+            return Response("chunk_size must be a positive integer", status.HTTP_400_BAD_REQUEST)
+
+        chunk_size = min(chunk_size, settings.BATCH_PREDICT_MAX_CHUNK_SIZE)
+
+        modelFileRecord = get_object_or_404(ModelFile.objects.filter(project_name = project_name))
+
+        if modelFileRecord.version_id is None:
+            return Response(f"No model is stored for {project_name}", status.HTTP_404_NOT_FOUND)
+
+        modelFileRecord.record_prediction()
+
+        predictions = modelFileRecord.predict_batches(
+                        dataset,
+                        chunk_size,
+                        target   = request.data.get("target", ""),
+                        features = request.data.get("features", "*"),
+                    )
+
+        try:
+            # the first chunk is predicted before the response starts, so a schema mismatch is still a 400
+            first = next(predictions, None)
+        except (KeyError, ValueError) as e:
+            return Response(f"Unable to predict, because {e}", status.HTTP_400_BAD_REQUEST)
+
+        predictions = chain([] if first is None else [first], predictions)
+
+        return StreamingHttpResponse(
+            self.render(predictions, output_format),
+            content_type = self.content_types[output_format]
+        )
+
+    def render(self, predictions, output_format):
+        """serializes every predicted chunk as soon as it is ready"""
+        header = True
+
+        for prediction in predictions:
+            chunk = pd.DataFrame({"prediction" : prediction})
+
+            if output_format == "csv":
+                yield chunk.to_csv(header = header, index = False)
+            else:
+                yield chunk.to_json(orient = "records", lines = True).rstrip("\n") + "\n"
+
+            header = False
+
+class ModelEvaluateView(APIView):
+    """
+        Analysis report of a model on a labelled dataset
+    """
+    permission_classes      = (permissions.IsAuthenticated, )
+    authentication_classes  = (CsrfExemptSessionAuthentication, )
+
+    def post(self, request, project_name):
+        """evaluates the model on the uploaded csv dataset or a registered dataset
 
+            ?plot=confusion_matrix, roc or pr returns the png plot of the report instead
 
+        Args:
+            project_name (str): name of the project
+
+        Returns:
+            Response: analysis report
+        """
+        modelFileRecord = get_object_or_404(ModelFile.objects.filter(project_name = project_name))
+
+        if modelFileRecord.created_by != request.user and modelFileRecord.is_public == False:
+            # no permission to view
+            return Response("You don't have permission to evaluate this model", status.HTTP_401_UNAUTHORIZED)
+
+        data = get_dataset_data(request)
+
+        if data.get('dataset') is None:
+            return Response("Expected a csv 'dataset' file or a 'dataset_id'", status.HTTP_400_BAD_REQUEST)
+
+        if not isinstance(data.get('dataset'), Dataset):
+            data = {**dict(data.items()), "data_type" : "csv", "dataset" : data.get("dataset")}
+
+        plot = request.query_params.get('plot')
+
+        try:
+            if plot:
+                return HttpResponse(modelFileRecord.give_analysis_plot(data, plot), content_type = "image/png")
+
+            res = modelFileRecord.give_analysis_report(data)
+        except Exception as e:
+            return Response(f"Unable to evaluate model, because {e}", status.HTTP_400_BAD_REQUEST)
+
+        return Response(res, status.HTTP_200_OK)
+
+class DatasetListView(APIView):
+    """
+        Datasets of the user, or upload a new one
+    """
+    permission_classes      = (permissions.IsAuthenticated, )
+    authentication_classes  = (CsrfExemptSessionAuthentication, )
+
+    def get(self, request):
+        """list of datasets of the user
+
+        Returns:
+            Response: datasets, newest first
+        """
+        datasets = request.user.datasets.order_by('-created_on')
+
+        return Response(DatasetSerializer(datasets, many = True).data, status.HTTP_200_OK)
+
+    def post(self, request):
+        """parses the uploaded csv dataset once and registers it
+
+        Returns:
+            Response: registered dataset with its schema and row count
+        """
+        upload = request.data.get('dataset')
+
+        if upload is None:
+            return Response("Expected a csv 'dataset' file", status.HTTP_400_BAD_REQUEST)
+
+        try:
+            dataset = Dataset.register(upload, request.data.get('name', upload.name), request.user)
+        except Exception as e:
+            return Response(f"Unable to register dataset, because {e}", status.HTTP_400_BAD_REQUEST)
+
+        return Response(DatasetSerializer(dataset).data, status.HTTP_201_CREATED)
+
+class DatasetDetailView(APIView):
+    """
+        Details of a dataset, or delete it
+    """
+    permission_classes      = (permissions.IsAuthenticated, )
+    authentication_classes  = (CsrfExemptSessionAuthentication, )
+
+    def get(self, request, dataset_id):
+        """invokes for particular dataset
+
+        Args:
+            dataset_id (int): id of the dataset
+
+        Returns:
+            Response: dataset with its schema and row count
+        """
+        dataset = get_object_or_404(Dataset, pk = dataset_id, created_by = request.user)
+
+        return Response(DatasetSerializer(dataset).data, status.HTTP_200_OK)
+
+    def delete(self, request, dataset_id):
+        """delete a particular dataset
+
+        Args:
+            dataset_id (int): id of the dataset
+
+        Returns:
+            Response: message about transaction
+        """
+        dataset = get_object_or_404(Dataset, pk = dataset_id, created_by = request.user)
+        dataset.delete()
+
+        return Response(f"Dataset {dataset_id} deleted successfully", status.HTTP_202_ACCEPTED)
+
+class TrainingJobListView(APIView):
+    """
+        Training jobs of a model, or submit a new one
+    """
+    permission_classes      = (permissions.IsAuthenticated, )
+    authentication_classes  = (CsrfExemptSessionAuthentication, )
+
+    def get(self, request, project_name):
+        """list of training jobs of the model
+
+        Args:
+            project_name (str): name of the project
+
+        Returns:
+            Response: training jobs, newest first
+        """
+        modelFileRecord = get_object_or_404(ModelFile.objects.filter(project_name = project_name, created_by = request.user))
+        jobs = modelFileRecord.training_jobs.order_by('-created_on')
+
+        return Response(TrainingJobSerializer(jobs, many = True).data, status.HTTP_200_OK)
+
+    def post(self, request, project_name):
+        """queues a training job of the model
+
+        Args:
+            project_name (str): name of the project
+
+        Returns:
+            Response: queued training job
+        """
+        modelFileRecord = get_object_or_404(ModelFile.objects.filter(project_name = project_name, created_by = request.user))
+
+        try:
+            job = submit_training_job(modelFileRecord, request)
+        except Exception as e:
+            return Response(f"Unable to queue training, because {e}", status.HTTP_400_BAD_REQUEST)
+
+        return Response(TrainingJobSerializer(job).data, status.HTTP_202_ACCEPTED)
+
+class ModelSearchView(APIView):
+    """
+        Hyperparameter searches of a model, or start a new one
+    """
+    permission_classes      = (permissions.IsAuthenticated, )
+    authentication_classes  = (CsrfExemptSessionAuthentication, )
+
+    def get(self, request, project_name):
+        """list of hyperparameter search jobs of the model
+
+        Args:
+            project_name (str): name of the project
+
+        Returns:
+            Response: search jobs with their results, newest first
+        """
+        modelFileRecord = get_object_or_404(ModelFile.objects.filter(project_name = project_name, created_by = request.user))
+        jobs = modelFileRecord.training_jobs.filter(kind = TrainingJob.SEARCH).order_by('-created_on')
+
+        return Response(TrainingJobSerializer(jobs, many = True).data, status.HTTP_200_OK)
+
+    def post(self, request, project_name):
+        """queues a grid, random or successive halving search, the best estimator replaces the model
+
+        Args:
+            project_name (str): name of the project
+
+        Returns:
+            Response: queued search job, poll it at api/jobs/<int:job_id>
+        """
+        modelFileRecord = get_object_or_404(ModelFile.objects.filter(project_name = project_name, created_by = request.user))
+
+        try:
+            job = submit_training_job(modelFileRecord, request, kind = TrainingJob.SEARCH)
+        except Exception as e:
+            return Response(f"Unable to queue search, because {e}", status.HTTP_400_BAD_REQUEST)
+
+        return Response(TrainingJobSerializer(job).data, status.HTTP_202_ACCEPTED)
+
+class ModelVersionListView(APIView):
+    """
+        Stored versions of a model
+    """
+    permission_classes      = (permissions.IsAuthenticated, )
+    authentication_classes  = (CsrfExemptSessionAuthentication, )
+
+    def get(self, request, project_name):
+        """list of stored versions of the model
+
+        Args:
+            project_name (str): name of the project
+
+        Returns:
+            Response: versions, newest first, with the served one marked
+        """
+        modelFileRecord = get_object_or_404(ModelFile.objects.filter(project_name = project_name, created_by = request.user))
+        versions = modelFileRecord.versions.select_related('artifact').order_by('-number')
+        context  = {"served_version_id" : modelFileRecord.version_id}
+
+        return Response(ModelVersionSerializer(versions, many = True, context = context).data, status.HTTP_200_OK)
+
+class ModelRollbackView(APIView):
+    """
+        Serve a stored version of a model again
+    """
+    permission_classes      = (permissions.IsAuthenticated, )
+    authentication_classes  = (CsrfExemptSessionAuthentication, )
+
+    def post(self, request, project_name):
+        """rolls the model back to a stored version
+
+        Args:
+            project_name (str): name of the project
+
+        Returns:
+            Response: served version, the previous one when no version number is given
+        """
+        modelFileRecord = get_object_or_404(ModelFile.objects.select_related('version').filter(project_name = project_name, created_by = request.user))
+
+        try:
+            version = modelFileRecord.rollback(request.data.get('version') or None)
+        except ValueError as e:
+            return Response(f"Unable to roll back, because {e}", status.HTTP_400_BAD_REQUEST)
+
+        return Response(ModelVersionSerializer(version, context = {"served_version_id" : version.pk}).data, status.HTTP_200_OK)
+
+class TrainingJobDetailView(APIView):
+    """
+        Status and progress of a training job
+    """
+    permission_classes      = (permissions.IsAuthenticated, )
+    authentication_classes  = (CsrfExemptSessionAuthentication, )
+
+    def get(self, request, job_id):
+        """invokes when polling a training job
+
+        Args:
+            job_id (int): id of the job
+
+        Returns:
+            Response: status, progress and timings of the job
+        """
+        job = get_object_or_404(TrainingJob.objects.select_related('model_file'), pk = job_id, submitted_by = request.user)
+
+        return Response(TrainingJobSerializer(job).data, status.HTTP_200_OK)
+
+class ProjectView(APIView):
+    pass
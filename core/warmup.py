@@ -0,0 +1,86 @@
+import logging
+import threading
+
+from django.conf    import settings
+from django.db      import connections
+from django.db.models import Q
+from django.utils   import timezone
+
+
+logger = logging.getLogger(__name__)
+
+# warm-up state of this worker process, reported by the readiness endpoint
+state = {
+    "ready"         : not settings.MODEL_WARMUP['ENABLED'],
+    "loaded"        : [],
+    "failed"        : [],
+    "started_on"    : None,
+    "finished_on"   : None,
+}
+
+_started = threading.Lock()
+
+
+def hot_models(top_n = None):
+    """pinned model files and the top_n most predicted ones
+
+    Args:
+        top_n (int, optional): no of most used models. Defaults to MODEL_WARMUP['TOP_N'].
+
+    Returns:
+        list: model files to be preloaded, pinned first
+    """
+    from .models import ModelFile
+
+    top_n  = settings.MODEL_WARMUP['TOP_N'] if top_n is None else top_n
+    pinned = Q(is_pinned = True) | Q(project_name__in = settings.MODEL_WARMUP['PINNED'])
+
+    # records without a served version, like the ones migrated without a model file, have nothing to load
+    stored  = ModelFile.objects.filter(version__isnull = False).select_related('version__artifact')
+
+    records = list(stored.filter(pinned))
+    records += stored.exclude(pinned).order_by('-prediction_count')[:top_n]
+
+    return records
+
+
+def warm_up(top_n = None):
+    """loads the hot model files into the model cache of this process
+
+    Args:
+        top_n (int, optional): no of most used models. Defaults to MODEL_WARMUP['TOP_N'].
+
+    Returns:
+        dict: warm-up state
+    """
+    state.update(ready = False, loaded = [], failed = [], started_on = timezone.now(), finished_on = None)
+
+    try:
+        for record in hot_models(top_n):
+            try:
+                record.load_model()
+                state["loaded"].append(record.project_name)
+            except Exception as e:
+                logger.warning("unable to preload %s: %s", record.project_name, e)
+                state["failed"].append(record.project_name)
+    finally:
+        state.update(ready = True, finished_on = timezone.now())
+        connections.close_all()
+
+    return state
+
+
+def start_warm_up():
+    """runs warm_up once per process in a background thread"""
+    if not settings.MODEL_WARMUP['ENABLED'] or not _started.acquire(blocking = False):
+        return
+
+    threading.Thread(target = warm_up, name = "model-warm-up", daemon = True).start()
+
+
+def post_fork(server, worker):
+    """gunicorn post_fork hook, add `from core.warmup import post_fork` to gunicorn.conf.py
+
+        the app must be loaded (--preload or first import) before the hook runs
+    """
+    start_warm_up()